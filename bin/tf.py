@@ -1,14 +1,61 @@
 #!/usr/bin/env python3
 """
 Terraform wrapper script that pre-loads secrets from Azure Key Vault
-Usage: ./bin/tf.py [-f flavor] [terraform commands and arguments]
+Usage: ./bin/tf.py [-f flavor] [--force] [--no-secret-cache] [--clear-secret-cache] [terraform commands and arguments]
+       ./bin/tf.py --all [--stacks acr,aks] [--jobs 4] [-f flavor] init|plan|validate [arguments]
+
+Secrets are only fetched for commands that need them (plan, apply, destroy,
+import, refresh) and are cached, encrypted, for TF_SECRET_CACHE_TTL seconds
+(default 900; 0 disables the cache). The cache needs a per-session
+$XDG_RUNTIME_DIR for its key and is off without one.
+
+A plan whose inputs (stack files, tfvars, lockfile, state serial) are unchanged
+since the last clean plan is skipped for TF_PLAN_CACHE_TTL seconds (default a
+day); --force always runs it.
+
+--all runs the command in every stack under terraform/ concurrently (init one
+stack at a time, since the shared provider plugin cache isn't safe for
+concurrent installs), streams each stack's output with a [stack] prefix and
+ends with a summary table.
 """
 
 import argparse
+import hashlib
+import json
 import os
+import re
+import secrets
+import shutil
 import subprocess
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Optional, Tuple
+
+
+KEYVAULT_NAME = "kv-terraform-terraform"  # Use terraform Key Vault for API tokens
+CLOUDFLARE_SECRET_NAME = "tf-cloudflare-api-token"
+
+# Only these commands talk to providers, so only they need the Cloudflare token
+SECRET_COMMANDS = ['plan', 'apply', 'destroy', 'import', 'refresh']
+
+# How long a fetched secret may be reused, in seconds
+SECRET_CACHE_TTL = int(os.environ.get('TF_SECRET_CACHE_TTL', '900'))
+
+# How long a clean plan may be reused while its inputs are unchanged, in seconds
+# (a day, so drift made outside terraform is still caught daily)
+PLAN_CACHE_TTL = int(os.environ.get('TF_PLAN_CACHE_TTL', '86400'))
+
+TERRAFORM_DIR = Path(__file__).resolve().parent.parent / 'terraform'
+
+# Commands --all can run across stacks
+MULTI_STACK_COMMANDS = ['init', 'plan', 'validate']
+
+PLAN_SUMMARY = re.compile(r'Plan: (\d+) to add, (\d+) to change, (\d+) to destroy')
+ANSI_ESCAPE = re.compile(r'\x1b\[[0-9;]*m')
 
 
 class Colors:
@@ -30,11 +77,13 @@ def log_error(message):
     print(f"{Colors.RED}[ERROR]{Colors.NC} {message}", file=sys.stderr)
 
 
+class SecretError(Exception):
+    """A secret could not be fetched; args are the lines to report"""
+
+
 def check_azure_auth():
     """Check if Azure CLI is available and authenticated"""
-    try:
-        subprocess.run(['az', '--version'], capture_output=True, check=True)
-    except (subprocess.CalledProcessError, FileNotFoundError):
+    if shutil.which('az') is None:
         log_error("Azure CLI is not installed or not in PATH")
         sys.exit(1)
     
@@ -45,10 +94,8 @@ def check_azure_auth():
         sys.exit(1)
 
 
-def get_cloudflare_token(keyvault_name, secret_name):
-    """Fetch Cloudflare API token from Key Vault"""
-    log_info(f"Fetching Cloudflare API token from Key Vault: {keyvault_name}")
-    
+def fetch_secret(keyvault_name, secret_name):
+    """Fetch a secret value from Key Vault, raising SecretError if it is missing or a placeholder"""
     try:
         result = subprocess.run([
             'az', 'keyvault', 'secret', 'show',
@@ -57,85 +104,225 @@ def get_cloudflare_token(keyvault_name, secret_name):
             '--query', 'value',
             '--output', 'tsv'
         ], capture_output=True, text=True, check=True)
-        
-        token = result.stdout.strip()
-        
-        if token == "replace-me-with-actual-token" or not token:
-            log_error("Cloudflare API token is not set or still has placeholder value")
-            log_error(f"Update the secret with: az keyvault secret set --vault-name '{keyvault_name}' --name '{secret_name}' --value 'your-actual-token'")
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        raise SecretError(
+            f"Failed to fetch secret '{secret_name}' from Key Vault",
+            f"Make sure the Key Vault '{keyvault_name}' exists and contains secret '{secret_name}'",
+            "Also ensure you have 'Get' permission on the Key Vault secrets",
+        )
+    
+    value = result.stdout.strip()
+    if value == "replace-me-with-actual-token" or not value:
+        raise SecretError(
+            f"Secret '{secret_name}' is not set or still has placeholder value",
+            f"Update the secret with: az keyvault secret set --vault-name '{keyvault_name}' --name '{secret_name}' --value 'your-actual-token'",
+        )
+    return value
+
+
+class SecretCache:
+    """
+    Short-lived encrypted local cache for Key Vault secrets.
+    
+    Values are encrypted with the openssl CLI (AES-256, PBKDF2) under a random
+    key kept in $XDG_RUNTIME_DIR (a per-login tmpfs), so cached ciphertext is
+    useless once the session ends. Entries expire after ttl seconds.
+    
+    Without $XDG_RUNTIME_DIR (macOS, many ssh and cron sessions) the key could
+    only live next to the ciphertext, which would protect nothing, so the cache
+    is disabled and `unavailable` says why. Without openssl it is silently
+    disabled.
+    """
+    
+    def __init__(self, ttl=SECRET_CACHE_TTL):
+        self.ttl = ttl
+        cache_home = Path(os.environ.get('XDG_CACHE_HOME', Path.home() / '.cache'))
+        self.directory = cache_home / 'tf-wrapper' / 'secrets'
+        runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+        self.key_path = Path(runtime_dir) / 'tf-wrapper.key' if runtime_dir else None
+        self.unavailable = None
+        if ttl > 0 and not runtime_dir:
+            self.unavailable = ("XDG_RUNTIME_DIR is not set, so there is no per-session place for the "
+                                "encryption key; secrets will not be cached")
+        self.enabled = ttl > 0 and runtime_dir is not None and shutil.which('openssl') is not None
+    
+    def _path(self, keyvault_name, secret_name):
+        return self.directory / f"{keyvault_name}.{secret_name}.enc"
+    
+    def _key(self, create=False):
+        if not self.key_path.exists():
+            if not create:
+                return None
+            self.key_path.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+            try:
+                fd = os.open(self.key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+                with os.fdopen(fd, 'w') as f:
+                    f.write(secrets.token_hex(32))
+            except FileExistsError:
+                pass  # Another invocation created it first
+        return self.key_path.read_text().strip()
+    
+    def _openssl(self, key, data, decrypt=False):
+        cmd = ['openssl', 'enc', '-aes-256-cbc', '-pbkdf2', '-salt', '-a', '-A', '-pass', 'env:TF_WRAPPER_CACHE_KEY']
+        if decrypt:
+            cmd.append('-d')
+        result = subprocess.run(cmd, input=data, capture_output=True, text=True,
+                                env={**os.environ, 'TF_WRAPPER_CACHE_KEY': key})
+        return result.stdout if result.returncode == 0 else None
+    
+    def get(self, keyvault_name, secret_name):
+        """Return the cached value, or None if missing, expired or unreadable"""
+        path = self._path(keyvault_name, secret_name)
+        if not self.enabled or not path.exists():
+            return None
+        key = self._key()
+        plaintext = self._openssl(key, path.read_text(), decrypt=True) if key else None
+        try:
+            entry = json.loads(plaintext) if plaintext else None
+        except ValueError:
+            entry = None
+        if not entry or entry.get('expires', 0) < time.time():
+            path.unlink(missing_ok=True)
+            return None
+        return entry['value']
+    
+    def put(self, keyvault_name, secret_name, value):
+        if not self.enabled:
+            return
+        ciphertext = self._openssl(self._key(create=True), json.dumps({'value': value, 'expires': time.time() + self.ttl}))
+        if ciphertext is None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True, mode=0o700)
+        path = self._path(keyvault_name, secret_name)
+        fd = os.open(f"{path}.part", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            f.write(ciphertext)
+        os.replace(f"{path}.part", path)
+    
+    def clear(self):
+        """Delete all cached secrets and the encryption key; returns the number of entries removed"""
+        removed = 0
+        if self.directory.exists():
+            for path in self.directory.glob('*.enc'):
+                path.unlink()
+                removed += 1
+        if self.key_path is not None:
+            self.key_path.unlink(missing_ok=True)
+        # Older versions kept the key next to the ciphertext when there was no runtime dir
+        (self.directory / '.key').unlink(missing_ok=True)
+        return removed
+
+
+def load_secrets(cache, use_cache=True):
+    """
+    Run the Azure pre-flight checks and fetch the Cloudflare token concurrently.
+    
+    A cached token skips Azure CLI calls entirely.
+    """
+    if use_cache and cache.unavailable:
+        log_warn(cache.unavailable)
+    if use_cache:
+        token = cache.get(KEYVAULT_NAME, CLOUDFLARE_SECRET_NAME)
+        if token:
+            log_info("✓ Cloudflare API token loaded from local cache")
+            return token
+    
+    log_info(f"Fetching Cloudflare API token from Key Vault: {KEYVAULT_NAME}")
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        auth = pool.submit(check_azure_auth)
+        token = pool.submit(fetch_secret, KEYVAULT_NAME, CLOUDFLARE_SECRET_NAME)
+        # Report authentication problems before secret errors they would cause
+        auth.result()
+        try:
+            value = token.result()
+        except SecretError as e:
+            for line in e.args:
+                log_error(line)
             sys.exit(1)
-        
-        return token
-        
-    except subprocess.CalledProcessError:
-        log_error("Failed to fetch Cloudflare API token from Key Vault")
-        log_error(f"Make sure the Key Vault '{keyvault_name}' exists and contains secret '{secret_name}'")
-        log_error("Also ensure you have 'Get' permission on the Key Vault secrets")
-        sys.exit(1)
+    
+    cache.put(KEYVAULT_NAME, CLOUDFLARE_SECRET_NAME, value)
+    log_info("✓ Cloudflare API token loaded from Key Vault")
+    return value
 
 
 def parse_arguments():
     """Parse command line arguments"""
     parser = argparse.ArgumentParser(
         description='Terraform wrapper with Azure Key Vault integration',
-        add_help=False  # We'll handle help ourselves to pass through to terraform
+        add_help=False,  # We'll handle help ourselves to pass through to terraform
+        allow_abbrev=False  # Don't mistake terraform flags for abbreviations of ours
     )
     
     parser.add_argument('-f', '--flavor', 
                        default='terraform',
                        help='Use FLAVOR.tfvars file for plan/apply commands (default: terraform)')
+    parser.add_argument('--no-secret-cache', action='store_true',
+                       help='Fetch secrets from Key Vault even if a cached copy is still valid')
+    parser.add_argument('--clear-secret-cache', action='store_true',
+                       help='Delete locally cached secrets (and exit if no terraform command is given)')
+    parser.add_argument('--force', action='store_true',
+                       help='Always run a full plan, even if inputs are unchanged since the last clean plan')
+    parser.add_argument('--all', action='store_true',
+                       help='Run init/plan/validate in every stack under terraform/')
+    parser.add_argument('--stacks',
+                       help='With --all, only these comma-separated stacks')
+    parser.add_argument('--jobs', type=int, default=4,
+                       help='With --all, how many stacks run at once (default: 4; init always runs one at a time)')
     
-    # Parse known args to extract flavor, let terraform handle the rest
+    # Parse known args to extract wrapper options, let terraform handle the rest
     known_args, terraform_args = parser.parse_known_args()
     
-    return known_args.flavor, terraform_args
+    return known_args, terraform_args
 
 
-def has_remote_backend():
-    """Check if current directory has a remote backend configured"""
+def has_remote_backend(directory='.'):
+    """Check if directory (default: current directory) has a remote backend configured"""
     backend_files = ['backend.tf', 'backend.tf.json']
     for backend_file in backend_files:
-        if Path(backend_file).exists():
-            with open(backend_file, 'r') as f:
+        path = Path(directory) / backend_file
+        if path.exists():
+            with open(path, 'r') as f:
                 content = f.read()
                 if 'backend ' in content and ('azurerm' in content or 's3' in content or 'gcs' in content):
                     return True
     return False
 
 
-def add_flavor_args(flavor, terraform_args):
+def add_flavor_args(flavor, terraform_args, directory='.'):
     """Add -var-file and -state arguments based on flavor"""
     if not terraform_args:
         return terraform_args
     
     command = terraform_args[0]
     modified_args = [command]
+    stack = Path(directory).resolve().name
+    prefix = f"[{stack}] " if directory != '.' else ""
+    remote_backend = has_remote_backend(directory)
     
     # Handle backend configuration for init commands
-    if command == 'init' and has_remote_backend():
-        # Get current directory name for backend key prefix
-        current_dir = os.path.basename(os.getcwd())
-        backend_key = f"{current_dir}/{flavor}.tfstate"
-        log_info(f"Configuring remote backend with key: {backend_key}")
+    if command == 'init' and remote_backend:
+        # Use the stack directory name as the backend key prefix
+        backend_key = f"{stack}/{flavor}.tfstate"
+        log_info(f"{prefix}Configuring remote backend with key: {backend_key}")
         modified_args.extend([f"-backend-config=key={backend_key}"])
     
     # Add state file for all stateful commands (only if no remote backend)
     stateful_commands = ['plan', 'apply', 'destroy', 'import', 'refresh', 'show', 'state', 'taint', 'untaint', 'output']
-    if command in stateful_commands and not has_remote_backend():
+    if command in stateful_commands and not remote_backend:
         state_file = f"{flavor}.tfstate"
-        log_info(f"Using state file: {state_file}")
+        log_info(f"{prefix}Using state file: {state_file}")
         modified_args.extend([f"-state={state_file}"])
-    elif command in stateful_commands and has_remote_backend():
-        log_info(f"Remote backend detected, using remote state management")
+    elif command in stateful_commands and remote_backend:
+        log_info(f"{prefix}Remote backend detected, using remote state management")
     
     # Add var-file for plan/apply commands
     if command in ['plan', 'apply']:
         tfvars_file = f"{flavor}.tfvars"
-        if Path(tfvars_file).exists():
-            log_info(f"Using tfvars file: {tfvars_file}")
+        if (Path(directory) / tfvars_file).exists():
+            log_info(f"{prefix}Using tfvars file: {tfvars_file}")
             modified_args.extend([f"-var-file={tfvars_file}"])
         else:
-            log_warn(f"Tfvars file '{tfvars_file}' not found, proceeding without it")
+            log_warn(f"{prefix}Tfvars file '{tfvars_file}' not found, proceeding without it")
     
     # Add the remaining original arguments
     modified_args.extend(terraform_args[1:])
@@ -143,40 +330,324 @@ def add_flavor_args(flavor, terraform_args):
     return modified_args
 
 
+def state_serial(directory, terraform_args):
+    """
+    Lineage and serial of the stack's state, which change whenever state is written.
+    
+    Remote state is read with 'terraform state pull' (backend access only, no
+    provider refresh). Returns None if the state can't be read.
+    """
+    state_args = [arg for arg in terraform_args if arg.startswith('-state=')]
+    if state_args:
+        path = Path(directory) / state_args[-1].split('=', 1)[1]
+        if not path.exists():
+            return 'no-state'
+        try:
+            content = path.read_text()
+        except OSError:
+            return None
+    else:
+        try:
+            result = subprocess.run(['terraform', 'state', 'pull'], cwd=directory,
+                                    capture_output=True, text=True)
+        except FileNotFoundError:
+            return None
+        if result.returncode != 0:
+            return None
+        content = result.stdout
+    if not content.strip():
+        return 'no-state'
+    try:
+        state = json.loads(content)
+    except ValueError:
+        return None
+    return f"{state.get('lineage')}:{state.get('serial')}"
+
+
+# Flags the wrapper adds itself; they don't change what a plan shows
+WRAPPER_PLAN_FLAGS = ('-input=false', '-detailed-exitcode')
+
+
+def plan_key_args(terraform_args):
+    """Plan arguments without wrapper-added flags, so --all and single-stack plans share cache entries"""
+    return [arg for arg in terraform_args if arg not in WRAPPER_PLAN_FLAGS]
+
+
+def plan_variables(env=None):
+    """TF_VAR_* variables a plan would see (TF_VAR_environment included), sorted by name"""
+    env = os.environ if env is None else env
+    return sorted((name, value) for name, value in env.items() if name.startswith('TF_VAR_'))
+
+
+def plan_fingerprint(directory, terraform_args, env=None):
+    """
+    Hash of everything a plan depends on: the plan arguments, TF_VAR_*
+    variables, the stack's files (.tf plus anything read with
+    file()/templatefile()), -var-file files, the provider lockfile and the
+    state serial. Returns None if the state can't be read.
+    """
+    directory = Path(directory)
+    digest = hashlib.sha256(json.dumps([plan_key_args(terraform_args), plan_variables(env)]).encode())
+    for path in sorted(directory.rglob('*')):
+        relative = path.relative_to(directory)
+        if not path.is_file() or relative.parts[0] == '.terraform' or '.tfstate' in path.name \
+                or path.suffix == '.md':
+            continue
+        digest.update(str(relative).encode() + b'\0' + path.read_bytes() + b'\0')
+    for arg in terraform_args:
+        if arg.startswith('-var-file='):
+            var_file = directory / arg.split('=', 1)[1]
+            digest.update(var_file.read_bytes() if var_file.exists() else b'missing')
+    serial = state_serial(directory, terraform_args)
+    if serial is None:
+        return None
+    digest.update(serial.encode())
+    return digest.hexdigest()
+
+
+class PlanCache:
+    """Remembers stacks whose last plan was clean, keyed by their input fingerprint"""
+    
+    def __init__(self, ttl=PLAN_CACHE_TTL):
+        self.ttl = ttl
+        cache_home = Path(os.environ.get('XDG_CACHE_HOME', Path.home() / '.cache'))
+        self.directory = cache_home / 'tf-wrapper' / 'plans'
+    
+    def _path(self, directory, terraform_args, env=None):
+        # Variables are part of the key, so a clean dev plan never stands in for prod
+        key = hashlib.sha256(json.dumps([str(Path(directory).resolve()), plan_key_args(terraform_args),
+                                         plan_variables(env)]).encode())
+        return self.directory / f"{Path(directory).resolve().name}-{key.hexdigest()[:16]}.json"
+    
+    def lookup(self, directory, terraform_args, env=None):
+        """
+        Args:
+            env: Environment terraform will run with (defaults to os.environ)
+        
+        Returns:
+            Tuple of (fingerprint, cached entry or None); fingerprint is None if
+            the inputs could not be fingerprinted
+        """
+        if self.ttl <= 0:
+            return None, None
+        fingerprint = plan_fingerprint(directory, terraform_args, env)
+        path = self._path(directory, terraform_args, env)
+        if fingerprint is None or not path.exists():
+            return fingerprint, None
+        try:
+            entry = json.loads(path.read_text())
+        except ValueError:
+            return fingerprint, None
+        if entry.get('fingerprint') != fingerprint or time.time() - entry.get('planned_at', 0) > self.ttl:
+            return fingerprint, None
+        return fingerprint, entry
+    
+    def record_clean(self, directory, terraform_args, fingerprint, env=None):
+        if fingerprint is None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(directory, terraform_args, env)
+        path.write_text(json.dumps({'fingerprint': fingerprint, 'planned_at': time.time()}))
+    
+    @staticmethod
+    def describe(entry):
+        age = time.time() - entry['planned_at']
+        return f"{age / 3600:.1f}h ago" if age >= 3600 else f"{age / 60:.0f}m ago"
+
+
+def discover_stacks(names=None):
+    """Directories under terraform/ that contain .tf files, optionally limited to names"""
+    stacks = sorted(path for path in TERRAFORM_DIR.iterdir()
+                    if path.is_dir() and not path.name.startswith('.') and any(path.glob('*.tf')))
+    if names:
+        unknown = set(names) - {stack.name for stack in stacks}
+        if unknown:
+            log_error(f"Unknown stack(s): {', '.join(sorted(unknown))}")
+            sys.exit(1)
+        stacks = [stack for stack in stacks if stack.name in names]
+    return stacks
+
+
+@dataclass
+class StackResult:
+    """Outcome of running terraform in one stack"""
+    stack: str
+    returncode: int
+    seconds: float
+    changes: Optional[Tuple[int, int, int]] = None  # add, change, destroy
+    no_changes: bool = False
+    cached: bool = False
+
+
+def run_stack(stack, terraform_args, env, width, output_lock):
+    """Run terraform in one stack, streaming its output with a [stack] prefix"""
+    started = time.monotonic()
+    result = StackResult(stack=stack.name, returncode=1, seconds=0.0)
+    label = f"[{stack.name}]".ljust(width + 2)
+    try:
+        process = subprocess.Popen(['terraform'] + terraform_args, cwd=stack, env=env,
+                                   stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1)
+    except FileNotFoundError:
+        log_error("Terraform is not installed or not in PATH")
+        result.seconds = time.monotonic() - started
+        return result
+    
+    for line in process.stdout:
+        plain = ANSI_ESCAPE.sub('', line)
+        summary = PLAN_SUMMARY.search(plain)
+        if summary:
+            result.changes = tuple(int(count) for count in summary.groups())
+        elif 'No changes.' in plain:
+            result.no_changes = True
+        with output_lock:
+            print(f"{label} {line}", end='', flush=True)
+    result.returncode = process.wait()
+    result.seconds = time.monotonic() - started
+    return result
+
+
+def print_stack_summary(command, results):
+    """Print a table of per-stack outcomes and timings"""
+    width = max(len('stack'), *(len(result.stack) for result in results))
+    print()
+    print(f"{'stack'.ljust(width)}  {'result':<12} {'add':>5} {'change':>7} {'destroy':>8} {'time':>8}")
+    for result in results:
+        add = change = destroy = ''
+        if command == 'plan' and result.returncode == 2:
+            status, color = 'changes', Colors.YELLOW
+            if result.changes:
+                add, change, destroy = result.changes
+        elif result.returncode == 0:
+            status, color = ('no changes' if command == 'plan' else 'ok'), Colors.GREEN
+            if result.cached:
+                status = 'cached'
+        else:
+            status, color = 'error', Colors.RED
+        print(f"{result.stack.ljust(width)}  {color}{status:<12}{Colors.NC} {add!s:>5} {change!s:>7} "
+              f"{destroy!s:>8} {result.seconds:7.1f}s")
+
+
+def run_all_stacks(options, terraform_args, cache):
+    """
+    Run init/plan/validate across stacks with bounded concurrency.
+    
+    Providers are shared through TF_PLUGIN_CACHE_DIR so each is downloaded
+    once. Terraform doesn't support concurrent writes to the plugin cache, and
+    the stacks share providers, so init runs one stack at a time. plan runs
+    with -detailed-exitcode, so the exit status is 0 when no stack has
+    changes, 2 when some do, and 1 if any stack failed.
+    """
+    command = terraform_args[0] if terraform_args else None
+    if command not in MULTI_STACK_COMMANDS:
+        log_error(f"--all supports: {', '.join(MULTI_STACK_COMMANDS)}")
+        sys.exit(1)
+    
+    stacks = discover_stacks(options.stacks.split(',') if options.stacks else None)
+    if not stacks:
+        log_error(f"No terraform stacks (directories with .tf files) found under {TERRAFORM_DIR}")
+        sys.exit(1)
+    # init installs providers into the shared plugin cache, which isn't safe to fill concurrently
+    jobs = 1 if command == 'init' else max(1, options.jobs)
+    
+    env = os.environ.copy()
+    env.setdefault('TF_PLUGIN_CACHE_DIR', str(Path.home() / '.terraform.d' / 'plugin-cache'))
+    Path(env['TF_PLUGIN_CACHE_DIR']).mkdir(parents=True, exist_ok=True)
+    env['TF_IN_AUTOMATION'] = '1'
+    env['TF_VAR_environment'] = env.get('ENVIRONMENT', 'dev')
+    
+    extra = ['-input=false']
+    if command == 'plan':
+        extra.append('-detailed-exitcode')
+    stack_args = {
+        stack: add_flavor_args(options.flavor, [command] + extra + terraform_args[1:], directory=stack)
+        for stack in stacks
+    }
+    
+    # Skip stacks whose inputs are unchanged since their last clean plan; with
+    # --force, plan them all but still fingerprint them so clean plans are recorded
+    plan_cache = PlanCache()
+    fingerprints, results = {}, {}
+    if command == 'plan' and not any(arg.startswith('-out') for arg in terraform_args):
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            if options.force:
+                futures = {stack: pool.submit(plan_fingerprint, stack, stack_args[stack], env) for stack in stacks}
+                fingerprints = {stack: future.result() for stack, future in futures.items()}
+            else:
+                lookups = {stack: pool.submit(plan_cache.lookup, stack, stack_args[stack], env) for stack in stacks}
+                for stack, lookup in lookups.items():
+                    fingerprints[stack], entry = lookup.result()
+                    if entry:
+                        log_info(f"[{stack.name}] Inputs unchanged since clean plan {PlanCache.describe(entry)}, skipping")
+                        results[stack] = StackResult(stack=stack.name, returncode=0, seconds=0.0, no_changes=True, cached=True)
+    pending = [stack for stack in stacks if stack not in results]
+    
+    if pending and command in SECRET_COMMANDS:
+        env['CLOUDFLARE_API_TOKEN'] = load_secrets(cache, use_cache=not options.no_secret_cache)
+    
+    log_info(f"Running 'terraform {command}' in {len(pending)} stack(s), {jobs} at a time "
+             f"(plugin cache: {env['TF_PLUGIN_CACHE_DIR']})")
+    width = max(len(stack.name) for stack in stacks)
+    output_lock = threading.Lock()
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {stack: pool.submit(run_stack, stack, stack_args[stack], env, width, output_lock) for stack in pending}
+        for stack, future in futures.items():
+            results[stack] = future.result()
+            if command == 'plan' and results[stack].returncode == 0:
+                plan_cache.record_clean(stack, stack_args[stack], fingerprints.get(stack), env)
+    results = [results[stack] for stack in stacks]
+    
+    print_stack_summary(command, results)
+    if any(result.returncode not in (0, 2) or (result.returncode == 2 and command != 'plan') for result in results):
+        return 1
+    return 2 if any(result.returncode == 2 for result in results) else 0
+
+
 def main():
     """Main execution"""
     log_info("Starting Terraform with Azure Key Vault integration")
     
     # Parse arguments
-    flavor, terraform_args = parse_arguments()
+    options, terraform_args = parse_arguments()
     
-    # Add flavor-specific arguments (state file and var-file)
-    terraform_args = add_flavor_args(flavor, terraform_args)
+    cache = SecretCache()
+    if options.clear_secret_cache:
+        log_info(f"Removed {cache.clear()} cached secret(s)")
+        if not terraform_args:
+            return
     
-    # Check prerequisites
-    check_azure_auth()
+    if options.all:
+        sys.exit(run_all_stacks(options, terraform_args, cache))
     
-    # Configuration
-    environment = os.environ.get('ENVIRONMENT', 'dev')
-    keyvault_name = f"kv-terraform-terraform"  # Use terraform Key Vault for API tokens
-    secret_name = "tf-cloudflare-api-token"
+    command = terraform_args[0] if terraform_args else None
     
-    # Fetch and export Cloudflare API token
-    try:
-        cloudflare_token = get_cloudflare_token(keyvault_name, secret_name)
-        os.environ['CLOUDFLARE_API_TOKEN'] = cloudflare_token
-        log_info("✓ Cloudflare API token loaded from Key Vault")
-    except SystemExit:
-        # Token fetch failed critically, let it exit
-        raise
-    except Exception as e:
-        # Token fetch failed, but continue anyway (some terraform commands don't need it)
-        log_warn(f"Failed to fetch Cloudflare API token: {e}")
-        log_warn("Continuing without Cloudflare API token - some operations may fail")
-    
-    # Set other common Terraform variables
+    # Add flavor-specific arguments (state file and var-file)
+    terraform_args = add_flavor_args(options.flavor, terraform_args)
+    
+    # Configuration; set before the plan cache lookup, which keys on TF_VAR_* variables
+    environment = os.environ.get('ENVIRONMENT', 'dev')
     os.environ['TF_VAR_environment'] = environment
     
+    # Skip the plan (and its provider refresh) if nothing changed since the last clean one
+    plan_cache, fingerprint, detailed_exitcode = None, None, True
+    if command == 'plan' and not any(arg.startswith('-out') for arg in terraform_args):
+        plan_cache = PlanCache()
+        if not options.force:
+            fingerprint, entry = plan_cache.lookup('.', terraform_args)
+            if entry:
+                log_info(f"No changes. Inputs unchanged since the last clean plan ({PlanCache.describe(entry)}); "
+                         "use --force to refresh anyway")
+                sys.exit(0)
+        else:
+            fingerprint = plan_fingerprint('.', terraform_args)
+        # -detailed-exitcode tells a clean plan apart; keep the exit status the caller asked for
+        detailed_exitcode = '-detailed-exitcode' in terraform_args
+        if not detailed_exitcode:
+            terraform_args = terraform_args + ['-detailed-exitcode']
+    
+    # Fetch and export Cloudflare API token, only for commands that reach providers
+    if command in SECRET_COMMANDS:
+        os.environ['CLOUDFLARE_API_TOKEN'] = load_secrets(cache, use_cache=not options.no_secret_cache)
+    
     # Execute terraform with processed arguments
     terraform_cmd = ['terraform'] + terraform_args
     log_info(f"Executing: {' '.join(terraform_cmd)}")
@@ -184,10 +655,16 @@ def main():
     try:
         # Use subprocess.run to properly pass environment variables
         result = subprocess.run(terraform_cmd, env=os.environ.copy())
-        sys.exit(result.returncode)
     except FileNotFoundError:
         log_error("Terraform is not installed or not in PATH")
         sys.exit(1)
+    
+    if plan_cache is not None:
+        if result.returncode == 0:
+            plan_cache.record_clean('.', terraform_args, fingerprint)
+        if result.returncode == 2 and not detailed_exitcode:
+            sys.exit(0)
+    sys.exit(result.returncode)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,345 @@
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple, BinaryIO
+
+
+DEFAULT_STORE_DIR = Path.home() / ".cache" / "subtitle_downloader" / "artifacts"
+DEFAULT_QUOTA_BYTES = 20 * 1024 ** 3
+
+# Artifact kinds kept in the catalogue
+KINDS = ("download", "audio", "upload", "pcm", "transcript", "segments", "profile")
+
+# Objects used this recently are never evicted, so a session can't lose a file it is about to read
+EVICTION_GRACE_SECONDS = 600
+# Scratch directories older than this are assumed abandoned
+SCRATCH_MAX_AGE_SECONDS = 24 * 3600
+
+CHUNK_SIZE = 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    digest TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS objects_lru ON objects (last_used);
+CREATE TABLE IF NOT EXISTS artifacts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    digest TEXT NOT NULL REFERENCES objects (digest),
+    metadata TEXT,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS artifacts_by_digest ON artifacts (digest);
+CREATE INDEX IF NOT EXISTS artifacts_by_kind ON artifacts (kind, last_used DESC);
+CREATE INDEX IF NOT EXISTS artifacts_recent ON artifacts (last_used DESC);
+"""
+
+
+def default_store_dir() -> Path:
+    env_dir = os.environ.get("SUBTITLE_DOWNLOADER_CACHE_DIR")
+    return Path(env_dir) / "artifacts" if env_dir else DEFAULT_STORE_DIR
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@dataclass
+class Artifact:
+    """A catalogued file in the artifact store"""
+    id: int
+    key: str
+    kind: str
+    name: str
+    digest: str
+    path: str
+    size: int
+    created: float
+    last_used: float
+    metadata: Optional[Dict[str, Any]] = None
+
+
+@dataclass
+class StoreUsage:
+    """Size of the artifact store against its quota"""
+    artifacts: int
+    objects: int
+    size_bytes: int
+    quota_bytes: int
+
+
+class ArtifactStore:
+    """
+    Shared, content-addressed store for downloads, audio, transcripts and
+    other artifacts, with a SQLite catalogue.
+
+    Files are stored once per SHA-256 digest under objects/, keeping the first
+    name they were stored under so players and downloads see a readable file
+    name. Catalogue entries map a lookup key (e.g. the video and time range of
+    a download) to an object, so sessions can reuse each other's work. Once
+    the store grows past its quota, the least recently used objects are
+    evicted with their catalogue entries.
+
+    Work in progress goes in scratch directories (scratch_dir()), which are
+    moved into the store with put(..., move=True) and cleaned up if abandoned.
+    """
+
+    def __init__(self, root: Optional[str] = None, quota_bytes: Optional[int] = None):
+        """
+        Args:
+            root: Store directory (defaults to $SUBTITLE_DOWNLOADER_CACHE_DIR/artifacts
+                  or ~/.cache/subtitle_downloader/artifacts)
+            quota_bytes: Maximum size of stored objects (defaults to
+                         $SUBTITLE_DOWNLOADER_ARTIFACT_QUOTA_GB or 20 GB)
+        """
+        self.root = Path(root) if root else default_store_dir()
+        if quota_bytes is None:
+            quota_gb = os.environ.get("SUBTITLE_DOWNLOADER_ARTIFACT_QUOTA_GB")
+            quota_bytes = int(float(quota_gb) * 1024 ** 3) if quota_gb else DEFAULT_QUOTA_BYTES
+        self.quota_bytes = quota_bytes
+        self.objects_dir = self.root / "objects"
+        self.scratch_root = self.root / "scratch"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.scratch_root.mkdir(parents=True, exist_ok=True)
+        self.path = self.root / "catalogue.sqlite3"
+        self._local = threading.local()
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=60, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _row_to_artifact(row: sqlite3.Row) -> Artifact:
+        return Artifact(
+            id=row["id"],
+            key=row["key"],
+            kind=row["kind"],
+            name=row["name"],
+            digest=row["digest"],
+            path=row["path"],
+            size=row["size"],
+            created=row["created"],
+            last_used=row["last_used"],
+            metadata=json.loads(row["metadata"]) if row["metadata"] else None,
+        )
+
+    def _select(self, where: str = "", params: Tuple = (), suffix: str = "") -> List[Artifact]:
+        rows = self._connect().execute(
+            "SELECT a.id, a.key, a.kind, a.name, a.digest, a.metadata, a.created, a.last_used, o.path, o.size "
+            f"FROM artifacts a JOIN objects o ON o.digest = a.digest {where} {suffix}",
+            params,
+        ).fetchall()
+        return [self._row_to_artifact(row) for row in rows]
+
+    def scratch_dir(self, prefix: str = "work") -> str:
+        """Create a private working directory inside the store (same filesystem, so moves are renames)."""
+        path = self.scratch_root / f"{prefix}_{uuid.uuid4().hex[:12]}"
+        path.mkdir(parents=True)
+        return str(path)
+
+    def clean_scratch(self, max_age: float = SCRATCH_MAX_AGE_SECONDS) -> int:
+        """Remove scratch directories untouched for max_age seconds; returns how many were removed."""
+        removed = 0
+        cutoff = time.time() - max_age
+        for path in self.scratch_root.iterdir():
+            try:
+                if path.stat().st_mtime < cutoff:
+                    shutil.rmtree(path, ignore_errors=True) if path.is_dir() else path.unlink()
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+
+    def _add_object(self, source: Path, digest: str, name: str, move: bool) -> Path:
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute("SELECT path FROM objects WHERE digest = ?", (digest,)).fetchone()
+        if row and Path(row["path"]).exists():
+            conn.execute("UPDATE objects SET last_used = ? WHERE digest = ?", (now, digest))
+            if move:
+                source.unlink()
+            return Path(row["path"])
+
+        target = self.objects_dir / digest[:2] / digest / name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        partial = target.with_name(f".{target.name}.{uuid.uuid4().hex[:8]}.part")
+        if move:
+            shutil.move(str(source), partial)
+        else:
+            shutil.copyfile(source, partial)
+        os.replace(partial, target)
+        conn.execute(
+            "INSERT OR REPLACE INTO objects (digest, path, size, created, last_used) VALUES (?, ?, ?, ?, ?)",
+            (digest, str(target), target.stat().st_size, now, now),
+        )
+        return target
+
+    @staticmethod
+    def _check_kind(kind: str):
+        if kind not in KINDS:
+            raise ValueError(f"Unknown artifact kind '{kind}', expected one of: {', '.join(KINDS)}")
+
+    def _catalogue(self, key: str, kind: str, name: str, digest: str, metadata: Optional[Dict[str, Any]]) -> Artifact:
+        now = time.time()
+        self._connect().execute(
+            "INSERT INTO artifacts (key, kind, name, digest, metadata, created, last_used) VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET kind = excluded.kind, name = excluded.name, digest = excluded.digest, "
+            "metadata = excluded.metadata, last_used = excluded.last_used",
+            (key, kind, name, digest, json.dumps(metadata) if metadata else None, now, now),
+        )
+        self.evict()
+        return self._select("WHERE a.key = ?", (key,))[0]
+
+    def put(self,
+            path: str,
+            kind: str,
+            key: Optional[str] = None,
+            name: Optional[str] = None,
+            metadata: Optional[Dict[str, Any]] = None,
+            move: bool = False) -> Artifact:
+        """
+        Add a file to the store.
+
+        Args:
+            path: File to store
+            kind: One of KINDS
+            key: Lookup key for get(); defaults to "<kind>:<digest>"
+            name: Display name (defaults to the file name)
+            metadata: JSON-serialisable details kept with the catalogue entry
+            move: Move the file instead of copying it (use for scratch files)
+
+        Returns:
+            The catalogued Artifact, whose path points inside the store
+
+        Raises:
+            ValueError: For an unknown kind
+        """
+        self._check_kind(kind)
+        source = Path(path)
+        digest = file_digest(str(source))
+        name = name or source.name
+        self._add_object(source, digest, name, move)
+        return self._catalogue(key or f"{kind}:{digest}", kind, name, digest, metadata)
+
+    def put_stream(self,
+                   stream: BinaryIO,
+                   kind: str,
+                   name: str,
+                   key: Optional[str] = None,
+                   metadata: Optional[Dict[str, Any]] = None) -> Artifact:
+        """
+        Add a file-like object (e.g. an upload) to the store, hashing it while it is written.
+
+        Returns:
+            The catalogued Artifact
+        """
+        self._check_kind(kind)
+        digest = hashlib.sha256()
+        partial = self.scratch_root / f".upload_{uuid.uuid4().hex[:12]}.part"
+        with open(partial, "wb") as f:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                f.write(chunk)
+        digest = digest.hexdigest()
+        self._add_object(partial, digest, os.path.basename(name), move=True)
+        return self._catalogue(key or f"{kind}:{digest}", kind, os.path.basename(name), digest, metadata)
+
+    def get(self, key: str) -> Optional[Artifact]:
+        """
+        Look up an artifact by key and mark it as recently used.
+
+        Entries whose file has gone missing are dropped.
+        """
+        found = self._select("WHERE a.key = ?", (key,))
+        if not found:
+            return None
+        artifact = found[0]
+        if not os.path.exists(artifact.path):
+            self._remove_object(artifact.digest)
+            return None
+        self.touch(artifact)
+        return artifact
+
+    def touch(self, artifact: Artifact):
+        now = time.time()
+        conn = self._connect()
+        conn.execute("UPDATE artifacts SET last_used = ? WHERE id = ?", (now, artifact.id))
+        conn.execute("UPDATE objects SET last_used = ? WHERE digest = ?", (now, artifact.digest))
+        artifact.last_used = now
+
+    def count(self, kind: Optional[str] = None) -> int:
+        """Number of catalogued artifacts, optionally of one kind."""
+        if kind:
+            return self._connect().execute("SELECT COUNT(*) FROM artifacts WHERE kind = ?", (kind,)).fetchone()[0]
+        return self._connect().execute("SELECT COUNT(*) FROM artifacts").fetchone()[0]
+
+    def list(self, kind: Optional[str] = None, page: int = 0, page_size: int = 20) -> List[Artifact]:
+        """One page of the catalogue (optionally of one kind), most recently used first."""
+        where, params = ("WHERE a.kind = ?", (kind,)) if kind else ("", ())
+        return self._select(where, params + (page_size, page * page_size),
+                            "ORDER BY a.last_used DESC, a.id DESC LIMIT ? OFFSET ?")
+
+    def usage(self) -> StoreUsage:
+        conn = self._connect()
+        objects, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM objects").fetchone()
+        return StoreUsage(artifacts=self.count(), objects=objects, size_bytes=size, quota_bytes=self.quota_bytes)
+
+    def _remove_object(self, digest: str):
+        conn = self._connect()
+        row = conn.execute("SELECT path FROM objects WHERE digest = ?", (digest,)).fetchone()
+        conn.execute("DELETE FROM artifacts WHERE digest = ?", (digest,))
+        conn.execute("DELETE FROM objects WHERE digest = ?", (digest,))
+        if row:
+            shutil.rmtree(Path(row["path"]).parent, ignore_errors=True)
+
+    def evict(self, quota_bytes: Optional[int] = None) -> int:
+        """
+        Delete least recently used objects until the store fits its quota.
+
+        Objects used in the last EVICTION_GRACE_SECONDS are kept even if the
+        store stays over quota.
+
+        Returns:
+            Bytes freed
+        """
+        quota_bytes = self.quota_bytes if quota_bytes is None else quota_bytes
+        conn = self._connect()
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+        if total <= quota_bytes:
+            return 0
+        freed = 0
+        candidates = conn.execute(
+            "SELECT digest, size FROM objects WHERE last_used < ? ORDER BY last_used",
+            (time.time() - EVICTION_GRACE_SECONDS,),
+        ).fetchall()
+        for row in candidates:
+            if total - freed <= quota_bytes:
+                break
+            self._remove_object(row["digest"])
+            freed += row["size"]
+        return freed
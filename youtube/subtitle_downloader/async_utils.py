@@ -0,0 +1,70 @@
+import asyncio
+import functools
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+
+# Downloads and other I/O-bound calls share one generously sized pool so many
+# can run at once; model inference gets its own executor per Transcriber.
+_IO_EXECUTOR: Optional[ThreadPoolExecutor] = None
+
+
+def io_executor() -> ThreadPoolExecutor:
+    global _IO_EXECUTOR
+    if _IO_EXECUTOR is None:
+        _IO_EXECUTOR = ThreadPoolExecutor(max_workers=16, thread_name_prefix="subtitle_downloader_io")
+    return _IO_EXECUTOR
+
+
+async def run_blocking(func: Callable,
+                       *args,
+                       executor: Optional[ThreadPoolExecutor] = None,
+                       timeout: Optional[float] = None,
+                       on_cancel: Optional[Callable[[], None]] = None,
+                       **kwargs):
+    """
+    Run a blocking call in an executor and await its result.
+
+    Threads cannot be interrupted, so on cancellation or timeout on_cancel()
+    is called to ask the work to stop (e.g. by setting an Event it polls) and
+    the CancelledError/TimeoutError is raised straight away.
+
+    Args:
+        func: Blocking callable
+        executor: Executor to use (defaults to the shared I/O pool)
+        timeout: Seconds before raising asyncio.TimeoutError
+        on_cancel: Called if the await is cancelled or times out
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(executor or io_executor(), functools.partial(func, *args, **kwargs))
+    try:
+        return await asyncio.wait_for(future, timeout)
+    except (asyncio.CancelledError, asyncio.TimeoutError):
+        if on_cancel:
+            on_cancel()
+        raise
+
+
+async def run_process(cmd: List[str], timeout: Optional[float] = None) -> Tuple[int, str, str]:
+    """
+    Run a subprocess without blocking the event loop.
+
+    The process is killed if the await is cancelled or times out.
+
+    Returns:
+        Tuple of (returncode, stdout, stderr)
+    """
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+    except (asyncio.CancelledError, asyncio.TimeoutError):
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        raise
+    return process.returncode, stdout.decode(errors="replace"), stderr.decode(errors="replace")
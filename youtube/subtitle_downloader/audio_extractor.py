@@ -32,6 +32,35 @@ class AudioExtractor:
             return hours * 3600 + minutes * 60 + seconds
         return float(time_str)
     
+    def _trim_command(self,
+                      input_path: str,
+                      start_time: Optional[str],
+                      end_time: Optional[str],
+                      output_format: str):
+        """Build the ffmpeg command for trim_audio; returns (cmd, output_file)"""
+        input_file = Path(input_path)
+        output_file = self.output_dir / f"{input_file.stem}_segment.{output_format}"
+        
+        # Build ffmpeg command
+        cmd = ["ffmpeg", "-i", input_path]
+        
+        if start_time:
+            start_seconds = self.convert_time_to_seconds(start_time)
+            cmd.extend(["-ss", str(start_seconds)])
+        
+        if end_time:
+            if start_time:
+                start_seconds = self.convert_time_to_seconds(start_time)
+                end_seconds = self.convert_time_to_seconds(end_time)
+                duration = end_seconds - start_seconds
+                cmd.extend(["-t", str(duration)])
+            else:
+                end_seconds = self.convert_time_to_seconds(end_time)
+                cmd.extend(["-to", str(end_seconds)])
+        
+        cmd.extend(["-y", str(output_file)])  # -y to overwrite existing files
+        return cmd, output_file
+    
     def trim_audio(self, 
                    input_path: str,
                    start_time: Optional[str] = None,
@@ -56,27 +85,7 @@ class AudioExtractor:
                     error_message=f"Input file not found: {input_path}"
                 )
             
-            input_file = Path(input_path)
-            output_file = self.output_dir / f"{input_file.stem}_segment.{output_format}"
-            
-            # Build ffmpeg command
-            cmd = ["ffmpeg", "-i", input_path]
-            
-            if start_time:
-                start_seconds = self.convert_time_to_seconds(start_time)
-                cmd.extend(["-ss", str(start_seconds)])
-            
-            if end_time:
-                if start_time:
-                    start_seconds = self.convert_time_to_seconds(start_time)
-                    end_seconds = self.convert_time_to_seconds(end_time)
-                    duration = end_seconds - start_seconds
-                    cmd.extend(["-t", str(duration)])
-                else:
-                    end_seconds = self.convert_time_to_seconds(end_time)
-                    cmd.extend(["-to", str(end_seconds)])
-            
-            cmd.extend(["-y", str(output_file)])  # -y to overwrite existing files
+            cmd, output_file = self._trim_command(input_path, start_time, end_time, output_format)
             
             # Execute ffmpeg command
             result = subprocess.run(cmd, capture_output=True, text=True)
@@ -98,6 +107,53 @@ class AudioExtractor:
                 error_message=str(e)
             )
     
+    async def trim_audio_async(self,
+                               input_path: str,
+                               start_time: Optional[str] = None,
+                               end_time: Optional[str] = None,
+                               output_format: str = "mp3",
+                               timeout: Optional[float] = None) -> AudioExtractionResult:
+        """
+        Async counterpart of trim_audio using an asyncio subprocess for ffmpeg
+        
+        Cancelling the await (or hitting the timeout) kills ffmpeg.
+        
+        Args:
+            timeout: Seconds before raising asyncio.TimeoutError
+        
+        Returns:
+            AudioExtractionResult object
+        """
+        import asyncio
+        from async_utils import run_process
+        
+        if not os.path.exists(input_path):
+            return AudioExtractionResult(
+                success=False,
+                error_message=f"Input file not found: {input_path}"
+            )
+        
+        try:
+            cmd, output_file = self._trim_command(input_path, start_time, end_time, output_format)
+            returncode, _, stderr = await run_process(cmd, timeout=timeout)
+        except asyncio.TimeoutError:
+            raise
+        except Exception as e:
+            return AudioExtractionResult(
+                success=False,
+                error_message=str(e)
+            )
+        
+        if returncode == 0:
+            return AudioExtractionResult(
+                success=True,
+                output_path=str(output_file)
+            )
+        return AudioExtractionResult(
+            success=False,
+            error_message=f"FFmpeg error: {stderr}"
+        )
+    
     def convert_format(self, 
                       input_path: str, 
                       output_format: str = "mp3",
@@ -152,3 +208,59 @@ class AudioExtractor:
                 success=False,
                 error_message=str(e)
             )
+
+    def remove_silence(self,
+                       input_path: str,
+                       threshold_db: float = -40.0,
+                       min_silence: float = 2.0,
+                       output_format: str = "mp3") -> AudioExtractionResult:
+        """
+        Drop stretches of silence using ffmpeg's energy-based silenceremove filter
+
+        Shortens what Whisper has to decode and removes the silent gaps it tends
+        to hallucinate in. Note that timestamps in a transcript of the output no
+        longer line up with the original recording.
+
+        Args:
+            input_path: Path to input audio file
+            threshold_db: Level (dBFS) below which audio counts as silence
+            min_silence: Minimum silence duration (seconds) to remove
+            output_format: Output audio format (mp3, wav, etc.)
+
+        Returns:
+            AudioExtractionResult object
+        """
+        try:
+            if not os.path.exists(input_path):
+                return AudioExtractionResult(
+                    success=False,
+                    error_message=f"Input file not found: {input_path}"
+                )
+
+            input_file = Path(input_path)
+            output_file = self.output_dir / f"{input_file.stem}_voiced.{output_format}"
+
+            audio_filter = (
+                f"silenceremove=stop_periods=-1:stop_duration={min_silence}"
+                f":stop_threshold={threshold_db}dB"
+            )
+            cmd = ["ffmpeg", "-i", input_path, "-af", audio_filter, "-y", str(output_file)]
+
+            result = subprocess.run(cmd, capture_output=True, text=True)
+
+            if result.returncode == 0:
+                return AudioExtractionResult(
+                    success=True,
+                    output_path=str(output_file)
+                )
+            else:
+                return AudioExtractionResult(
+                    success=False,
+                    error_message=f"FFmpeg error: {result.stderr}"
+                )
+
+        except Exception as e:
+            return AudioExtractionResult(
+                success=False,
+                error_message=str(e)
+            )
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Load-test harness for the blog post generation path.
+
+Drives concurrent blog generations through blog_generator against a local
+fake endpoint (started in-process by default) or any OpenAI-compatible URL,
+and reports latency percentiles, time to first token and throughput.
+
+Usage:
+    python benchmarks/bench_blog.py --requests 50 --concurrency 8
+    python benchmarks/bench_blog.py --mode map-reduce --transcript-chars 60000
+    python benchmarks/bench_blog.py --api-url http://127.0.0.1:8088/v1/chat/completions --json
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import List, Optional, Dict, Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from blog_generator import generate_blog_post, generate_blog_post_map_reduce, stream_blog_post  # noqa: E402
+from fake_llm_server import FakeLLMServer, add_config_arguments, config_from_args  # noqa: E402
+
+
+MODES = ("complete", "stream", "map-reduce")
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of values (None if empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def synthetic_transcript(chars: int) -> str:
+    """Build a timestamped transcript of roughly `chars` characters."""
+    line = "and this is what the passage is teaching us about faith and grace today"
+    lines = []
+    total = 0
+    second = 0
+    while total < chars:
+        text = f"[{second // 3600:02d}:{second // 60 % 60:02d}:{second % 60:02d}] {line}"
+        lines.append(text)
+        total += len(text) + 1
+        second += 5
+    return "\n".join(lines)
+
+
+def run_one(mode: str, api_url: str, api_key: str, transcript: str, concurrency: int) -> Dict[str, Any]:
+    kwargs = dict(
+        api_url=api_url,
+        api_key=api_key,
+        model="bench-model",
+        system_prompt="You are a helpful assistant that writes engaging blog posts.",
+        user_prompt="Write a blog post summarizing the sermon.",
+        transcript=transcript,
+        temperature=0.3,
+    )
+    started = time.perf_counter()
+    ttft = None
+    if mode == "stream":
+        stream = stream_blog_post(**kwargs)
+        for _ in stream:
+            if ttft is None:
+                ttft = time.perf_counter() - started
+    elif mode == "map-reduce":
+        generate_blog_post_map_reduce(**kwargs, concurrency=concurrency)
+    else:
+        generate_blog_post(**kwargs)
+    return {"latency": time.perf_counter() - started, "ttft": ttft}
+
+
+def run_benchmark(mode: str,
+                  api_url: str,
+                  api_key: str,
+                  requests: int,
+                  concurrency: int,
+                  transcript_chars: int,
+                  map_concurrency: int) -> Dict[str, Any]:
+    """Run `requests` generations with `concurrency` in flight and summarise them."""
+    transcript = synthetic_transcript(transcript_chars)
+    latencies: List[float] = []
+    ttfts: List[float] = []
+    errors: List[str] = []
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [
+            pool.submit(run_one, mode, api_url, api_key, transcript, map_concurrency)
+            for _ in range(requests)
+        ]
+        for future in as_completed(futures):
+            try:
+                sample = future.result()
+            except Exception as e:
+                errors.append(str(e))
+                continue
+            latencies.append(sample["latency"])
+            if sample["ttft"] is not None:
+                ttfts.append(sample["ttft"])
+    wall = time.perf_counter() - started
+
+    def summary(values):
+        return {
+            "p50": percentile(values, 50),
+            "p90": percentile(values, 90),
+            "p99": percentile(values, 99),
+            "max": max(values) if values else None,
+        }
+
+    return {
+        "mode": mode,
+        "requests": requests,
+        "concurrency": concurrency,
+        "transcript_chars": transcript_chars,
+        "succeeded": len(latencies),
+        "failed": len(errors),
+        "wall_seconds": wall,
+        "throughput_rps": len(latencies) / wall if wall else 0.0,
+        "latency_seconds": summary(latencies),
+        "ttft_seconds": summary(ttfts) if ttfts else None,
+        "errors": errors[:5],
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    def fmt(value):
+        return "-" if value is None else f"{value:.3f}s"
+
+    print(f"Mode: {report['mode']}  requests: {report['requests']}  concurrency: {report['concurrency']}  "
+          f"transcript: {report['transcript_chars']} chars")
+    print(f"Succeeded: {report['succeeded']}  failed: {report['failed']}  "
+          f"wall: {report['wall_seconds']:.2f}s  throughput: {report['throughput_rps']:.2f} req/s")
+    for label, key in (("Latency", "latency_seconds"), ("TTFT", "ttft_seconds")):
+        stats = report.get(key)
+        if stats:
+            print(f"{label:8s} p50 {fmt(stats['p50'])}  p90 {fmt(stats['p90'])}  "
+                  f"p99 {fmt(stats['p99'])}  max {fmt(stats['max'])}")
+    for error in report["errors"]:
+        print(f"Error: {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent blog post generation")
+    parser.add_argument('--mode', choices=MODES, default='stream', help='Generation path to exercise')
+    parser.add_argument('--requests', type=int, default=20, help='Total generations to run')
+    parser.add_argument('--concurrency', type=int, default=4, help='Generations in flight at once')
+    parser.add_argument('--transcript-chars', type=int, default=40000, help='Size of the synthetic transcript')
+    parser.add_argument('--map-concurrency', type=int, default=4, help='Section calls in flight per map-reduce run')
+    parser.add_argument('--api-url', help='Benchmark an existing endpoint instead of starting the fake server')
+    parser.add_argument('--api-key', default='bench', help='API key sent to the endpoint')
+    parser.add_argument('--json', action='store_true', dest='output_json', help='Output the report as JSON')
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    server = None
+    api_url = args.api_url
+    if not api_url:
+        server = FakeLLMServer(config_from_args(args)).start()
+        api_url = server.url
+
+    try:
+        report = run_benchmark(
+            args.mode, api_url, args.api_key, args.requests, args.concurrency,
+            args.transcript_chars, args.map_concurrency,
+        )
+        if server:
+            report["server_requests"] = server.request_count
+    finally:
+        if server:
+            server.stop()
+
+    if args.output_json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
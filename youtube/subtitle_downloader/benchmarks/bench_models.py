@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+Accuracy-versus-speed matrix of Whisper backends, models and precisions.
+
+Transcribes every clip in the reference corpus (benchmarks/reference_corpus)
+with each available configuration and reports word error rate, Bible book
+name accuracy, real-time factor and peak RAM, then recommends the fastest
+configuration that meets the accuracy thresholds on this host, as the
+model_size to pass to Transcriber (or --model-size on the command line).
+
+Each configuration runs in its own subprocess so peak RAM is measured per
+configuration and models don't stay resident between runs. Model load time
+is reported separately and excluded from the real-time factor.
+
+Usage:
+    python benchmarks/bench_models.py
+    python benchmarks/bench_models.py --models tiny,base,small --max-wer 0.12
+    python benchmarks/bench_models.py --fetch --json --output results/models.json
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PACKAGE_DIR))
+
+from glossary import DEFAULT_GLOSSARY_PATH, apply_glossary, compile_glossary, load_glossary  # noqa: E402
+from instrumentation import peak_rss_bytes  # noqa: E402
+from transcriber import MLX_MODELS, OPENAI_MODELS  # noqa: E402
+
+
+DEFAULT_CORPUS = Path(__file__).resolve().parent / "reference_corpus" / "manifest.json"
+
+# openai-whisper sizes are the ones Transcriber (and the UI) accept by name;
+# mlx repos are passed through, or map to the "default"/"fast" profiles
+CANDIDATE_MODELS = {
+    "openai": ["tiny", "base", "small", "medium", "large"],
+    "mlx": [
+        "mlx-community/whisper-tiny",
+        "mlx-community/whisper-base",
+        "mlx-community/whisper-small",
+        "mlx-community/whisper-medium",
+        "mlx-community/whisper-large-v3-turbo",
+        "mlx-community/whisper-large-v3",
+    ],
+}
+
+WORD = re.compile(r"[a-z0-9]+(?:'[a-z0-9]+)*")
+
+# Text-to-speech commands for synthesized clips, first one installed wins
+TTS_COMMANDS = [
+    ("espeak-ng", lambda text, out: ["espeak-ng", "-s", "150", "-f", text, "-w", out]),
+    ("espeak", lambda text, out: ["espeak", "-s", "150", "-f", text, "-w", out]),
+    ("say", lambda text, out: ["say", "-f", text, "-o", out, "--file-format=WAVE", "--data-format=LEI16@16000"]),
+]
+
+
+def normalise_words(text: str) -> List[str]:
+    """Lowercase words without punctuation, for WER."""
+    return WORD.findall(text.lower())
+
+
+def word_errors(reference: List[str], hypothesis: List[str]) -> int:
+    """Word-level Levenshtein distance (substitutions + deletions + insertions)."""
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hypothesis, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word),
+            ))
+        previous = current
+    return previous[-1]
+
+
+def bible_books(glossary_path: Optional[str] = None) -> List[str]:
+    """Correctly written Bible book names from the glossary's bible_books category."""
+    with open(glossary_path or DEFAULT_GLOSSARY_PATH, "r", encoding="utf-8") as f:
+        return sorted(set(json.load(f).get("bible_books", {}).values()), key=len, reverse=True)
+
+
+def term_hits(reference: str, hypothesis: str, terms: List[str]) -> Dict[str, int]:
+    """
+    Count reference occurrences of each term and how many the hypothesis got right.
+
+    Matching is case-sensitive: "mark 4" is not an acceptable "Mark 4" in a
+    published transcript.
+    """
+    expected = found = 0
+    for term in terms:
+        pattern = re.compile(rf"(?<![\w']){re.escape(term)}(?![\w'])")
+        in_reference = len(pattern.findall(reference))
+        if in_reference:
+            expected += in_reference
+            found += min(in_reference, len(pattern.findall(hypothesis)))
+    return {"expected": expected, "found": found}
+
+
+def load_corpus(manifest_path: Path) -> List[Dict[str, Any]]:
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        clips = json.load(f).get("clips", [])
+    base = manifest_path.parent
+    for clip in clips:
+        clip["reference_path"] = str(base / clip["reference"])
+        clip["audio_path"] = str(base / clip["audio"]) if clip.get("audio") else None
+    return clips
+
+
+def model_key(backend: str, model: str) -> str:
+    """The Transcriber(model_size=...) value that selects a candidate model on its backend."""
+    if backend == "openai" and model in CANDIDATE_MODELS["openai"]:
+        return model
+    profiles = MLX_MODELS if backend == "mlx" else OPENAI_MODELS
+    for profile in ("default", "fast"):
+        if profiles[profile] == model:
+            return profile
+    # Transcriber uses any other name as given
+    return model
+
+
+def synthesize_clip(clip: Dict[str, Any]) -> bool:
+    """
+    Read a clip's reference transcript aloud with a text-to-speech command.
+
+    Synthesized speech is far cleaner than a sermon recording, so it is a
+    smoke test of the matrix (and of Bible book names) rather than a
+    stand-in for real clips.
+    """
+    for name, command in TTS_COMMANDS:
+        if shutil.which(name):
+            break
+    else:
+        print(f"  no text-to-speech command found (install {' or '.join(name for name, _ in TTS_COMMANDS)})",
+              file=sys.stderr)
+        return False
+    Path(clip["audio_path"]).parent.mkdir(parents=True, exist_ok=True)
+    try:
+        subprocess.run(command(clip["reference_path"], clip["audio_path"]), check=True, capture_output=True)
+    except subprocess.CalledProcessError as e:
+        print(f"  failed: {e.stderr.decode(errors='replace').strip()}", file=sys.stderr)
+        return False
+    return True
+
+
+def fetch_clips(clips: List[Dict[str, Any]]):
+    """Download the source section (or synthesize the audio) of clips whose audio file is missing."""
+    from video_downloader import VideoDownloader
+
+    for clip in clips:
+        if not clip.get("audio_path") or os.path.exists(clip["audio_path"]):
+            continue
+        if clip.get("synthesize"):
+            print(f"Synthesizing {clip['id']} from its reference transcript", file=sys.stderr)
+            synthesize_clip(clip)
+            continue
+        if not clip.get("source"):
+            continue
+        print(f"Fetching {clip['id']} from {clip['source']}", file=sys.stderr)
+        with tempfile.TemporaryDirectory(prefix="bench_models_") as scratch:
+            result = VideoDownloader(output_dir=scratch).download_video(
+                clip["source"], start_time=clip.get("start"), end_time=clip.get("end"), extract_audio=True
+            )
+            if not result.success:
+                print(f"  failed: {result.error_message}", file=sys.stderr)
+                continue
+            Path(clip["audio_path"]).parent.mkdir(parents=True, exist_ok=True)
+            shutil.move(result.output_path, clip["audio_path"])
+
+
+def audio_duration(path: str) -> Optional[float]:
+    if path.endswith(".wav"):
+        try:
+            with wave.open(path, "rb") as audio:
+                return audio.getnframes() / audio.getframerate()
+        except (OSError, wave.Error):
+            pass
+    try:
+        output = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", path],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        return float(output.strip())
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return None
+
+
+def available_configs(models: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Backend/model/precision combinations that can run on this host."""
+    backends = []
+    if platform.system() == "Darwin" and platform.machine() == "arm64" and importlib.util.find_spec("mlx_whisper"):
+        backends.append(("mlx", ["fp16", "fp32"]))
+    if importlib.util.find_spec("whisper"):
+        probe = subprocess.run([sys.executable, "-c", "import torch; print(torch.cuda.is_available())"],
+                               capture_output=True, text=True)
+        # openai-whisper silently falls back to fp32 on CPU, so only try fp16 on CUDA
+        backends.append(("openai", ["fp16", "fp32"] if probe.stdout.strip() == "True" else ["fp32"]))
+
+    configs = []
+    for backend, precisions in backends:
+        for model in CANDIDATE_MODELS[backend]:
+            short_name = model.split("/")[-1].replace("whisper-", "")
+            if models and model not in models and short_name not in models:
+                continue
+            for precision in precisions:
+                configs.append({"backend": backend, "model": model, "model_size": model_key(backend, model),
+                                "compute_type": precision})
+    return configs
+
+
+def run_config(config: Dict[str, Any], clips: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Transcribe every clip with one configuration (runs inside the per-config subprocess)."""
+    from transcriber import Transcriber
+
+    with tempfile.TemporaryDirectory(prefix="bench_models_") as scratch:
+        transcriber = Transcriber(
+            model_size=config["model_size"],
+            output_dir=scratch,
+            backend=config["backend"],
+            fp16=config["compute_type"] == "fp16",
+            search_index=False,
+        )
+        load_started = time.perf_counter()
+        transcriber.warm_up()
+        load_seconds = time.perf_counter() - load_started
+
+        results = []
+        for clip in clips:
+            started = time.perf_counter()
+            result = transcriber.transcribe_audio(clip["audio_path"], save_to_file=False)
+            elapsed = time.perf_counter() - started
+            if not result.success:
+                raise RuntimeError(f"{clip['id']}: {result.error_message}")
+            results.append({"id": clip["id"], "hypothesis": result.transcript, "seconds": elapsed})
+    return {"load_seconds": load_seconds, "clips": results, "peak_rss_bytes": peak_rss_bytes()}
+
+
+def score(config: Dict[str, Any], run: Dict[str, Any], clips: List[Dict[str, Any]],
+          books: List[str], glossary_rules) -> Dict[str, Any]:
+    errors = words = expected = found = 0
+    audio_seconds = transcribe_seconds = 0.0
+    for clip, clip_run in zip(clips, run["clips"]):
+        with open(clip["reference_path"], "r", encoding="utf-8") as f:
+            reference = f.read()
+        hypothesis = clip_run["hypothesis"]
+        if glossary_rules:
+            hypothesis, _ = apply_glossary(hypothesis, glossary_rules)
+        reference_words = normalise_words(reference)
+        errors += word_errors(reference_words, normalise_words(hypothesis))
+        words += len(reference_words)
+        hits = term_hits(reference, hypothesis, books)
+        expected += hits["expected"]
+        found += hits["found"]
+        audio_seconds += clip["duration"]
+        transcribe_seconds += clip_run["seconds"]
+    return {
+        **config,
+        "wer": errors / words if words else None,
+        "term_accuracy": found / expected if expected else None,
+        "terms_expected": expected,
+        "rtf": transcribe_seconds / audio_seconds if audio_seconds else None,
+        "load_seconds": run["load_seconds"],
+        "peak_rss_bytes": run["peak_rss_bytes"],
+    }
+
+
+def recommend(rows: List[Dict[str, Any]], max_wer: float, min_term_accuracy: float) -> Optional[Dict[str, Any]]:
+    """Fastest configuration within the accuracy thresholds."""
+    eligible = [
+        row for row in rows
+        if row.get("error") is None
+        and row["wer"] is not None and row["wer"] <= max_wer
+        and (row["term_accuracy"] is None or row["term_accuracy"] >= min_term_accuracy)
+    ]
+    return min(eligible, key=lambda row: row["rtf"]) if eligible else None
+
+
+def print_table(rows: List[Dict[str, Any]]):
+    print(f"{'backend':<8} {'model':<38} {'type':<5} {'WER':>6} {'books':>6} {'RTF':>6} {'load':>7} {'peak RAM':>9}")
+    for row in rows:
+        if row.get("error"):
+            print(f"{row['backend']:<8} {row['model']:<38} {row['compute_type']:<5} failed: {row['error']}")
+            continue
+        books = f"{row['term_accuracy']:.0%}" if row["term_accuracy"] is not None else "n/a"
+        ram = f"{row['peak_rss_bytes'] / 1e9:.2f} GB" if row["peak_rss_bytes"] else "n/a"
+        print(f"{row['backend']:<8} {row['model']:<38} {row['compute_type']:<5} {row['wer']:6.1%} {books:>6} "
+              f"{row['rtf']:6.3f} {row['load_seconds']:6.1f}s {ram:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Whisper backends/models on the reference sermon corpus")
+    parser.add_argument('--corpus', default=str(DEFAULT_CORPUS), help='Corpus manifest.json')
+    parser.add_argument('--models', help='Comma-separated models to try (e.g. tiny,base,large-v3-turbo); default all')
+    parser.add_argument('--max-wer', type=float, default=0.15, help='Highest acceptable word error rate')
+    parser.add_argument('--min-term-accuracy', type=float, default=0.9, help='Lowest acceptable Bible book name accuracy')
+    parser.add_argument('--no-glossary', action='store_true', help='Score raw model output instead of glossary-corrected output')
+    parser.add_argument('--fetch', action='store_true', help='Download missing clip audio from its source URL (or synthesize it) first')
+    parser.add_argument('--output', help='Also write the JSON report to this file')
+    parser.add_argument('--json', action='store_true', dest='output_json', help='Print the report as JSON')
+    parser.add_argument('--run-config', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    clips = load_corpus(Path(args.corpus))
+
+    if args.run_config:
+        # Child process: run one configuration and report raw results on stdout
+        print(json.dumps(run_config(json.loads(args.run_config), clips)))
+        return
+
+    if args.fetch:
+        fetch_clips(clips)
+    missing = [clip["id"] for clip in clips if not clip.get("audio_path") or not os.path.exists(clip["audio_path"])]
+    if missing:
+        sys.exit(f"Missing audio for clips: {', '.join(missing)} (use --fetch)")
+    if not clips:
+        sys.exit(f"No clips in {args.corpus}; see {Path(args.corpus).parent / 'README.md'} to add reference clips")
+    for clip in clips:
+        clip["duration"] = clip.get("duration") or audio_duration(clip["audio_path"])
+        if not clip["duration"]:
+            sys.exit(f"Could not determine the duration of {clip['audio_path']} (install ffprobe or set duration)")
+
+    configs = available_configs(args.models.split(",") if args.models else None)
+    if not configs:
+        sys.exit("No Whisper backend is installed (need openai-whisper or mlx-whisper)")
+
+    books = bible_books()
+    rules = None if args.no_glossary else compile_glossary(load_glossary())
+    rows = []
+    for config in configs:
+        print(f"Running {config['backend']} {config['model']} ({config['compute_type']})...", file=sys.stderr)
+        child = subprocess.run(
+            [sys.executable, __file__, "--corpus", args.corpus, "--run-config", json.dumps(config)],
+            capture_output=True, text=True,
+        )
+        if child.returncode != 0:
+            error = (child.stderr.strip().splitlines() or ["unknown error"])[-1]
+            rows.append({**config, "error": error})
+            continue
+        rows.append(score(config, json.loads(child.stdout.strip().splitlines()[-1]), clips, books, rules))
+
+    best = recommend(rows, args.max_wer, args.min_term_accuracy)
+    report = {
+        "host": {"platform": platform.platform(), "machine": platform.machine(), "python": platform.python_version()},
+        "corpus": {"clips": len(clips), "audio_seconds": sum(clip["duration"] for clip in clips)},
+        "thresholds": {"max_wer": args.max_wer, "min_term_accuracy": args.min_term_accuracy},
+        "glossary_applied": rules is not None,
+        "results": rows,
+        "recommendation": best,
+    }
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    if args.output_json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print_table(rows)
+    if best:
+        print(f"\nRecommended: {best['backend']} {best['model']} ({best['compute_type']}) - "
+              f"WER {best['wer']:.1%}, RTF {best['rtf']:.3f}")
+        print(f"  Transcriber(model_size={best['model_size']!r}, backend={best['backend']!r}, "
+              f"fp16={best['compute_type'] == 'fp16'})")
+    else:
+        print(f"\nNo configuration meets WER <= {args.max_wer:.0%} and book accuracy >= {args.min_term_accuracy:.0%}")
+
+
+if __name__ == "__main__":
+    main()
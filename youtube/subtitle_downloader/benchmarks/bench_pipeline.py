@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of the download -> extract -> transcribe -> write pipeline.
+
+Generates synthetic speech-plus-music audio, serves it from a local HTTP
+file server so yt-dlp's generic extractor downloads it like a real video
+(no network or YouTube access needed), then runs the same VideoDownloader and
+Transcriber code as `cli.py workflow`. Reports audio-seconds processed per
+wall-second, peak memory and per-stage times as JSON so runs can be compared
+across commits.
+
+--memory-check runs the benchmark in fresh processes at --seconds and at
+--memory-scale times that, and fails if peak RSS grows by more than
+--max-rss-growth. With --window-seconds (Transcriber's windowed mode) peak
+memory should not depend on the recording's length.
+
+The synthetic "speech" is voiced syllables with formants and intonation, not
+words, so transcripts are meaningless; this measures throughput, not accuracy
+(see bench_models.py for that). Requires yt-dlp, ffmpeg and a Whisper backend.
+
+Usage:
+    python benchmarks/bench_pipeline.py --seconds 120 --fast
+    python benchmarks/bench_pipeline.py --seconds 600 --runs 3 --output results/$(git rev-parse --short HEAD).json
+    python benchmarks/bench_pipeline.py --compare results/baseline.json
+    python benchmarks/bench_pipeline.py --seconds 600 --window-seconds 120 --memory-check
+"""
+
+import argparse
+import functools
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import wave
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PACKAGE_DIR))
+
+from instrumentation import peak_rss_bytes  # noqa: E402
+
+
+SAMPLE_RATE = 16000
+
+# (F1, F2) formant frequencies of a few vowels, in Hz
+VOWEL_FORMANTS = [(730, 1090), (270, 2290), (530, 1840), (570, 840), (300, 870), (660, 1720)]
+
+# A I-V-vi-IV progression (root frequencies, Hz) for the music sections
+CHORD_ROOTS = [261.63, 392.00, 440.00, 349.23]
+
+STAGES = ("extract_info", "download", "post-process", "model_load", "decode", "inference", "file_write")
+
+
+def default_audio_dir() -> Path:
+    env_dir = os.environ.get("SUBTITLE_DOWNLOADER_CACHE_DIR")
+    base = Path(env_dir) if env_dir else Path.home() / ".cache" / "subtitle_downloader"
+    return base / "bench_audio"
+
+
+def _syllable(rng: random.Random, f0: float, seconds: float) -> List[float]:
+    """One voiced syllable: a harmonic series shaped by vowel formants, with a smooth envelope."""
+    f1, f2 = rng.choice(VOWEL_FORMANTS)
+    harmonics = []
+    for k in range(1, 12):
+        frequency = f0 * k
+        if frequency > SAMPLE_RATE / 2:
+            break
+        # Resonance peaks around the two formants
+        gain = 1.0 / (1.0 + ((frequency - f1) / 150) ** 2) + 0.6 / (1.0 + ((frequency - f2) / 200) ** 2)
+        harmonics.append((2 * math.pi * frequency / SAMPLE_RATE, gain))
+    count = int(seconds * SAMPLE_RATE)
+    samples = []
+    for n in range(count):
+        envelope = math.sin(math.pi * n / count) ** 2
+        samples.append(envelope * sum(gain * math.sin(step * n) for step, gain in harmonics))
+    return samples
+
+
+def _speech(rng: random.Random, seconds: float) -> List[float]:
+    """Phrases of syllables with falling intonation, separated by short pauses."""
+    samples: List[float] = []
+    target = int(seconds * SAMPLE_RATE)
+    base_pitch = rng.uniform(100, 180)
+    while len(samples) < target:
+        syllables = rng.randint(4, 14)
+        for index in range(syllables):
+            f0 = base_pitch * (1.15 - 0.3 * index / syllables) * rng.uniform(0.95, 1.05)
+            samples.extend(_syllable(rng, f0, rng.uniform(0.12, 0.3)))
+            samples.extend([0.0] * int(rng.uniform(0.02, 0.08) * SAMPLE_RATE))
+        samples.extend([0.0] * int(rng.uniform(0.25, 0.8) * SAMPLE_RATE))
+    return samples[:target]
+
+
+def _music(rng: random.Random, seconds: float) -> List[float]:
+    """Sustained triads with a bass note, changing chord every two seconds."""
+    samples: List[float] = []
+    count = int(seconds * SAMPLE_RATE)
+    chord_length = 2 * SAMPLE_RATE
+    offset = rng.randrange(len(CHORD_ROOTS))
+    for n in range(count):
+        root = CHORD_ROOTS[(offset + n // chord_length) % len(CHORD_ROOTS)]
+        position = n % chord_length
+        envelope = min(1.0, position / 800) * math.exp(-position / (1.5 * SAMPLE_RATE))
+        t = n / SAMPLE_RATE
+        value = (math.sin(2 * math.pi * root * t)
+                 + 0.7 * math.sin(2 * math.pi * root * 1.26 * t)
+                 + 0.6 * math.sin(2 * math.pi * root * 1.5 * t)
+                 + 0.8 * math.sin(2 * math.pi * root / 2 * t))
+        samples.append(0.35 * envelope * value)
+    return samples
+
+
+def synthetic_audio(path: Path, seconds: float, music_ratio: float = 0.25, seed: int = 0) -> Path:
+    """
+    Write a mono 16 kHz WAV of alternating speech-like and music sections.
+
+    Args:
+        seconds: Total length
+        music_ratio: Fraction of the audio that is music
+        seed: Random seed, so the same arguments always produce the same file
+    """
+    rng = random.Random(seed)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(path.name + ".part")
+    written = 0.0
+    with wave.open(str(partial), "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(SAMPLE_RATE)
+        while written < seconds:
+            speech_seconds = min(rng.uniform(20, 40), seconds - written)
+            sections = [_speech(rng, speech_seconds)]
+            written += speech_seconds
+            if music_ratio > 0 and written < seconds:
+                music_seconds = min(speech_seconds * music_ratio / (1 - music_ratio), seconds - written)
+                sections.append(_music(rng, music_seconds))
+                written += music_seconds
+            for section in sections:
+                peak = max((abs(value) for value in section), default=0) or 1.0
+                noise = [rng.gauss(0, 0.01) for _ in range(len(section))]
+                frames = struct.pack(
+                    f"<{len(section)}h",
+                    *(int(max(-1.0, min(1.0, 0.8 * value / peak + hiss)) * 32767)
+                      for value, hiss in zip(section, noise)),
+                )
+                out.writeframes(frames)
+    os.replace(partial, path)
+    return path
+
+
+class LocalFileServer:
+    """Serves a directory over HTTP on localhost, standing in for the video host."""
+
+    def __init__(self, directory: Path):
+        handler = functools.partial(_QuietHandler, directory=str(directory))
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    def url(self, filename: str) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/{filename}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def run_pipeline(url: str,
+                 work_dir: Path,
+                 model_size: str,
+                 fast: bool,
+                 window_seconds: Optional[float] = None) -> Dict[str, Any]:
+    """Download and transcribe one URL the way `cli.py workflow` does."""
+    from transcriber import Transcriber
+    from video_downloader import VideoDownloader
+
+    started = time.perf_counter()
+    transcriber = Transcriber(model_size=model_size, output_dir=str(work_dir), fast=fast, search_index=False,
+                              window_seconds=window_seconds)
+    warm_up = transcriber.start_warm_up()
+    download = VideoDownloader(output_dir=str(work_dir)).download_video(url, extract_audio=True)
+    audio_ready = time.perf_counter()
+    if not download.success:
+        raise RuntimeError(f"Download failed: {download.error_message}")
+    transcription = transcriber.transcribe_audio(download.output_path)
+    if not transcription.success:
+        raise RuntimeError(f"Transcription failed: {transcription.error_message}")
+    wall = time.perf_counter() - started
+
+    stage_seconds: Dict[str, float] = {}
+    for timing in download.metadata["timings"] + transcription.metadata["timings"]:
+        stage_seconds[timing["name"]] = stage_seconds.get(timing["name"], 0.0) + timing["wall_seconds"]
+    return {
+        "wall_seconds": wall,
+        "stage_seconds": stage_seconds,
+        "warm_up_saved_seconds": warm_up.seconds_saved(audio_ready),
+        "model": transcription.metadata.get("model"),
+        "backend": transcription.metadata.get("backend"),
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=PACKAGE_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def summarise(runs: List[Dict[str, Any]], audio_seconds: float) -> Dict[str, Any]:
+    walls = [run["wall_seconds"] for run in runs]
+    stages = {
+        stage: statistics.median(run["stage_seconds"].get(stage, 0.0) for run in runs)
+        for stage in STAGES
+        if any(stage in run["stage_seconds"] for run in runs)
+    }
+    median_wall = statistics.median(walls)
+    return {
+        "median_wall_seconds": median_wall,
+        "min_wall_seconds": min(walls),
+        "audio_seconds_per_wall_second": audio_seconds / median_wall,
+        "median_stage_seconds": stages,
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    summary = report["summary"]
+    print(f"Commit:            {report['commit'] or 'unknown'}")
+    print(f"Audio:             {report['audio_seconds']:.0f}s ({report['config']['music_ratio']:.0%} music)")
+    print(f"Model:             {report['runs'][0]['backend']} {report['runs'][0]['model']}")
+    print(f"Runs:              {len(report['runs'])}")
+    print(f"Median wall time:  {summary['median_wall_seconds']:.2f}s")
+    print(f"Throughput:        {summary['audio_seconds_per_wall_second']:.1f} audio-seconds per wall-second")
+    if report["peak_rss_bytes"] is not None:
+        print(f"Peak RSS:          {report['peak_rss_bytes'] / 1e6:.0f} MB "
+              f"(largest child process {report['peak_child_rss_bytes'] / 1e6:.0f} MB)")
+    print("Median stage times:")
+    for stage, seconds in summary["median_stage_seconds"].items():
+        print(f"  {stage:<14} {seconds:8.2f}s")
+
+
+def memory_check(args, audio_dir: Path) -> bool:
+    """
+    Run the benchmark in a fresh process for a short and a long recording and
+    compare their peak RSS (a process's high-water mark can't be reset, so each
+    length needs its own process).
+
+    Returns:
+        True if the long run's peak RSS is within --max-rss-growth of the short run's
+    """
+    lengths = [args.seconds, args.seconds * args.memory_scale]
+    peaks = []
+    for seconds in lengths:
+        # Generate here, so the audio synthesis doesn't count towards the child's memory
+        source = audio_dir / f"sermon_{seconds:g}s_music{args.music_ratio:g}_seed{args.seed}.wav"
+        if not source.exists():
+            print(f"Generating {seconds:g}s of synthetic audio: {source}", file=sys.stderr)
+            synthetic_audio(source, seconds, music_ratio=args.music_ratio, seed=args.seed)
+        with tempfile.TemporaryDirectory(prefix="bench_memory_") as report_dir:
+            # The report goes to a file: the child's stdout also carries Transcriber's progress messages
+            report_path = Path(report_dir) / "report.json"
+            cmd = [sys.executable, str(Path(__file__).resolve()), "--seconds", f"{seconds:g}",
+                   "--music-ratio", f"{args.music_ratio:g}", "--seed", str(args.seed),
+                   "--model-size", args.model_size, "--audio-dir", str(audio_dir), "--output", str(report_path)]
+            if args.fast:
+                cmd.append("--fast")
+            if args.window_seconds:
+                cmd += ["--window-seconds", f"{args.window_seconds:g}"]
+            print(f"Measuring {seconds:g}s...", file=sys.stderr)
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            if result.returncode != 0 or not report_path.exists():
+                print(f"Benchmark run for {seconds:g}s failed:\n{result.stderr or result.stdout}")
+                return False
+            peaks.append(json.loads(report_path.read_text(encoding="utf-8"))["peak_rss_bytes"])
+
+    if None in peaks:
+        print("Peak RSS is not available on this platform")
+        return False
+    growth = peaks[1] / peaks[0]
+    mode = f"windowed ({args.window_seconds:g}s windows)" if args.window_seconds else "whole-file decoding"
+    print(f"Peak RSS, {mode}:")
+    for seconds, peak in zip(lengths, peaks):
+        print(f"  {seconds:8.0f}s audio  {peak / 1e6:8.0f} MB")
+    passed = growth <= args.max_rss_growth
+    print(f"{'OK' if passed else 'FAIL'}: {args.memory_scale:g}x the audio used {growth:.2f}x the memory "
+          f"(limit {args.max_rss_growth:g}x)")
+    return passed
+
+
+def print_comparison(report: Dict[str, Any], baseline: Dict[str, Any]):
+    """Show how this run differs from a saved baseline report."""
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'}:")
+    rows = [("wall", baseline["summary"]["median_wall_seconds"], report["summary"]["median_wall_seconds"])]
+    for stage, seconds in report["summary"]["median_stage_seconds"].items():
+        if stage in baseline["summary"]["median_stage_seconds"]:
+            rows.append((stage, baseline["summary"]["median_stage_seconds"][stage], seconds))
+    for name, before, after in rows:
+        change = f"{(after - before) / before:+7.1%}" if before else "    n/a"
+        print(f"  {name:<14} {before:8.2f}s -> {after:8.2f}s  {change}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark download -> transcribe on synthetic audio served locally")
+    parser.add_argument('--seconds', type=float, default=120.0, help='Length of the synthetic audio')
+    parser.add_argument('--music-ratio', type=float, default=0.25, help='Fraction of the audio that is music')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the synthetic audio')
+    parser.add_argument('--runs', type=int, default=1, help='Pipeline runs; each loads the model in the background, as cli.py workflow does')
+    parser.add_argument('--model-size', default='default', help='Whisper model size')
+    parser.add_argument('--fast', action='store_true', help='Use the smaller/faster model')
+    parser.add_argument('--window-seconds', type=float, help="Use Transcriber's windowed mode with windows of this many seconds")
+    parser.add_argument('--memory-check', action='store_true', help='Check that peak RSS stays flat as the audio gets longer (exits 1 if not)')
+    parser.add_argument('--memory-scale', type=float, default=4.0, help='Length of the long --memory-check run, as a multiple of --seconds')
+    parser.add_argument('--max-rss-growth', type=float, default=1.25, help='Largest peak RSS ratio, long run to short run, that --memory-check accepts')
+    parser.add_argument('--audio-dir', help='Where generated audio is cached (default: ~/.cache/subtitle_downloader/bench_audio)')
+    parser.add_argument('--output', help='Also write the JSON report to this file')
+    parser.add_argument('--compare', metavar='BASELINE', help='Compare against a previously written JSON report')
+    parser.add_argument('--json', action='store_true', dest='output_json', help='Print the report as JSON')
+    args = parser.parse_args()
+
+    audio_dir = Path(args.audio_dir) if args.audio_dir else default_audio_dir()
+    if args.memory_check:
+        sys.exit(0 if memory_check(args, audio_dir) else 1)
+
+    source = audio_dir / f"sermon_{args.seconds:g}s_music{args.music_ratio:g}_seed{args.seed}.wav"
+    if not source.exists():
+        print(f"Generating {args.seconds:g}s of synthetic audio: {source}", file=sys.stderr)
+        synthetic_audio(source, args.seconds, music_ratio=args.music_ratio, seed=args.seed)
+
+    runs = []
+    with LocalFileServer(source.parent) as server:
+        for index in range(args.runs):
+            with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as work_dir:
+                print(f"Run {index + 1}/{args.runs}...", file=sys.stderr)
+                runs.append(run_pipeline(server.url(source.name), Path(work_dir), args.model_size, args.fast,
+                                         args.window_seconds))
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "seconds": args.seconds,
+            "music_ratio": args.music_ratio,
+            "seed": args.seed,
+            "model_size": args.model_size,
+            "fast": args.fast,
+            "window_seconds": args.window_seconds,
+        },
+        "audio_seconds": args.seconds,
+        "peak_rss_bytes": peak_rss_bytes(),
+        "peak_child_rss_bytes": peak_rss_bytes(children=True),
+        "runs": runs,
+        "summary": summarise(runs, args.seconds),
+    }
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    if args.output_json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    if args.compare and not args.output_json:
+        print_comparison(report, json.loads(Path(args.compare).read_text(encoding="utf-8")))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark and import budget check for cli.py.
+
+Runs lightweight cli.py invocations under `python -X importtime`, reports
+wall time and the slowest top-level imports, and fails (exit status 1) if a
+command exceeds the time budget or imports a heavy module it should not need.
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --budget-ms 200 --runs 7 --json
+"""
+
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List, Dict, Any
+
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent
+
+# Commands that must start without pulling in download or ML dependencies
+LIGHT_COMMANDS = [
+    ["--help"],
+    ["download", "--help"],
+    ["transcribe", "--help"],
+    ["workflow", "--help"],
+    ["search", "--help"],
+    ["render", "--help"],
+    ["glossary-apply", "--help"],
+    ["index-transcripts", "--help"],
+    ["queue-status", "--help"],
+    ["enqueue", "--help"],
+    ["run", "--help"],
+]
+
+HEAVY_MODULES = ("yt_dlp", "whisper", "mlx_whisper", "torch", "numpy", "streamlit")
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Parse -X importtime output into (module, self_us, cumulative_us, depth) records."""
+    records = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            records.append({
+                "module": module,
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+                "depth": (len(indent) - 1) // 2,
+            })
+    return records
+
+
+def measure(command: List[str], runs: int) -> Dict[str, Any]:
+    """Time a cli.py invocation and collect its import profile."""
+    argv = [sys.executable, "cli.py", *command]
+    wall_times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(argv, cwd=PACKAGE_DIR, capture_output=True)
+        wall_times.append((time.perf_counter() - started) * 1000)
+
+    profiled = subprocess.run(
+        [sys.executable, "-X", "importtime", "cli.py", *command],
+        cwd=PACKAGE_DIR, capture_output=True, text=True,
+    )
+    records = parse_importtime(profiled.stderr)
+    imported = {record["module"].split(".")[0] for record in records}
+    top_level = sorted(
+        (record for record in records if record["depth"] == 0),
+        key=lambda record: record["cumulative_us"],
+        reverse=True,
+    )
+    return {
+        "command": " ".join(command),
+        "median_ms": statistics.median(wall_times),
+        "min_ms": min(wall_times),
+        "import_ms": sum(record["cumulative_us"] for record in records if record["depth"] == 0) / 1000,
+        "heavy_imports": sorted(imported.intersection(HEAVY_MODULES)),
+        "slowest_imports": [
+            {"module": record["module"], "ms": record["cumulative_us"] / 1000}
+            for record in top_level[:5]
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check cli.py startup time against a budget")
+    parser.add_argument('--budget-ms', type=float, default=200.0, help='Maximum median wall time per command')
+    parser.add_argument('--runs', type=int, default=5, help='Timed runs per command')
+    parser.add_argument('--json', action='store_true', dest='output_json', help='Output results as JSON')
+    args = parser.parse_args()
+
+    results = [measure(command, args.runs) for command in LIGHT_COMMANDS]
+    failures = []
+    for result in results:
+        if result["median_ms"] > args.budget_ms:
+            failures.append(f"{result['command']}: {result['median_ms']:.0f} ms exceeds {args.budget_ms:.0f} ms budget")
+        if result["heavy_imports"]:
+            failures.append(f"{result['command']}: imports {', '.join(result['heavy_imports'])}")
+
+    if args.output_json:
+        print(json.dumps({"budget_ms": args.budget_ms, "results": results, "failures": failures}, indent=2))
+    else:
+        for result in results:
+            slowest = ", ".join(f"{item['module']} {item['ms']:.1f}ms" for item in result["slowest_imports"][:3])
+            print(f"{result['command']:<24} median {result['median_ms']:6.1f} ms  "
+                  f"imports {result['import_ms']:6.1f} ms  slowest: {slowest}")
+        for failure in failures:
+            print(f"FAIL {failure}")
+        if not failures:
+            print(f"OK: all commands within {args.budget_ms:.0f} ms and free of heavy imports")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for an OpenAI-compatible chat completions endpoint.
+
+Serves canned completions with configurable latency, token rate, streaming,
+error injection and response shape, so the blog generation path can be
+benchmarked and exercised without calling a paid API.
+
+Usage:
+    python benchmarks/fake_llm_server.py --port 8088 --latency 0.5 --tokens-per-second 50
+    # then point the blog post tab at http://127.0.0.1:8088/v1/chat/completions
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Optional, List
+
+
+RESPONSE_SHAPES = ("message", "text", "output_text")
+
+LOREM = (
+    "Grace meets us where we are and does not leave us there . "
+    "The sermon walked through the passage verse by verse and asked what it means "
+    "to live it out on an ordinary Monday . "
+).split()
+
+
+@dataclass
+class FakeLLMConfig:
+    """Behaviour of the fake endpoint"""
+    latency: float = 0.2
+    tokens_per_second: float = 200.0
+    response_tokens: int = 300
+    shape: str = "message"
+    allow_stream: bool = True
+    error_rate: float = 0.0
+    error_status: int = 503
+    seed: Optional[int] = None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def config(self) -> FakeLLMConfig:
+        return self.server.config
+
+    def _send_json(self, status: int, payload, extra_headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (extra_headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(b"%x\r\n" % len(data) + data + b"\r\n")
+        self.wfile.flush()
+
+    def _tokens(self) -> List[str]:
+        rng = self.server.rng
+        with self.server.lock:
+            start = rng.randrange(len(LOREM))
+        count = self.config.response_tokens
+        return [LOREM[(start + i) % len(LOREM)] + " " for i in range(count)]
+
+    def _usage(self, prompt_chars: int, completion_tokens: int):
+        prompt_tokens = max(1, prompt_chars // 4)
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    def _full_payload(self, text: str, usage):
+        shape = self.config.shape
+        if shape == "text":
+            return {"choices": [{"text": text}], "usage": usage}
+        if shape == "output_text":
+            return {"output_text": text, "usage": usage}
+        return {"choices": [{"message": {"role": "assistant", "content": text}}], "usage": usage}
+
+    def _delta_event(self, token: str):
+        shape = self.config.shape
+        if shape == "text":
+            return {"choices": [{"text": token}]}
+        if shape == "output_text":
+            return {"type": "response.output_text.delta", "delta": token}
+        return {"choices": [{"delta": {"content": token}}]}
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length)
+        try:
+            request = json.loads(raw or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"message": "invalid JSON"}})
+            return
+
+        with self.server.lock:
+            self.server.requests += 1
+            fail = self.server.rng.random() < self.config.error_rate
+
+        time.sleep(self.config.latency)
+        if fail:
+            self._send_json(
+                self.config.error_status,
+                {"error": {"message": "injected failure"}},
+                {"Retry-After": "0"} if self.config.error_status == 429 else None,
+            )
+            return
+
+        prompt_chars = sum(len(m.get("content", "")) for m in request.get("messages", []))
+        tokens = self._tokens()
+        usage = self._usage(prompt_chars, len(tokens))
+        delay = 1.0 / self.config.tokens_per_second if self.config.tokens_per_second > 0 else 0.0
+
+        if not (request.get("stream") and self.config.allow_stream):
+            time.sleep(delay * len(tokens))
+            self._send_json(200, self._full_payload("".join(tokens).strip(), usage))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for token in tokens:
+            time.sleep(delay)
+            self._write_chunk(f"data: {json.dumps(self._delta_event(token))}\n\n".encode("utf-8"))
+        if self.config.shape == "output_text":
+            final = {"type": "response.completed", "response": {"usage": usage}}
+        else:
+            final = {"choices": [], "usage": usage}
+        self._write_chunk(f"data: {json.dumps(final)}\n\n".encode("utf-8"))
+        self._write_chunk(b"data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+class FakeLLMServer:
+    """Fake chat completions server running on a background thread"""
+
+    def __init__(self, config: Optional[FakeLLMConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or FakeLLMConfig()
+        if self.config.shape not in RESPONSE_SHAPES:
+            raise ValueError(f"Unknown response shape: {self.config.shape}")
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.config = self.config
+        self._httpd.rng = random.Random(self.config.seed)
+        self._httpd.lock = threading.Lock()
+        self._httpd.requests = 0
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1/chat/completions"
+
+    @property
+    def request_count(self) -> int:
+        return self._httpd.requests
+
+    def start(self) -> "FakeLLMServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def add_config_arguments(parser: argparse.ArgumentParser):
+    """Add the fake endpoint's behaviour flags to a parser."""
+    parser.add_argument('--latency', type=float, default=0.2, help='Seconds before the first byte of each response')
+    parser.add_argument('--tokens-per-second', type=float, default=200.0, help='Token generation rate (0 = instant)')
+    parser.add_argument('--response-tokens', type=int, default=300, help='Tokens per completion')
+    parser.add_argument('--shape', choices=RESPONSE_SHAPES, default='message',
+                        help='Response shape: choices[].message.content, choices[].text or output_text')
+    parser.add_argument('--no-stream', action='store_true', help='Ignore "stream": true and always return one JSON body')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests that fail')
+    parser.add_argument('--error-status', type=int, default=503, help='HTTP status used for injected failures')
+    parser.add_argument('--seed', type=int, help='Random seed for reproducible runs')
+
+
+def config_from_args(args) -> FakeLLMConfig:
+    return FakeLLMConfig(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        response_tokens=args.response_tokens,
+        shape=args.shape,
+        allow_stream=not args.no_stream,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible chat completions server")
+    parser.add_argument('--host', default='127.0.0.1', help='Address to bind')
+    parser.add_argument('--port', type=int, default=8088, help='Port to bind')
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    server = FakeLLMServer(config_from_args(args), host=args.host, port=args.port)
+    print(f"Fake LLM endpoint listening on {server.url}")
+    print("Press Ctrl+C to stop")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\nServed {server.request_count} requests")
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
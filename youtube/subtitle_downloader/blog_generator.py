@@ -0,0 +1,328 @@
+import asyncio
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional
+
+from llm_cache import ResponseCache
+from llm_client import LLMClient, LLMCompletion, LLMStream
+
+
+TIMESTAMP_LINE = re.compile(r"^\[(\d{2}):(\d{2}):(\d{2})\]\s*")
+
+MAP_PROMPT = (
+    "Below is one section of a longer sermon transcript{span}. "
+    "Write concise notes on it: the main points, any Bible passages referenced, "
+    "illustrations or stories used, and memorable quotes in the speaker's own words. "
+    "Do not write a blog post yet."
+)
+
+REDUCE_PREAMBLE = (
+    "The transcript was too long to send in one piece, so it has been summarised "
+    "section by section. Use these section notes, in order, as the transcript."
+)
+
+
+@dataclass
+class TranscriptSection:
+    """A contiguous slice of a transcript, with its time span when known"""
+    index: int
+    text: str
+    start: Optional[str] = None
+    end: Optional[str] = None
+
+
+@dataclass
+class LLMCallStats:
+    """Timing and token usage for one LLM call"""
+    name: str
+    elapsed: float
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    cached: bool = False
+
+    @classmethod
+    def from_completion(cls, name: str, completion: LLMCompletion, cached: bool = False) -> "LLMCallStats":
+        usage = completion.usage or {}
+        return cls(
+            name=name,
+            elapsed=completion.elapsed,
+            prompt_tokens=usage.get("prompt_tokens", usage.get("input_tokens")),
+            completion_tokens=usage.get("completion_tokens", usage.get("output_tokens")),
+            cached=cached,
+        )
+
+
+@dataclass
+class BlogPostResult:
+    """Result object for a (possibly multi-call) blog post generation"""
+    text: str
+    calls: List[LLMCallStats] = field(default_factory=list)
+
+
+def build_messages(system_prompt: str, user_prompt: str, transcript: str) -> List[Dict[str, str]]:
+    """Build the chat messages for a blog post request."""
+    messages = []
+    if system_prompt.strip():
+        messages.append({"role": "system", "content": system_prompt.strip()})
+
+    prompt_payload = user_prompt.strip()
+    if prompt_payload:
+        prompt_payload += "\n\n"
+    prompt_payload += f"Transcript:\n{transcript.strip()}"
+    messages.append({"role": "user", "content": prompt_payload})
+    return messages
+
+
+def build_payload(model: str, messages: List[Dict[str, str]], temperature: float) -> Dict[str, Any]:
+    """Build the chat completions request body."""
+    return {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+    }
+
+
+class CachedStream:
+    """
+    Stream-compatible wrapper around the response cache.
+
+    On a hit the cached completion is yielded in one piece; on a miss the
+    wrapped LLMStream is passed through and stored once it finishes.
+    """
+
+    def __init__(self,
+                 cache: ResponseCache,
+                 key: str,
+                 model: str,
+                 cached: Optional[Dict[str, Any]] = None,
+                 stream: Optional[LLMStream] = None):
+        self._cache = cache
+        self._key = key
+        self._model = model
+        self._cached = cached
+        self._stream = stream
+        self.from_cache = cached is not None
+        self.completion: Optional[LLMCompletion] = None
+
+    def __iter__(self):
+        if self._cached is not None:
+            self.completion = LLMCompletion(
+                text=self._cached["text"],
+                usage=self._cached.get("usage"),
+                elapsed=0.0,
+                time_to_first_token=0.0,
+            )
+            yield self.completion.text
+            return
+
+        for delta in self._stream:
+            yield delta
+        self.completion = self._stream.completion
+        self._cache.put(self._key, self.completion.text, self.completion.usage, model=self._model)
+
+
+def _complete(client: LLMClient,
+              model: str,
+              system_prompt: str,
+              user_prompt: str,
+              transcript: str,
+              temperature: float,
+              cache: Optional[ResponseCache] = None,
+              refresh: bool = False):
+    """Run one completion through the cache; return (completion, served_from_cache)."""
+    key = None
+    if cache is not None:
+        key = cache.make_key(client.api_url, model, system_prompt, user_prompt, transcript, temperature)
+        cached = None if refresh else cache.get(key)
+        if cached is not None:
+            return LLMCompletion(text=cached["text"], usage=cached.get("usage")), True
+
+    payload = build_payload(model, build_messages(system_prompt, user_prompt, transcript), temperature)
+    completion = client.complete(payload)
+    if cache is not None:
+        cache.put(key, completion.text, completion.usage, model=model)
+    return completion, False
+
+
+def generate_blog_post(
+    api_url,
+    api_key,
+    model,
+    system_prompt,
+    user_prompt,
+    transcript,
+    temperature,
+    cache: Optional[ResponseCache] = None,
+    refresh: bool = False,
+):
+    """
+    Generate a blog post from a transcript and return its text.
+
+    Args:
+        cache: Optional ResponseCache to serve repeated requests from
+        refresh: Skip the cache lookup (the fresh result is still stored)
+    """
+    client = LLMClient(api_url, api_key)
+    completion, _ = _complete(client, model, system_prompt, user_prompt, transcript, temperature, cache, refresh)
+    return completion.text
+
+
+def stream_blog_post(
+    api_url,
+    api_key,
+    model,
+    system_prompt,
+    user_prompt,
+    transcript,
+    temperature,
+    cache: Optional[ResponseCache] = None,
+    refresh: bool = False,
+):
+    """
+    Generate a blog post from a transcript, streaming text as it is produced.
+
+    Args:
+        cache: Optional ResponseCache to serve repeated requests from
+        refresh: Skip the cache lookup (the fresh result is still stored)
+
+    Returns:
+        LLMStream (or CachedStream when a cache is given) yielding text deltas;
+        its ``completion`` is set once exhausted
+    """
+    client = LLMClient(api_url, api_key)
+    payload = build_payload(model, build_messages(system_prompt, user_prompt, transcript), temperature)
+    if cache is None:
+        return client.stream(payload)
+
+    key = cache.make_key(api_url, model, system_prompt, user_prompt, transcript, temperature)
+    cached = None if refresh else cache.get(key)
+    if cached is not None:
+        return CachedStream(cache, key, model, cached=cached)
+    return CachedStream(cache, key, model, stream=client.stream(payload))
+
+
+def split_transcript_sections(transcript: str, max_chars: int = 12000) -> List[TranscriptSection]:
+    """
+    Split a transcript into sections of at most ~max_chars characters.
+
+    Timestamped transcripts (lines starting with [HH:MM:SS]) are split on line
+    boundaries and each section records the timestamps it spans. Plain
+    transcripts are split on paragraph, then sentence boundaries.
+
+    Args:
+        transcript: Transcript text
+        max_chars: Target maximum section size in characters
+
+    Returns:
+        List of TranscriptSection objects
+    """
+    lines = [line for line in transcript.strip().splitlines() if line.strip()]
+    timestamped = bool(lines) and all(TIMESTAMP_LINE.match(line) for line in lines)
+
+    if timestamped:
+        units = lines
+    else:
+        units = []
+        for paragraph in re.split(r"\n\s*\n", transcript.strip()):
+            if len(paragraph) <= max_chars:
+                units.append(paragraph)
+            else:
+                units.extend(re.split(r"(?<=[.!?])\s+", paragraph))
+
+    sections: List[TranscriptSection] = []
+    current: List[str] = []
+    size = 0
+
+    def flush():
+        if not current:
+            return
+        section = TranscriptSection(index=len(sections), text="\n".join(current))
+        if timestamped:
+            section.start = TIMESTAMP_LINE.match(current[0]).group(0).strip()
+            section.end = TIMESTAMP_LINE.match(current[-1]).group(0).strip()
+        sections.append(section)
+
+    for unit in units:
+        if current and size + len(unit) > max_chars:
+            flush()
+            current, size = [], 0
+        current.append(unit)
+        size += len(unit) + 1
+    flush()
+    return sections
+
+
+async def _summarise_sections(client: LLMClient,
+                              sections: List[TranscriptSection],
+                              model: str,
+                              temperature: float,
+                              concurrency: int,
+                              cache: Optional[ResponseCache] = None,
+                              refresh: bool = False):
+    """Run the map step: one completion per section, at most `concurrency` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def summarise(section: TranscriptSection):
+        span = f" ({section.start} to {section.end})" if section.start else ""
+        async with semaphore:
+            return await asyncio.to_thread(
+                _complete, client, model, MAP_PROMPT.format(span=span), "", section.text,
+                temperature, cache, refresh,
+            )
+
+    return await asyncio.gather(*(summarise(section) for section in sections))
+
+
+def generate_blog_post_map_reduce(
+    api_url,
+    api_key,
+    model,
+    system_prompt,
+    user_prompt,
+    transcript,
+    temperature,
+    max_section_chars: int = 12000,
+    concurrency: int = 4,
+    cache: Optional[ResponseCache] = None,
+    refresh: bool = False,
+) -> BlogPostResult:
+    """
+    Generate a blog post from a long transcript using map-reduce.
+
+    The transcript is split into sections which are summarised concurrently
+    (map), then a single call writes the post from the section notes (reduce).
+    Short transcripts that fit in one section skip the map step.
+
+    Args:
+        max_section_chars: Target maximum section size in characters
+        concurrency: Maximum number of map calls in flight at once
+        cache: Optional ResponseCache; map and reduce calls are cached individually
+        refresh: Skip cache lookups (fresh results are still stored)
+
+    Returns:
+        BlogPostResult with the post text and per-call stats
+    """
+    client = LLMClient(api_url, api_key)
+    sections = split_transcript_sections(transcript, max_chars=max_section_chars)
+    calls: List[LLMCallStats] = []
+
+    if len(sections) <= 1:
+        reduce_input = transcript
+    else:
+        summaries = asyncio.run(
+            _summarise_sections(client, sections, model, temperature, max(1, concurrency), cache, refresh)
+        )
+        notes = []
+        for section, (completion, cached) in zip(sections, summaries):
+            label = f"Section {section.index + 1}"
+            if section.start:
+                label += f" {section.start}-{section.end}"
+            calls.append(LLMCallStats.from_completion(f"map: {label}", completion, cached=cached))
+            notes.append(f"{label}:\n{completion.text}")
+        reduce_input = REDUCE_PREAMBLE + "\n\n" + "\n\n".join(notes)
+
+    completion, cached = _complete(
+        client, model, system_prompt, user_prompt, reduce_input, temperature, cache, refresh
+    )
+    calls.append(LLMCallStats.from_completion("reduce", completion, cached=cached))
+    return BlogPostResult(text=completion.text, calls=calls)
@@ -0,0 +1,372 @@
+import re
+import tempfile
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+
+from glossary import load_glossary, compile_glossary
+from instrumentation import Instrumentation, StageTiming, file_size
+from segment_store import SegmentStore, segments_path_for
+from transcriber import Transcriber, TranscriptionResult
+from transcript_search import TranscriptIndex, video_id_from
+
+
+# Captions are scored in windows of this many seconds
+WINDOW_SECONDS = 30.0
+# Windows scoring below this are re-transcribed with Whisper
+MIN_WINDOW_SCORE = 0.6
+# Preaching runs at about 2.5 words per second; captions well below that are missing words
+EXPECTED_WORDS_PER_SECOND = 1.5
+# Fraction of a window that should be covered by caption text
+EXPECTED_COVERAGE = 0.7
+
+# Cue markers for non-speech, e.g. [Music] or [Applause]; those stretches don't need Whisper
+_NON_SPEECH = re.compile(r"^\s*[\[(][^\])]*[\])]\s*$")
+_TAG = re.compile(r"<[^>]+>")
+
+
+@dataclass
+class CaptionTrack:
+    """A caption file fetched from YouTube"""
+    path: str
+    language: str
+    automatic: bool
+    title: Optional[str] = None
+    duration: Optional[float] = None
+
+
+@dataclass
+class WindowScore:
+    """Caption quality in one window of the video"""
+    start: float
+    end: float
+    coverage: float
+    words_per_second: float
+    glossary_mangles: int
+    non_speech: bool
+    score: float
+    reliable: bool
+
+
+def fetch_captions(video_url: str, output_dir: str, languages: Tuple[str, ...] = ("en",)) -> Optional[CaptionTrack]:
+    """
+    Fetch a video's captions as WebVTT via yt-dlp, without downloading any media.
+
+    Manual captions are preferred over YouTube's automatic ones.
+
+    Returns:
+        CaptionTrack, or None if the video has no captions in the given languages
+    """
+    import yt_dlp
+
+    with yt_dlp.YoutubeDL({'skip_download': True, 'quiet': True, 'no_warnings': True}) as ydl:
+        info = ydl.extract_info(video_url, download=False)
+        for automatic, tracks in ((False, info.get('subtitles') or {}), (True, info.get('automatic_captions') or {})):
+            for language in languages:
+                # "en", then YouTube's untranslated "en-orig", then regional variants such as "en-GB"
+                keys = [key for key in tracks if key == language] + \
+                       [key for key in tracks if key == f"{language}-orig"] + \
+                       [key for key in tracks if key.startswith(f"{language}-") and key[len(language) + 1:].isupper()]
+                for key in keys:
+                    vtt = next((entry for entry in tracks[key] if entry.get('ext') == 'vtt'), None)
+                    if vtt is None:
+                        continue
+                    data = ydl.urlopen(vtt['url']).read()
+                    output_dir = Path(output_dir)
+                    output_dir.mkdir(parents=True, exist_ok=True)
+                    video_id = info.get('id') or 'captions'
+                    path = output_dir / f"{video_id}.{key}{'.auto' if automatic else ''}.vtt"
+                    path.write_bytes(data)
+                    return CaptionTrack(path=str(path), language=key, automatic=automatic,
+                                        title=info.get('title'), duration=info.get('duration'))
+    return None
+
+
+def _cue_seconds(timestamp: str) -> float:
+    """Seconds for a WebVTT cue time ("HH:MM:SS.mmm" or "MM:SS.mmm"), keeping the milliseconds."""
+    seconds = 0.0
+    for part in timestamp.split(":"):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def parse_captions(vtt_path: str) -> List[Dict[str, Any]]:
+    """
+    Parse a WebVTT file into Whisper-style segments ({"start", "end", "text"}).
+
+    YouTube's automatic captions repeat the previous line in every cue so
+    they scroll; lines already shown are dropped, so each word appears once.
+    """
+    import webvtt
+
+    segments = []
+    previous_lines: List[str] = []
+    for caption in webvtt.read(vtt_path):
+        lines = [" ".join(_TAG.sub("", line).split()) for line in caption.text.splitlines()]
+        lines = [line for line in lines if line]
+        new_lines = [line for line in lines if line not in previous_lines]
+        previous_lines = lines
+        if not new_lines:
+            continue
+        segments.append({
+            "start": _cue_seconds(caption.start),
+            "end": _cue_seconds(caption.end),
+            "text": " " + " ".join(new_lines),
+        })
+    return segments
+
+
+def score_windows(segments: List[Dict[str, Any]],
+                  duration: float,
+                  terms: Dict[str, str],
+                  window_seconds: float = WINDOW_SECONDS,
+                  min_score: float = MIN_WINDOW_SCORE,
+                  start: float = 0.0) -> List[WindowScore]:
+    """
+    Score caption quality (0-1) in fixed windows tiled from start to duration.
+
+    A window scores well when captions cover most of it, at a plausible
+    speaking rate, with no known manglings from the glossary (entries such
+    as "core indians" -> "Corinthians" are exactly what speech recognition
+    gets wrong). Windows whose captions are only non-speech markers such as
+    [Music] count as reliable, since there is nothing to transcribe.
+    """
+    mangle_patterns = [pattern for pattern, _ in compile_glossary(
+        {source: target for source, target in terms.items() if source.lower() != target.lower()})]
+    windows = []
+    while start < duration:
+        end = min(start + window_seconds, duration)
+        covered = 0.0
+        words = 0
+        speech = []
+        markers = 0
+        for segment in segments:
+            overlap = min(end, segment["end"]) - max(start, segment["start"])
+            if overlap <= 0:
+                continue
+            if _NON_SPEECH.match(segment["text"]):
+                markers += 1
+                continue
+            length = max(segment["end"] - segment["start"], 1e-6)
+            covered += overlap
+            # Attribute a cue's words to the window in proportion to its overlap
+            words += len(segment["text"].split()) * min(1.0, overlap / length)
+            speech.append(segment["text"])
+        span = max(end - start, 1e-6)
+        coverage = min(1.0, covered / span)
+        words_per_second = words / span
+        text = " ".join(speech)
+        mangles = sum(len(pattern.findall(text)) for pattern in mangle_patterns)
+        score = min(1.0, coverage / EXPECTED_COVERAGE) * min(1.0, words_per_second / EXPECTED_WORDS_PER_SECOND) \
+            * 0.5 ** mangles
+        non_speech = markers > 0 and not speech
+        windows.append(WindowScore(start=start, end=end, coverage=coverage, words_per_second=words_per_second,
+                                   glossary_mangles=mangles, non_speech=non_speech, score=score,
+                                   reliable=non_speech or score >= min_score))
+        start = end
+    return windows
+
+
+def unreliable_ranges(windows: List[WindowScore]) -> List[Tuple[float, float]]:
+    """Merge adjacent unreliable windows into (start, end) ranges."""
+    ranges: List[Tuple[float, float]] = []
+    for window in windows:
+        if window.reliable:
+            continue
+        if ranges and abs(ranges[-1][1] - window.start) < 1e-6:
+            ranges[-1] = (ranges[-1][0], window.end)
+        else:
+            ranges.append((window.start, window.end))
+    return ranges
+
+
+class CaptionFastPath:
+    """
+    Build a transcript from YouTube's own captions, running Whisper only
+    where they look unreliable.
+
+    Captions are a few kilobytes and need no audio, so for most services the
+    transcript is ready in seconds. Each window is scored (coverage, speaking
+    rate, glossary manglings); audio is downloaded only if some window falls
+    below min_score, and only those stretches are transcribed with Whisper
+    and spliced in.
+    """
+
+    def __init__(self,
+                 output_dir: str = ".",
+                 transcriber: Optional[Transcriber] = None,
+                 window_seconds: float = WINDOW_SECONDS,
+                 min_score: float = MIN_WINDOW_SCORE,
+                 languages: Tuple[str, ...] = ("en",),
+                 glossary_path: Optional[str] = None):
+        """
+        Args:
+            output_dir: Directory for captions, audio and the transcript
+            transcriber: Transcriber for unreliable windows (created on demand if None)
+            window_seconds: Length of the windows captions are scored in
+            min_score: Windows scoring below this (0-1) are re-transcribed
+            languages: Caption languages to try, in order
+            glossary_path: Glossary used to spot manglings (defaults to youtube/glossary.json)
+        """
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.transcriber = transcriber
+        self.window_seconds = window_seconds
+        self.min_score = min_score
+        self.languages = languages
+        self.glossary_path = glossary_path
+
+    def _transcribe_ranges(self,
+                           video_url: str,
+                           ranges: List[Tuple[float, float]],
+                           instrumentation: Instrumentation) -> List[Dict[str, Any]]:
+        """
+        Download the audio once and transcribe each range, with segment times in video time.
+
+        The audio, the trimmed ranges and their transcripts are scratch files
+        in a temporary directory; only the segments are returned.
+        """
+        from audio_extractor import AudioExtractor
+        from video_downloader import VideoDownloader
+
+        if self.transcriber is None:
+            self.transcriber = Transcriber(output_dir=str(self.output_dir), search_index=False)
+        segments = []
+        with tempfile.TemporaryDirectory(prefix="captions_") as scratch:
+            with instrumentation.stage("download", ranges=len(ranges)) as span:
+                download = VideoDownloader(output_dir=scratch).download_video(video_url, extract_audio=True)
+                if not download.success:
+                    raise RuntimeError(f"Audio download failed: {download.error_message}")
+                span.bytes = file_size(download.output_path)
+
+            extractor = AudioExtractor(output_dir=scratch)
+            # The range transcripts are deleted with the scratch directory; keep them out of the search index
+            search_index, self.transcriber.search_index = self.transcriber.search_index, False
+            try:
+                for number, (start, end) in enumerate(ranges):
+                    trimmed = extractor.trim_audio(download.output_path, str(start), str(end), output_format="wav")
+                    if not trimmed.success:
+                        raise RuntimeError(trimmed.error_message)
+                    result = self.transcriber.transcribe_audio(
+                        trimmed.output_path,
+                        output_path=str(Path(scratch) / f"range_{number}_transcript.txt"),
+                    )
+                    if not result.success:
+                        raise RuntimeError(f"Transcription failed: {result.error_message}")
+                    for timing in result.metadata.get("timings", []):
+                        instrumentation.add(StageTiming(**timing))
+                    if not result.metadata.get("segments_path"):
+                        continue
+                    for segment in SegmentStore.load(result.metadata["segments_path"]):
+                        segments.append({
+                            **segment.to_dict(),
+                            "start": segment.start + start,
+                            "end": min(segment.end + start, end),
+                        })
+            finally:
+                self.transcriber.search_index = search_index
+        return segments
+
+    def transcribe(self,
+                   video_url: str,
+                   output_path: Optional[str] = None,
+                   timestamps: bool = False,
+                   start_time: Optional[str] = None,
+                   end_time: Optional[str] = None) -> TranscriptionResult:
+        """
+        Transcribe a YouTube video, captions first.
+
+        Args:
+            video_url: YouTube video URL
+            output_path: Transcript file (defaults to <output_dir>/<video id>_transcript.txt)
+            timestamps: If True, prefix each segment with [HH:MM:SS] timestamps
+            start_time: Only transcribe from here, 'HH:MM:SS' or seconds (times in the result start at 0)
+            end_time: Only transcribe up to here, 'HH:MM:SS' or seconds
+
+        Returns:
+            TranscriptionResult; metadata lists the caption track and every window's score
+        """
+        from audio_extractor import AudioExtractor
+
+        instrumentation = Instrumentation()
+        try:
+            to_seconds = AudioExtractor(output_dir=str(self.output_dir)).convert_time_to_seconds
+            with instrumentation.stage("captions") as span:
+                track = fetch_captions(video_url, str(self.output_dir), self.languages)
+                if track is None:
+                    return TranscriptionResult(
+                        success=False,
+                        error_message=f"No {'/'.join(self.languages)} captions available for {video_url}",
+                        metadata={"timings": instrumentation.to_metadata()},
+                    )
+                span.bytes = file_size(track.path)
+                captions = parse_captions(track.path)
+
+            start = to_seconds(start_time) if start_time else 0.0
+            end = to_seconds(end_time) if end_time else track.duration or (captions[-1]["end"] if captions else 0.0)
+            captions = [segment for segment in captions if segment["end"] > start and segment["start"] < end]
+
+            with instrumentation.stage("score"):
+                terms = load_glossary(self.glossary_path)
+                # Tile from the requested start, so the first window isn't scored on a partial slice of captions
+                windows = score_windows(captions, end, terms, self.window_seconds, self.min_score, start=start)
+                ranges = unreliable_ranges(windows)
+            print(f"Captions ({'automatic' if track.automatic else 'manual'}, {track.language}): "
+                  f"{len(windows) - sum(1 for w in windows if not w.reliable)}/{len(windows)} windows reliable")
+
+            segments = captions
+            whisper_seconds = sum(range_end - range_start for range_start, range_end in ranges)
+            if ranges:
+                print(f"Transcribing {len(ranges)} unreliable stretch(es), {whisper_seconds:.0f}s of audio, with Whisper...")
+                whisper_segments = self._transcribe_ranges(video_url, ranges, instrumentation)
+                # A caption cue belongs to the stretch its midpoint falls in
+                kept = [segment for segment in captions
+                        if not any(range_start <= (segment["start"] + segment["end"]) / 2 < range_end
+                                   for range_start, range_end in ranges)]
+                segments = sorted(kept + whisper_segments, key=lambda segment: segment["start"])
+
+            # Times relative to the requested start, like a trimmed download
+            segments = [{**segment, "start": max(segment["start"] - start, 0.0), "end": segment["end"] - start}
+                        for segment in segments if not _NON_SPEECH.match(segment["text"])]
+            store = SegmentStore.from_segments(segments)
+            transcript_text = store.to_timestamped() if timestamps else store.to_plain()
+
+            with instrumentation.stage("file_write") as span:
+                transcript_file = Path(output_path).resolve() if output_path else \
+                    self.output_dir / f"{video_id_from(video_url) or 'captions'}_transcript.txt"
+                transcript_file.parent.mkdir(parents=True, exist_ok=True)
+                transcript_file.write_text(transcript_text, encoding="utf-8")
+                segments_path = store.save(segments_path_for(transcript_file)) if len(store) else None
+                span.bytes = file_size(transcript_file)
+            print(f"Transcript saved to: {transcript_file}")
+
+            try:
+                with TranscriptIndex() as index:
+                    index.add_segments(str(transcript_file), [(s.start + start, s.text) for s in store],
+                                       video=video_url, title=track.title)
+            except Exception as e:
+                print(f"Warning: could not update search index: {e}")
+
+            return TranscriptionResult(
+                success=True,
+                transcript=transcript_text,
+                output_path=str(transcript_file),
+                metadata={
+                    "source": "captions",
+                    "caption_track": asdict(track),
+                    "windows": [asdict(window) for window in windows],
+                    "whisper_ranges": ranges,
+                    "whisper_seconds": whisper_seconds,
+                    "duration": end - start,
+                    "video_id": video_id_from(video_url),
+                    "segments_path": segments_path,
+                    "timings": instrumentation.to_metadata(),
+                }
+            )
+
+        except Exception as e:
+            return TranscriptionResult(
+                success=False,
+                error_message=str(e),
+                metadata={"timings": instrumentation.to_metadata()}
+            )
@@ -1,8 +1,123 @@
 import argparse
 import json
 import os
-from video_downloader import VideoDownloader
-from transcriber import Transcriber
+
+# Subcommands import their heavy dependencies (yt-dlp, whisper/torch) lazily,
+# so `--help` and lightweight commands start quickly.
+
+
+def server_client(args):
+    """Return a client for the running transcription server, or None to transcribe in-process."""
+    if args.no_server:
+        return None
+    from transcription_server import TranscriptionClient
+
+    client = TranscriptionClient()
+    return client if client.is_available() else None
+
+
+def transcribe(args, audio_path, output_dir, output_path=None, transcriber=None, video=None):
+    """
+    Transcribe via the local transcription server if one is running, else in-process.
+
+    Passing a transcriber (e.g. one already warming up) skips the server check.
+    The video URL or id is recorded in the search index for deep links.
+    """
+    if transcriber is None:
+        client = server_client(args)
+        if client is not None:
+            return client.transcribe(
+                audio_path,
+                output_dir=output_dir,
+                output_path=output_path,
+                model_size=args.model_size,
+                fast=args.fast,
+                timestamps=args.timestamps,
+                condition_on_previous_text=args.condition_on_previous_text,
+                video=video,
+                priority=args.priority,
+            )
+
+        from transcriber import Transcriber
+        transcriber = Transcriber(model_size=args.model_size, output_dir=output_dir, fast=args.fast,
+                                  search_index=True, window_seconds=args.window_seconds)
+    return transcriber.transcribe_audio(
+        audio_path,
+        output_path=output_path,
+        timestamps=args.timestamps,
+        condition_on_previous_text=args.condition_on_previous_text,
+        video=video,
+    )
+
+
+def redecode_suspects(args, audio_path, result, transcriber=None):
+    """
+    If --redecode was given, re-decode the windows of a finished transcription
+    that look hallucinated and rewrite its transcript.
+
+    Returns:
+        The re-decode's TranscriptionResult, or None if nothing was run
+    """
+    if not args.redecode or not result.success or not result.output_path:
+        return None
+    from redecode import Redecoder
+    from segment_store import segments_path_for
+    from transcriber import Transcriber
+
+    if not segments_path_for(result.output_path).exists():
+        print("No segments were saved with the transcript; skipping re-decode")
+        return None
+    print("\n=== Re-decoding suspect windows ===")
+    if transcriber is None:
+        transcriber = Transcriber(model_size=args.model_size, output_dir=args.output_dir, fast=args.fast, search_index=False)
+    redecode_result = Redecoder(transcriber=transcriber, model_size=args.redecode_model).redecode(
+        audio_path, str(segments_path_for(result.output_path)), transcript_path=result.output_path)
+    if redecode_result.success:
+        print(f"Re-decoded {redecode_result.metadata['redecoded_seconds']:.0f}s of "
+              f"{redecode_result.metadata['duration']:.0f}s")
+    else:
+        print(f"Re-decode failed, keeping the original transcript: {redecode_result.error_message}")
+    return redecode_result
+
+
+def start_profiler(args, torch_profile=True):
+    """Start profiling if --profile was given; the work then runs in this process."""
+    if not args.profile:
+        return None
+    from profiler import Profiler
+
+    args.no_server = True
+    profiler = Profiler(torch_profile=torch_profile)
+    profiler.start()
+    return profiler
+
+
+def report_run(args, *results, profiler=None):
+    """
+    Print stage timings and export them if --trace was given, and write the
+    profile next to the last result's output if the run was profiled.
+    """
+    if profiler is not None:
+        profiler.stop()
+        output_paths = [result.output_path for result in results if result and result.output_path]
+        report = profiler.write(output_paths[-1] if output_paths else None, output_dir=args.output_dir)
+        # Skip the header; print the hotspot, torch operator and allocation tables
+        start = report.summary.find('== Top')
+        print()
+        print(report.summary[start:] if start >= 0 else report.summary)
+        print(f"Profile summary: {report.summary_path}")
+        print(f"Flamegraph stacks: {report.folded_path} (flamegraph.pl, speedscope or inferno)")
+        if report.torch_trace_path:
+            print(f"Torch trace: {report.torch_trace_path}")
+
+    if not args.trace:
+        return
+    from instrumentation import format_timings, write_chrome_trace
+
+    timings = [timing for result in results if result and result.metadata
+               for timing in result.metadata.get('timings', [])]
+    print(f"\nStage timings:\n{format_timings(timings)}")
+    print(f"Trace written to: {write_chrome_trace(args.trace, timings)} (open in chrome://tracing or ui.perfetto.dev)")
 
 
 def main():
@@ -16,6 +131,8 @@ def main():
     download_parser.add_argument('--start-time', help='Start time (HH:MM:SS or seconds)')
     download_parser.add_argument('--end-time', help='End time (HH:MM:SS or seconds)')
     download_parser.add_argument('--no-audio', action='store_true', help='Download video only, no audio extraction')
+    download_parser.add_argument('--trace', metavar='PATH', help='Write per-stage timings as a Chrome trace JSON file')
+    download_parser.add_argument('--profile', action='store_true', help='Profile the run (sampling, torch and tracemalloc) and write the results next to the output')
 
 
     # Transcribe
@@ -26,7 +143,15 @@ def main():
     transcribe_parser.add_argument('--model-size', default='default', help='Whisper model size (default: auto-selects best model for platform)')
     transcribe_parser.add_argument('--fast', action='store_true', help='Use smaller/faster model (mlx-whisper base on Apple Silicon)')
     transcribe_parser.add_argument('--timestamps', action='store_true', help='Include [HH:MM:SS] timestamps in transcript')
+    transcribe_parser.add_argument('--video', help='YouTube URL or video id of the audio, for search result links')
     transcribe_parser.add_argument('--condition-on-previous-text', action='store_true', default=False, help='Condition each segment on previous text (can cause hallucinations during music/silence)')
+    transcribe_parser.add_argument('--window-seconds', type=float, help='Decode and transcribe N seconds of audio at a time (e.g. 600), so memory stays flat for multi-hour recordings; always in-process')
+    transcribe_parser.add_argument('--redecode', action='store_true', help='Afterwards, re-decode only the windows that look hallucinated (repetition loops, compression-ratio spikes, non-speech) with stricter settings')
+    transcribe_parser.add_argument('--redecode-model', help='Model for re-decoded windows, e.g. large (default: same as --model-size)')
+    transcribe_parser.add_argument('--no-server', action='store_true', help='Always transcribe in-process, even if a transcription server is running')
+    transcribe_parser.add_argument('--priority', type=int, default=0, help='Job priority when submitting to the transcription server (higher runs first)')
+    transcribe_parser.add_argument('--trace', metavar='PATH', help='Write per-stage timings as a Chrome trace JSON file')
+    transcribe_parser.add_argument('--profile', action='store_true', help='Profile the run (sampling, torch and tracemalloc) and write the results next to the output')
 
     # Full workflow
     workflow_parser = subparsers.add_parser('workflow', help='Complete workflow: download -> transcribe')
@@ -39,6 +164,23 @@ def main():
     workflow_parser.add_argument('--transcript-output', help='Specific output file path for transcript')
     workflow_parser.add_argument('--timestamps', action='store_true', help='Include [HH:MM:SS] timestamps in transcript')
     workflow_parser.add_argument('--condition-on-previous-text', action='store_true', default=False, help='Condition each segment on previous text (can cause hallucinations during music/silence)')
+    workflow_parser.add_argument('--window-seconds', type=float, help='Decode and transcribe N seconds of audio at a time (e.g. 600), so memory stays flat for multi-hour recordings; always in-process')
+    workflow_parser.add_argument('--redecode', action='store_true', help='Afterwards, re-decode only the windows that look hallucinated (repetition loops, compression-ratio spikes, non-speech) with stricter settings')
+    workflow_parser.add_argument('--redecode-model', help='Model for re-decoded windows, e.g. large (default: same as --model-size)')
+    workflow_parser.add_argument('--captions-first', action='store_true', help="Build the transcript from YouTube's captions and run Whisper only where they look unreliable (--window-seconds applies to those stretches; not combinable with --redecode)")
+    workflow_parser.add_argument('--caption-min-score', type=float, default=0.6, help='Caption windows scoring below this (0-1) are re-transcribed with Whisper (default: 0.6)')
+    workflow_parser.add_argument('--no-server', action='store_true', help='Always transcribe in-process, even if a transcription server is running')
+    workflow_parser.add_argument('--priority', type=int, default=0, help='Job priority when submitting to the transcription server (higher runs first)')
+    workflow_parser.add_argument('--trace', metavar='PATH', help='Write per-stage timings as a Chrome trace JSON file')
+    workflow_parser.add_argument('--profile', action='store_true', help='Profile the run (sampling, torch and tracemalloc) and write the results next to the output')
+
+    # Transcription server
+    serve_parser = subparsers.add_parser('serve', help='Run a local transcription server that keeps models warm')
+    serve_parser.add_argument('--host', default='127.0.0.1', help='Address to bind')
+    serve_parser.add_argument('--port', type=int, default=8765, help='Port to bind')
+    serve_parser.add_argument('--concurrency', type=int, default=1, help='Jobs processed at once')
+    serve_parser.add_argument('--queue', help='Job queue database (default: ~/.cache/subtitle_downloader/jobs.sqlite3)')
+    serve_parser.add_argument('--preload', action='append', default=[], metavar='MODEL', help='Model to load at startup ("default", "fast" or a model name; repeatable)')
 
     # List channel videos
     list_parser = subparsers.add_parser('list-channel', help='List recent videos from a YouTube channel')
@@ -46,9 +188,75 @@ def main():
     list_parser.add_argument('--max-results', type=int, default=20, help='Max videos to list')
     list_parser.add_argument('--json', action='store_true', dest='output_json', help='Output as JSON')
 
+    # Worker fleet
+    worker_parser = subparsers.add_parser('worker', help='Process jobs from a shared queue (run one per machine)')
+    worker_parser.add_argument('--queue', required=True, help='Shared job queue database (e.g. on an NFS/SMB mount)')
+    worker_parser.add_argument('--artifacts', required=True, help='Shared directory where results are written')
+    worker_parser.add_argument('--worker-id', help='Worker name (default: hostname-pid)')
+    worker_parser.add_argument('--lease', type=float, default=120.0, help='Job lease in seconds, renewed while the job runs')
+    worker_parser.add_argument('--model-size', default='default', help='Whisper model size (default: auto-selects best model for platform)')
+    worker_parser.add_argument('--fast', action='store_true', help='Use smaller/faster model (mlx-whisper base on Apple Silicon)')
+    worker_parser.add_argument('--max-jobs', type=int, help='Exit after this many jobs')
+    worker_parser.add_argument('--exit-when-empty', action='store_true', help='Exit once the queue is drained')
+
+    enqueue_parser = subparsers.add_parser('enqueue', help='Add download+transcribe jobs to a shared queue')
+    enqueue_parser.add_argument('urls', nargs='*', help='YouTube video URLs')
+    enqueue_parser.add_argument('--queue', required=True, help='Shared job queue database')
+    enqueue_parser.add_argument('--channel', help='Also enqueue recent videos from this channel URL')
+    enqueue_parser.add_argument('--max-results', type=int, default=20, help='Max channel videos to enqueue')
+    enqueue_parser.add_argument('--start-time', help='Start time (HH:MM:SS or seconds)')
+    enqueue_parser.add_argument('--end-time', help='End time (HH:MM:SS or seconds)')
+    enqueue_parser.add_argument('--timestamps', action='store_true', help='Include [HH:MM:SS] timestamps in transcript')
+    enqueue_parser.add_argument('--keep-audio', action='store_true', help='Copy the extracted audio to the artifact store too')
+    enqueue_parser.add_argument('--priority', type=int, default=0, help='Job priority (higher runs first)')
+
+    queue_status_parser = subparsers.add_parser('queue-status', help='Show job counts and recent jobs in a queue')
+    queue_status_parser.add_argument('--queue', required=True, help='Job queue database')
+    queue_status_parser.add_argument('--limit', type=int, default=20, help='Recent jobs to list')
+
+    glossary_parser = subparsers.add_parser('glossary-apply', help='Re-apply new or edited glossary entries to saved transcripts')
+    glossary_parser.add_argument('--transcripts', help='Transcript directory (default: youtube/transcripts)')
+    glossary_parser.add_argument('--glossary', help='Glossary file (default: youtube/glossary.json)')
+    glossary_parser.add_argument('--index', help='Index database (default: ~/.cache/subtitle_downloader/glossary_index.sqlite3)')
+    glossary_parser.add_argument('--dry-run', action='store_true', help='Show the segments that would change without writing them')
+
+    render_parser = subparsers.add_parser('render', help='Render a saved .segments file as text, timestamped text, SRT, VTT or JSON')
+    render_parser.add_argument('segments', help='Segments file saved next to a transcript (<name>_transcript.segments)')
+    render_parser.add_argument('--format', default='srt', choices=['txt', 'timestamped', 'srt', 'vtt', 'json'], help='Output format (default: srt)')
+    render_parser.add_argument('--output', help='Output file (default: next to the segments file, e.g. <name>_transcript.srt; "-" for stdout)')
+    render_parser.add_argument('--force', action='store_true', help='Overwrite the default output file if it already exists')
+
+    redecode_parser = subparsers.add_parser('redecode', help='Re-decode only the hallucinated or repetitive windows of a saved transcription')
+    redecode_parser.add_argument('audio', help='Audio file the transcript was made from')
+    redecode_parser.add_argument('transcript', help='Transcript (or its .segments file) saved by transcribe or workflow')
+    redecode_parser.add_argument('--model-size', default='default', help='Model for the re-decoded windows, e.g. large (default: auto-selects best model for platform)')
+    redecode_parser.add_argument('--dry-run', action='store_true', help='List the suspect windows without re-decoding them')
+    redecode_parser.add_argument('--force', action='store_true', help='Re-decode even if the transcript was edited since it was transcribed (the edits are lost)')
+    redecode_parser.add_argument('--trace', metavar='PATH', help='Write per-stage timings as a Chrome trace JSON file')
+
+    search_parser = subparsers.add_parser('search', help='Search all indexed transcripts, with timestamped YouTube links')
+    search_parser.add_argument('query', help='Words to find (all must match), or an FTS5 query such as "grace of god" OR mercy')
+    search_parser.add_argument('--limit', type=int, default=20, help='Maximum number of hits')
+    search_parser.add_argument('--index', help='Search index database (default: ~/.cache/subtitle_downloader/transcripts.sqlite3)')
+
+    index_parser = subparsers.add_parser('index-transcripts', help='Add existing transcript files or directories to the search index')
+    index_parser.add_argument('paths', nargs='+', help='Transcript files, or directories searched for *_transcript.txt files')
+    index_parser.add_argument('--video', help='YouTube URL or video id (when indexing a single transcript)')
+    index_parser.add_argument('--index', help='Search index database (default: ~/.cache/subtitle_downloader/transcripts.sqlite3)')
+
+    # Declarative pipeline
+    run_parser = subparsers.add_parser('run', help='Run a pipeline file (download, trim, vad, transcribe, glossary-correct, blog)')
+    run_parser.add_argument('pipeline', help='Pipeline YAML/JSON file')
+    run_parser.add_argument('--set', action='append', default=[], metavar='NAME=VALUE', dest='variables', help='Override a pipeline variable (repeatable)')
+    run_parser.add_argument('--force', action='store_true', help='Re-run every stage even if its output is up to date')
+    run_parser.add_argument('--only', action='append', metavar='STAGE', help='Only run this stage and its dependencies (repeatable)')
+    run_parser.add_argument('--jobs', type=int, help='Maximum stages to run in parallel (overrides max_workers)')
+
     args = parser.parse_args()
 
     if args.command == 'download':
+        from video_downloader import VideoDownloader
+        profiler = start_profiler(args, torch_profile=False)
         downloader = VideoDownloader(output_dir=args.output_dir)
         extract_audio = not args.no_audio
         result = downloader.download_video(args.url, start_time=args.start_time, end_time=args.end_time, extract_audio=extract_audio)
@@ -56,45 +264,95 @@ def main():
             print(f"Downloaded successfully: {result.output_path}")
         else:
             print(f"Download failed: {result.error_message}")
+        report_run(args, result, profiler=profiler)
 
 
     elif args.command == 'transcribe':
-        transcriber = Transcriber(model_size=args.model_size, output_dir=args.output_dir, fast=args.fast)
-        result = transcriber.transcribe_audio(args.input, output_path=args.output_file, timestamps=args.timestamps, condition_on_previous_text=args.condition_on_previous_text)
+        if args.window_seconds:
+            args.no_server = True  # The server decodes whole files
+        profiler = start_profiler(args)
+        result = transcribe(args, args.input, args.output_dir, output_path=args.output_file, video=args.video)
+        redecode_result = redecode_suspects(args, args.input, result)
         if result.success:
+            transcript = redecode_result.transcript if redecode_result and redecode_result.success else result.transcript
             print(f"Transcription successful: {result.output_path}")
-            print(f"\nTranscript preview:\n{result.transcript[:200]}...")
+            print(f"\nTranscript preview:\n{transcript[:200]}...")
         else:
             print(f"Transcription failed: {result.error_message}")
+        report_run(args, result, redecode_result, profiler=profiler)
 
     elif args.command == 'workflow':
+        from video_downloader import VideoDownloader
+        import time
+        if args.window_seconds:
+            args.no_server = True  # The server decodes whole files
+        profiler = start_profiler(args)
+
+        if args.captions_first and args.redecode:
+            # Caption cues carry no Whisper confidences to detect hallucinations from
+            workflow_parser.error("--redecode works on Whisper transcripts and can't be combined with --captions-first")
+        if args.captions_first:
+            from caption_fastpath import CaptionFastPath
+            from transcriber import Transcriber
+
+            print("Starting captions-first workflow: Captions -> Whisper for unreliable windows")
+            fast_path = CaptionFastPath(
+                output_dir=args.output_dir,
+                transcriber=Transcriber(model_size=args.model_size, output_dir=args.output_dir, fast=args.fast, search_index=False,
+                                        window_seconds=args.window_seconds),
+                min_score=args.caption_min_score,
+            )
+            result = fast_path.transcribe(args.url, output_path=args.transcript_output, timestamps=args.timestamps,
+                                          start_time=args.start_time, end_time=args.end_time)
+            if result.success:
+                print("\n=== Workflow Complete ===")
+                print(f"Transcript file: {result.output_path}")
+                print(f"Whisper transcribed {result.metadata['whisper_seconds']:.0f}s of {result.metadata['duration']:.0f}s")
+                print(f"\nTranscript preview:\n{result.transcript[:300]}...")
+                report_run(args, result, profiler=profiler)
+                return
+            print(f"Captions-first transcription failed ({result.error_message}); falling back to full Whisper")
+
         print("Starting complete workflow: Download -> Transcribe")
 
+        # Load the model while the download runs, unless a warm server will transcribe
+        transcriber, warm_up = None, None
+        if server_client(args) is None:
+            from transcriber import Transcriber
+            transcriber = Transcriber(model_size=args.model_size, output_dir=args.output_dir, fast=args.fast,
+                                      search_index=True, window_seconds=args.window_seconds)
+            warm_up = transcriber.start_warm_up()
+
         # Step 1: Download video and extract audio
         print("\n=== Step 1: Downloading video and extracting audio ===")
         downloader = VideoDownloader(output_dir=args.output_dir)
         download_result = downloader.download_video(args.url, start_time=args.start_time, end_time=args.end_time, extract_audio=True)
+        audio_ready = time.perf_counter()
 
         if not download_result.success:
             print(f"Workflow failed at download step: {download_result.error_message}")
+            report_run(args, download_result, profiler=profiler)
             return
 
         print(f"Audio extracted: {download_result.output_path}")
 
         # Step 2: Transcribe audio
         print("\n=== Step 2: Transcribing audio ===")
-        transcriber = Transcriber(model_size=args.model_size, output_dir=args.output_dir, fast=args.fast)
-        transcribe_result = transcriber.transcribe_audio(
-            download_result.output_path,
-            output_path=args.transcript_output,
-            timestamps=args.timestamps,
-            condition_on_previous_text=args.condition_on_previous_text,
-        )
+        if warm_up is not None:
+            print(f"Model warm-up overlapped with download: saved {warm_up.seconds_saved(audio_ready):.1f}s"
+                  + ("" if warm_up.done else " (still loading)"))
+        transcribe_result = transcribe(args, download_result.output_path, args.output_dir,
+                                       output_path=args.transcript_output, transcriber=transcriber, video=args.url)
 
         if not transcribe_result.success:
             print(f"Workflow failed at transcription step: {transcribe_result.error_message}")
+            report_run(args, download_result, transcribe_result, profiler=profiler)
             return
 
+        redecode_result = redecode_suspects(args, download_result.output_path, transcribe_result, transcriber=transcriber)
+        if redecode_result and redecode_result.success:
+            transcribe_result.transcript = redecode_result.transcript
+
         print(f"\n=== Workflow Complete ===")
         print(f"Audio file: {download_result.output_path}")
         print(f"Transcript file: {transcribe_result.output_path}")
@@ -104,8 +362,10 @@ def main():
             if download_result.metadata.get('upload_date'):
                 print(f"Upload date: {download_result.metadata['upload_date']}")
         print(f"\nTranscript preview:\n{transcribe_result.transcript[:300]}...")
+        report_run(args, download_result, transcribe_result, redecode_result, profiler=profiler)
 
     elif args.command == 'list-channel':
+        from video_downloader import VideoDownloader
         downloader = VideoDownloader()
         videos = downloader.list_channel_videos(args.channel, max_results=args.max_results)
 
@@ -140,6 +400,191 @@ def main():
                 print(f"{i:3d}. {v.title}{duration_str}{date_str}")
                 print(f"     {v.url}")
 
+    elif args.command == 'serve':
+        from transcription_server import TranscriptionServer
+
+        server = TranscriptionServer(host=args.host, port=args.port, concurrency=args.concurrency, queue_path=args.queue)
+        for model in args.preload:
+            print(f"Preloading model: {model}")
+            server.preload(model_size=model, fast=(model == 'fast'))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\nShutting down transcription server")
+
+    elif args.command == 'worker':
+        from job_queue import JobQueue
+        from worker import Worker
+
+        worker = Worker(
+            JobQueue(args.queue, shared=True),
+            args.artifacts,
+            worker_id=args.worker_id,
+            lease_seconds=args.lease,
+            model_size=args.model_size,
+            fast=args.fast,
+        )
+        try:
+            worker.run(max_jobs=args.max_jobs, exit_when_empty=args.exit_when_empty)
+        except KeyboardInterrupt:
+            print("\nWorker interrupted; current job returned to the queue")
+
+    elif args.command == 'enqueue':
+        from job_queue import JobQueue
+
+        urls = list(args.urls)
+        if args.channel:
+            from video_downloader import VideoDownloader
+            urls.extend(v.url for v in VideoDownloader().list_channel_videos(args.channel, max_results=args.max_results))
+        if not urls:
+            parser.error("enqueue needs at least one URL or --channel")
+
+        queue = JobQueue(args.queue, shared=True)
+        for url in urls:
+            job_id = queue.submit('workflow', {
+                'url': url,
+                'start_time': args.start_time,
+                'end_time': args.end_time,
+                'timestamps': args.timestamps,
+                'keep_audio': args.keep_audio,
+            }, priority=args.priority)
+            print(f"Queued job {job_id}: {url}")
+
+    elif args.command == 'queue-status':
+        from job_queue import JobQueue
+
+        queue = JobQueue(args.queue, shared=True)
+        counts = queue.counts()
+        print("  ".join(f"{status}: {count}" for status, count in counts.items()))
+        for job in queue.list(limit=args.limit):
+            target = job.payload.get('url') or job.payload.get('audio_path')
+            detail = job.error or (job.result or {}).get('transcript_path') or ''
+            print(f"{job.id:5d} {job.status:<8} {job.worker_id or '-':<24} {target}  {detail}")
+
+    elif args.command == 'glossary-apply':
+        from glossary import load_glossary
+        from glossary_index import GlossaryIndex
+
+        index = GlossaryIndex(args.transcripts, args.index)
+        result = index.apply(load_glossary(args.glossary), dry_run=args.dry_run)
+        index.close()
+        if not result.success:
+            print(f"Glossary update failed: {result.error_message}")
+            raise SystemExit(1)
+
+        for change in result.changes:
+            print(f"{change.path}:{change.line}\n  - {change.before}\n  + {change.after}")
+        print(f"{len(result.changed_terms)} new or edited term(s), {result.files_indexed} transcript(s) re-indexed, "
+              f"{result.segments_checked} segment(s) checked in {result.seconds * 1000:.0f} ms")
+        action = "Would make" if args.dry_run else "Made"
+        print(f"{action} {result.replacements} correction(s) in {len(result.files_changed)} transcript(s)")
+
+    elif args.command == 'render':
+        from segment_store import SegmentStore, FORMAT_SUFFIXES
+        from pathlib import Path
+
+        try:
+            store = SegmentStore.load(args.segments)
+        except (OSError, ValueError) as e:
+            print(f"Could not read segments: {e}")
+            raise SystemExit(1)
+        rendered = store.render(args.format)
+        if args.output == '-':
+            print(rendered)
+        else:
+            output = Path(args.output) if args.output else Path(args.segments).with_suffix(FORMAT_SUFFIXES[args.format])
+            if not args.output and output.exists() and not args.force:
+                print(f"{output} already exists; use --force to overwrite it or --output to write elsewhere")
+                raise SystemExit(1)
+            output.write_text(rendered + "\n", encoding='utf-8')
+            print(f"Rendered {len(store)} segment(s) to {output}")
+
+    elif args.command == 'redecode':
+        from redecode import Redecoder
+        from segment_store import segments_path_for
+        from pathlib import Path
+
+        if args.transcript.endswith('.segments'):
+            segments_path, transcript_path = args.transcript, None
+        else:
+            segments_path, transcript_path = str(segments_path_for(args.transcript)), args.transcript
+        if not Path(segments_path).exists():
+            print(f"Segments file not found: {segments_path} (transcripts saved before segments were kept can't be re-decoded)")
+            raise SystemExit(1)
+        result = Redecoder(model_size=args.model_size).redecode(args.audio, segments_path, transcript_path=transcript_path,
+                                                               dry_run=args.dry_run, force=args.force)
+        if not result.success:
+            print(f"Re-decode failed: {result.error_message}")
+            raise SystemExit(1)
+        if args.dry_run or not result.metadata['windows']:
+            print("Transcript unchanged")
+        else:
+            print(f"Re-decoded {result.metadata['redecoded_seconds']:.0f}s of {result.metadata['duration']:.0f}s; "
+                  f"transcript updated: {result.output_path}")
+        report_run(args, result)
+
+    elif args.command == 'search':
+        from transcript_search import TranscriptIndex
+        import time
+
+        with TranscriptIndex(args.index) as index:
+            started = time.perf_counter()
+            try:
+                hits = index.search(args.query, limit=args.limit)
+            except ValueError as e:
+                print(e)
+                raise SystemExit(1)
+            elapsed = time.perf_counter() - started
+
+        for hit in hits:
+            start = "" if hit.start is None else f"[{int(hit.start) // 3600:02d}:{int(hit.start) % 3600 // 60:02d}:{int(hit.start) % 60:02d}] "
+            print(f"{hit.title}\n  {start}{hit.snippet}\n  {hit.link or hit.path}")
+        print(f"{len(hits)} hit(s) in {elapsed * 1000:.1f} ms")
+
+    elif args.command == 'index-transcripts':
+        from pathlib import Path
+        from transcript_search import TranscriptIndex
+
+        files = []
+        for path in map(Path, args.paths):
+            # Only transcripts; .plain.txt/.timestamped.txt renders next to them would duplicate every hit
+            files.extend(sorted(path.rglob('*_transcript.txt')) if path.is_dir() else [path])
+        if args.video and len(files) != 1:
+            parser.error("--video applies to a single transcript file")
+
+        indexed = 0
+        with TranscriptIndex(args.index) as index:
+            for path in files:
+                count = index.add_file(str(path), video=args.video)
+                if count is not None:
+                    indexed += 1
+                    print(f"Indexed {count} segment(s) from {path}")
+        print(f"{indexed} transcript(s) indexed, {len(files) - indexed} already up to date")
+
+    elif args.command == 'run':
+        from pipeline import Pipeline, PipelineError, format_summary
+
+        variables = {}
+        for assignment in args.variables:
+            name, sep, value = assignment.partition('=')
+            if not sep:
+                parser.error(f"--set expects NAME=VALUE, got '{assignment}'")
+            variables[name] = value
+
+        try:
+            pipeline = Pipeline.load(args.pipeline, variables)
+            if args.jobs:
+                pipeline.max_workers = args.jobs
+            runs = pipeline.run(force=args.force, only=args.only)
+        except PipelineError as e:
+            print(f"Pipeline error: {e}")
+            raise SystemExit(1)
+
+        print(f"\n=== Pipeline Summary ===")
+        print(format_summary(runs))
+        if any(run.status == 'failed' for run in runs):
+            raise SystemExit(1)
+
     else:
         parser.print_help()
 
@@ -0,0 +1,80 @@
+import json
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+DEFAULT_GLOSSARY_PATH = Path(__file__).resolve().parent.parent / "glossary.json"
+
+
+def load_glossary(path: Optional[str] = None) -> Dict[str, str]:
+    """
+    Load glossary.json and flatten its categories into one source -> target map.
+
+    Args:
+        path: Glossary file (defaults to youtube/glossary.json)
+
+    Returns:
+        Dict mapping lowercase source terms to their corrected form
+    """
+    with open(path or DEFAULT_GLOSSARY_PATH, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    terms: Dict[str, str] = {}
+    for category in data.values():
+        if isinstance(category, dict):
+            for source, target in category.items():
+                terms[source.lower()] = target
+    return terms
+
+
+def _term_pattern(source: str, book_reference: bool) -> re.Pattern:
+    words = r"\s+".join(re.escape(word) for word in source.split())
+    if book_reference:
+        # Identity entries such as "john" -> "John" are only safe before a chapter number
+        return re.compile(rf"(?<![\w']){words}(?=\s+\d)", re.IGNORECASE)
+    return re.compile(rf"(?<![\w']){words}(?![\w'])", re.IGNORECASE)
+
+
+def compile_glossary(terms: Dict[str, str]) -> List[Tuple[re.Pattern, str]]:
+    """
+    Turn a glossary into (pattern, replacement) rules, longest source first.
+
+    Entries that only change capitalisation (e.g. "mark" -> "Mark") would
+    rewrite ordinary words, so they are only applied where the term is
+    followed by a number, i.e. used as a Bible reference.
+    """
+    rules = []
+    for source in sorted(terms, key=len, reverse=True):
+        target = terms[source]
+        identity = source.lower() == target.lower()
+        rules.append((_term_pattern(source, book_reference=identity), target))
+    return rules
+
+
+def apply_glossary(text: str, rules: List[Tuple[re.Pattern, str]]) -> Tuple[str, int]:
+    """
+    Apply compiled glossary rules to text.
+
+    A match is left alone if the text there already reads as the corrected
+    term, so "heartbeat" -> "Heartbeat Church" does not double up.
+
+    Returns:
+        Tuple of (corrected text, number of replacements made)
+    """
+    count = 0
+
+    for pattern, target in rules:
+        def replace(match):
+            nonlocal count
+            start = match.start()
+            if match.group(0) == target:
+                return target
+            if len(target) > len(match.group(0)) and \
+                    match.string[start:start + len(target)].lower() == target.lower():
+                return match.group(0)
+            count += 1
+            return target
+
+        text = pattern.sub(replace, text)
+    return text, count
@@ -0,0 +1,318 @@
+import os
+import re
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, Dict, List, Set, Tuple, Iterable
+
+from glossary import load_glossary, compile_glossary, apply_glossary
+from segment_store import SegmentStore, segments_path_for
+from transcript_search import TranscriptIndex
+
+
+DEFAULT_TRANSCRIPT_DIR = Path(__file__).resolve().parent.parent / "transcripts"
+DEFAULT_INDEX_PATH = Path.home() / ".cache" / "subtitle_downloader" / "glossary_index.sqlite3"
+
+TRANSCRIPT_SUFFIXES = (".txt", ".srt", ".vtt")
+
+_TOKEN = re.compile(r"[\w']+")
+# Keeps the whitespace between sentences so a line can be put back together exactly
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])(\s+)")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL UNIQUE,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    glossary_applied INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS postings (
+    token TEXT NOT NULL,
+    file_id INTEGER NOT NULL,
+    line INTEGER NOT NULL,
+    segment INTEGER NOT NULL,
+    PRIMARY KEY (token, file_id, line, segment)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_by_file ON postings (file_id);
+CREATE TABLE IF NOT EXISTS applied_terms (source TEXT PRIMARY KEY, target TEXT NOT NULL);
+"""
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens, matched the same way glossary terms are."""
+    return _TOKEN.findall(text.replace("’", "'").lower())
+
+
+def split_segments(line: str) -> List[str]:
+    """
+    Split a transcript line into sentence segments, with the separating
+    whitespace at odd positions so "".join() gives back the line.
+
+    Timestamped transcripts have one Whisper segment per line; plain ones are
+    a single long line, so sentences keep rewrites (and index entries) small.
+    """
+    return _SENTENCE_BREAK.split(line)
+
+
+def default_index_path() -> Path:
+    env_dir = os.environ.get("SUBTITLE_DOWNLOADER_CACHE_DIR")
+    return Path(env_dir) / "glossary_index.sqlite3" if env_dir else DEFAULT_INDEX_PATH
+
+
+@dataclass
+class SegmentChange:
+    """One rewritten segment"""
+    path: str
+    line: int
+    before: str
+    after: str
+
+
+@dataclass
+class GlossaryApplyResult:
+    """Result of re-applying the glossary to the transcript archive"""
+    success: bool
+    changed_terms: List[str] = field(default_factory=list)
+    files_indexed: int = 0
+    segments_checked: int = 0
+    replacements: int = 0
+    files_changed: List[str] = field(default_factory=list)
+    changes: List[SegmentChange] = field(default_factory=list)
+    seconds: float = 0.0
+    error_message: Optional[str] = None
+
+
+class GlossaryIndex:
+    """
+    Inverted index from normalised tokens to the (transcript, line, sentence)
+    segments that contain them, kept in SQLite next to the other caches.
+
+    The index remembers which glossary entries have been applied. When
+    glossary.json gains or edits entries, apply() looks up only the segments
+    that contain every token of those source terms and rewrites them, instead
+    of rescanning the archive. Transcripts that are new or were edited since
+    they were last indexed are re-indexed and get the whole glossary.
+
+    Multi-word terms are found by intersecting the postings of their tokens;
+    the glossary's own patterns then decide whether the words are adjacent.
+
+    A rewritten transcript's .segments store gets the same corrections, so
+    renders and re-decodes keep them, and the transcript is re-indexed for search.
+    """
+
+    def __init__(self, transcript_dir: Optional[str] = None, path: Optional[str] = None):
+        """
+        Args:
+            transcript_dir: Transcript archive (defaults to youtube/transcripts)
+            path: Index database (defaults to $SUBTITLE_DOWNLOADER_CACHE_DIR/glossary_index.sqlite3
+                  or ~/.cache/subtitle_downloader/glossary_index.sqlite3)
+        """
+        self.transcript_dir = Path(transcript_dir or DEFAULT_TRANSCRIPT_DIR).resolve()
+        self.path = Path(path) if path else default_index_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.executescript(SCHEMA)
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'transcript_dir'").fetchone()
+        if row is None or row[0] != str(self.transcript_dir):
+            # A different archive: nothing in the index applies to it
+            with self.conn:
+                for table in ("postings", "files", "applied_terms", "meta"):
+                    self.conn.execute(f"DELETE FROM {table}")
+                self.conn.execute("INSERT INTO meta (key, value) VALUES ('transcript_dir', ?)",
+                                  (str(self.transcript_dir),))
+
+    def close(self):
+        self.conn.close()
+
+    def _index_file(self, relative: str, stat: os.stat_result, glossary_applied: bool = False) -> int:
+        text = (self.transcript_dir / relative).read_text(encoding="utf-8")
+        row = self.conn.execute("SELECT id FROM files WHERE path = ?", (relative,)).fetchone()
+        if row:
+            file_id = row[0]
+            self.conn.execute("DELETE FROM postings WHERE file_id = ?", (file_id,))
+            self.conn.execute("UPDATE files SET mtime_ns = ?, size = ?, glossary_applied = ? WHERE id = ?",
+                              (stat.st_mtime_ns, stat.st_size, int(glossary_applied), file_id))
+        else:
+            file_id = self.conn.execute(
+                "INSERT INTO files (path, mtime_ns, size, glossary_applied) VALUES (?, ?, ?, ?)",
+                (relative, stat.st_mtime_ns, stat.st_size, int(glossary_applied)),
+            ).lastrowid
+        postings = set()
+        for line_number, line in enumerate(text.split("\n")):
+            for segment, sentence in enumerate(split_segments(line)[::2]):
+                for token in tokenize(sentence):
+                    postings.add((token, file_id, line_number, segment))
+        self.conn.executemany("INSERT INTO postings (token, file_id, line, segment) VALUES (?, ?, ?, ?)",
+                              postings)
+        return file_id
+
+    def refresh(self) -> int:
+        """
+        Bring the index up to date with the transcript directory.
+
+        Only files whose size or modification time changed are re-read.
+
+        Returns:
+            Number of files (re)indexed
+        """
+        known = {path: (file_id, mtime_ns, size)
+                 for file_id, path, mtime_ns, size in self.conn.execute("SELECT id, path, mtime_ns, size FROM files")}
+        seen = set()
+        indexed = 0
+        with self.conn:
+            if self.transcript_dir.is_dir():
+                for path in self.transcript_dir.rglob("*"):
+                    if path.suffix.lower() not in TRANSCRIPT_SUFFIXES or not path.is_file():
+                        continue
+                    relative = path.relative_to(self.transcript_dir).as_posix()
+                    seen.add(relative)
+                    stat = path.stat()
+                    entry = known.get(relative)
+                    if entry and entry[1] == stat.st_mtime_ns and entry[2] == stat.st_size:
+                        continue
+                    self._index_file(relative, stat)
+                    indexed += 1
+            for relative in set(known) - seen:
+                file_id = known[relative][0]
+                self.conn.execute("DELETE FROM postings WHERE file_id = ?", (file_id,))
+                self.conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+        return indexed
+
+    def changed_terms(self, terms: Dict[str, str]) -> Dict[str, str]:
+        """Glossary entries that are new, or whose correction changed, since the last apply()."""
+        applied = dict(self.conn.execute("SELECT source, target FROM applied_terms"))
+        return {source: target for source, target in terms.items() if applied.get(source) != target}
+
+    def find(self, source: str, file_ids: Optional[Iterable[int]] = None) -> Set[Tuple[int, int, int]]:
+        """
+        Segments that contain every token of a source term.
+
+        Returns:
+            Set of (file id, line, segment) locations
+        """
+        tokens = sorted(set(tokenize(source)))
+        if not tokens:
+            return set()
+        query = " INTERSECT ".join(["SELECT file_id, line, segment FROM postings WHERE token = ?"] * len(tokens))
+        locations = set(self.conn.execute(query, tokens))
+        if file_ids is not None:
+            file_ids = set(file_ids)
+            locations = {location for location in locations if location[0] in file_ids}
+        return locations
+
+    def _apply_to_segments(self, segments_path: Path, segment_rules: List[Tuple[re.Pattern, str]]):
+        """Apply glossary rules to the text of each segment in a .segments store."""
+        store = SegmentStore.load(str(segments_path))
+        segments = []
+        for segment in store:
+            entry = segment.to_dict()
+            entry["text"], _ = apply_glossary(entry["text"], segment_rules)
+            segments.append(entry)
+        temp_path = segments_path.with_name(segments_path.name + ".tmp")
+        SegmentStore.from_segments(segments).save(str(temp_path))
+        os.replace(temp_path, segments_path)
+
+    def _reindex_search(self, paths: List[Path]):
+        """Update the transcript search index for rewritten transcripts."""
+        transcripts = [path for path in paths if path.name.endswith("_transcript.txt")]
+        if not transcripts:
+            return
+        try:
+            with TranscriptIndex() as index:
+                for path in transcripts:
+                    index.add_file(str(path))
+        except Exception as e:
+            print(f"Warning: could not update search index: {e}")
+
+    def apply(self, terms: Optional[Dict[str, str]] = None, dry_run: bool = False) -> GlossaryApplyResult:
+        """
+        Re-apply new and edited glossary entries to the transcripts that need them.
+
+        Args:
+            terms: Glossary as returned by load_glossary() (loads youtube/glossary.json if None)
+            dry_run: Report what would change without writing transcripts or updating the index
+
+        Returns:
+            GlossaryApplyResult listing the rewritten segments
+        """
+        started = time.perf_counter()
+        try:
+            if terms is None:
+                terms = load_glossary()
+            files_indexed = self.refresh()
+            changed = self.changed_terms(terms)
+            fresh_files = [file_id for (file_id,) in
+                           self.conn.execute("SELECT id FROM files WHERE glossary_applied = 0")]
+
+            # Which terms to try in which segment
+            pending: Dict[Tuple[int, int, int], Set[str]] = {}
+            for source in changed:
+                for location in self.find(source):
+                    pending.setdefault(location, set()).add(source)
+            if fresh_files:
+                for source in terms:
+                    if source not in changed:
+                        for location in self.find(source, fresh_files):
+                            pending.setdefault(location, set()).add(source)
+
+            rules = dict(zip(sorted(terms, key=len, reverse=True), compile_glossary(terms)))
+            paths = dict(self.conn.execute("SELECT id, path FROM files"))
+            result = GlossaryApplyResult(success=True, changed_terms=sorted(changed),
+                                         files_indexed=files_indexed, segments_checked=len(pending))
+
+            by_file: Dict[int, List[Tuple[int, int, Set[str]]]] = {}
+            for (file_id, line, segment), sources in pending.items():
+                by_file.setdefault(file_id, []).append((line, segment, sources))
+
+            rewritten = []
+            # Segment stores of the rewritten files, with the terms to apply to them
+            stores: Dict[Path, Set[str]] = {}
+            for file_id, locations in sorted(by_file.items()):
+                relative = paths[file_id]
+                lines = (self.transcript_dir / relative).read_text(encoding="utf-8").split("\n")
+                file_changed = False
+                for line, segment, sources in sorted(locations, key=lambda location: location[:2]):
+                    parts = split_segments(lines[line])
+                    before = parts[segment * 2]
+                    segment_rules = [rule for source, rule in rules.items() if source in sources]
+                    after, count = apply_glossary(before, segment_rules)
+                    if count == 0 or after == before:
+                        continue
+                    parts[segment * 2] = after
+                    lines[line] = "".join(parts)
+                    result.replacements += count
+                    result.changes.append(SegmentChange(path=relative, line=line + 1, before=before, after=after))
+                    file_changed = True
+                if file_changed:
+                    result.files_changed.append(relative)
+                    rewritten.append((relative, "\n".join(lines)))
+                    segments_path = segments_path_for(self.transcript_dir / relative)
+                    if segments_path.exists():
+                        stores.setdefault(segments_path, set()).update(
+                            source for _, _, sources in locations for source in sources)
+
+            if not dry_run:
+                with self.conn:
+                    for relative, text in rewritten:
+                        path = self.transcript_dir / relative
+                        temp_path = path.with_name(path.name + ".tmp")
+                        temp_path.write_text(text, encoding="utf-8")
+                        os.replace(temp_path, path)
+                        self._index_file(relative, path.stat(), glossary_applied=True)
+                    self.conn.execute("UPDATE files SET glossary_applied = 1")
+                    self.conn.execute("DELETE FROM applied_terms")
+                    self.conn.executemany("INSERT INTO applied_terms (source, target) VALUES (?, ?)",
+                                          terms.items())
+                for segments_path, sources in stores.items():
+                    self._apply_to_segments(segments_path, [rule for source, rule in rules.items() if source in sources])
+                self._reindex_search([self.transcript_dir / relative for relative, _ in rewritten])
+
+            result.seconds = time.perf_counter() - started
+            return result
+
+        except Exception as e:
+            return GlossaryApplyResult(success=False, error_message=str(e),
+                                       seconds=time.perf_counter() - started)
@@ -0,0 +1,171 @@
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Optional, Dict, Any, List, Iterable
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _cpu_seconds() -> float:
+    """CPU time of this process plus finished child processes (ffmpeg)."""
+    if resource is None:
+        return time.process_time()
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def peak_rss_bytes(children: bool = False) -> Optional[int]:
+    """High-water mark of this process's (or its largest finished child's) resident memory."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+@dataclass
+class StageTiming:
+    """Timing and resource usage of one stage"""
+    name: str
+    started_at: float  # Unix time, so stages from different results line up
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    peak_rss_bytes: Optional[int] = None
+    bytes: Optional[int] = None
+    thread: Optional[str] = None
+    info: Optional[Dict[str, Any]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class Span:
+    """An open stage; call finish() to record it"""
+
+    def __init__(self, recorder: "Instrumentation", name: str, **info):
+        self._recorder = recorder
+        self._started = time.perf_counter()
+        self._cpu_started = _cpu_seconds()
+        self.timing = StageTiming(
+            name=name,
+            started_at=time.time(),
+            thread=threading.current_thread().name,
+            info=info or None,
+        )
+        self.bytes: Optional[int] = None
+
+    def finish(self, bytes: Optional[int] = None) -> StageTiming:
+        if bytes is not None:
+            self.bytes = bytes
+        self.timing.wall_seconds = time.perf_counter() - self._started
+        self.timing.cpu_seconds = _cpu_seconds() - self._cpu_started
+        self.timing.peak_rss_bytes = peak_rss_bytes()
+        self.timing.bytes = self.bytes
+        self._recorder.add(self.timing)
+        return self.timing
+
+
+class Instrumentation:
+    """
+    Records per-stage wall time, CPU time, peak RSS and bytes moved.
+
+    CPU time is process-wide (including finished ffmpeg children), so stages
+    that overlap with other threads, e.g. a background model load, include
+    that work too. Peak RSS is the process high-water mark when the stage ended.
+
+    Usage:
+        instrumentation = Instrumentation()
+        with instrumentation.stage("inference") as span:
+            ...
+            span.bytes = len(data)
+        metadata["timings"] = instrumentation.to_metadata()
+    """
+
+    def __init__(self):
+        self.stages: List[StageTiming] = []
+        self._lock = threading.Lock()
+
+    def start(self, name: str, **info) -> Span:
+        return Span(self, name, **info)
+
+    @contextmanager
+    def stage(self, name: str, **info):
+        span = self.start(name, **info)
+        try:
+            yield span
+        finally:
+            span.finish()
+
+    def add(self, timing: StageTiming):
+        with self._lock:
+            self.stages.append(timing)
+
+    def to_metadata(self) -> List[Dict[str, Any]]:
+        return [timing.to_dict() for timing in self.stages]
+
+
+def file_size(path) -> Optional[int]:
+    try:
+        return os.path.getsize(path)
+    except (OSError, TypeError):
+        return None
+
+
+def chrome_trace(timings: Iterable[Dict[str, Any]], process_name: str = "subtitle_downloader") -> Dict[str, Any]:
+    """
+    Convert recorded timings (as stored in result metadata) to Chrome trace format.
+
+    Open the file in chrome://tracing or https://ui.perfetto.dev.
+    """
+    pid = os.getpid()
+    thread_ids: Dict[str, int] = {}
+    events: List[Dict[str, Any]] = [
+        {"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": process_name}},
+    ]
+    for timing in sorted(timings, key=lambda t: t["started_at"]):
+        thread = timing.get("thread") or "main"
+        if thread not in thread_ids:
+            thread_ids[thread] = len(thread_ids) + 1
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": thread_ids[thread],
+                           "args": {"name": thread}})
+        args = {key: timing.get(key) for key in ("cpu_seconds", "peak_rss_bytes", "bytes")}
+        args.update(timing.get("info") or {})
+        events.append({
+            "name": timing["name"],
+            "cat": "stage",
+            "ph": "X",
+            "ts": timing["started_at"] * 1e6,
+            "dur": timing["wall_seconds"] * 1e6,
+            "pid": pid,
+            "tid": thread_ids[thread],
+            "args": args,
+        })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def write_chrome_trace(path: str, timings: Iterable[Dict[str, Any]]) -> str:
+    """Write timings as a Chrome trace JSON file and return its path."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(chrome_trace(timings), f, indent=1)
+    return path
+
+
+def format_timings(timings: Iterable[Dict[str, Any]]) -> str:
+    """One line per stage, for printing after a run."""
+    lines = []
+    for timing in timings:
+        line = f"  {timing['name']:<14} {timing['wall_seconds']:8.2f}s wall  {timing['cpu_seconds']:8.2f}s cpu"
+        if timing.get("peak_rss_bytes"):
+            line += f"  {timing['peak_rss_bytes'] / 1e6:8.1f} MB peak"
+        if timing.get("bytes") is not None:
+            line += f"  {timing['bytes'] / 1e6:8.2f} MB moved"
+        lines.append(line)
+    return "\n".join(lines)
@@ -0,0 +1,276 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+
+DEFAULT_QUEUE_PATH = Path.home() / ".cache" / "subtitle_downloader" / "jobs.sqlite3"
+
+JOB_STATUSES = ("queued", "running", "done", "failed")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'queued',
+    result TEXT,
+    error TEXT,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    worker_id TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS jobs_pending ON jobs (status, priority DESC, id);
+"""
+
+# Columns added after the first release, for queues created by older versions
+MIGRATIONS = {
+    "worker_id": "ALTER TABLE jobs ADD COLUMN worker_id TEXT",
+    "lease_expires": "ALTER TABLE jobs ADD COLUMN lease_expires REAL",
+    "attempts": "ALTER TABLE jobs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0",
+}
+
+
+@dataclass
+class Job:
+    """A queued unit of work"""
+    id: int
+    kind: str
+    payload: Dict[str, Any]
+    priority: int
+    status: str
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created: Optional[float] = None
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    worker_id: Optional[str] = None
+    lease_expires: Optional[float] = None
+    attempts: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.__dict__)
+
+
+def default_queue_path() -> Path:
+    env_dir = os.environ.get("SUBTITLE_DOWNLOADER_CACHE_DIR")
+    return Path(env_dir) / "jobs.sqlite3" if env_dir else DEFAULT_QUEUE_PATH
+
+
+class JobQueue:
+    """
+    Persistent priority job queue backed by SQLite.
+
+    Jobs survive restarts: anything left "running" by a crashed process can be
+    put back with requeue_running(). Higher priority jobs are claimed first,
+    then oldest first.
+
+    Workers on several machines can share one queue file on shared storage
+    (pass shared=True, which avoids WAL mode since it needs shared memory that
+    network filesystems don't provide). They claim jobs with a lease and keep
+    it alive with heartbeat(); jobs whose lease runs out are put back by
+    requeue_expired() so another worker picks them up.
+    """
+
+    def __init__(self, path: Optional[str] = None, shared: bool = False):
+        self.path = Path(path) if path else default_queue_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.shared = shared
+        self._local = threading.local()
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        for column, statement in MIGRATIONS.items():
+            if column not in columns:
+                conn.execute(statement)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=60, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=DELETE" if self.shared else "PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _row_to_job(row: sqlite3.Row) -> Job:
+        return Job(
+            id=row["id"],
+            kind=row["kind"],
+            payload=json.loads(row["payload"]),
+            priority=row["priority"],
+            status=row["status"],
+            result=json.loads(row["result"]) if row["result"] else None,
+            error=row["error"],
+            created=row["created"],
+            started=row["started"],
+            finished=row["finished"],
+            worker_id=row["worker_id"],
+            lease_expires=row["lease_expires"],
+            attempts=row["attempts"],
+        )
+
+    def submit(self, kind: str, payload: Dict[str, Any], priority: int = 0) -> int:
+        """Add a job and return its id."""
+        conn = self._connect()
+        cursor = conn.execute(
+            "INSERT INTO jobs (kind, payload, priority, created) VALUES (?, ?, ?, ?)",
+            (kind, json.dumps(payload), priority, time.time()),
+        )
+        return cursor.lastrowid
+
+    def claim(self,
+              kinds: Optional[List[str]] = None,
+              worker_id: Optional[str] = None,
+              lease_seconds: Optional[float] = None) -> Optional[Job]:
+        """
+        Atomically take the highest priority queued job, marking it running.
+
+        Args:
+            kinds: Only claim jobs of these kinds
+            worker_id: Identifies the claiming worker
+            lease_seconds: If set, the job is re-queued unless heartbeat() is
+                           called before the lease runs out
+
+        Returns:
+            The claimed Job, or None if nothing is queued
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            query = "SELECT * FROM jobs WHERE status = 'queued'"
+            params: List[Any] = []
+            if kinds:
+                query += f" AND kind IN ({', '.join('?' for _ in kinds)})"
+                params.extend(kinds)
+            query += " ORDER BY priority DESC, id LIMIT 1"
+            row = conn.execute(query, params).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            now = time.time()
+            lease_expires = now + lease_seconds if lease_seconds else None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', started = ?, worker_id = ?, lease_expires = ?, "
+                "attempts = attempts + 1 WHERE id = ?",
+                (now, worker_id, lease_expires, row["id"]),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        job = self._row_to_job(row)
+        job.status = "running"
+        job.started = now
+        job.worker_id = worker_id
+        job.lease_expires = lease_expires
+        job.attempts += 1
+        return job
+
+    def heartbeat(self, job_id: int, worker_id: str, lease_seconds: float) -> bool:
+        """
+        Extend a job's lease.
+
+        Returns:
+            False if the job is no longer held by this worker (its lease expired
+            and it was re-queued or claimed elsewhere)
+        """
+        cursor = self._connect().execute(
+            "UPDATE jobs SET lease_expires = ? WHERE id = ? AND worker_id = ? AND status = 'running'",
+            (time.time() + lease_seconds, job_id, worker_id),
+        )
+        return cursor.rowcount == 1
+
+    def _finish(self, job_id: int, status: str, worker_id: Optional[str], result=None, error=None) -> bool:
+        query = "UPDATE jobs SET status = ?, result = ?, error = ?, finished = ?, lease_expires = NULL WHERE id = ?"
+        params: List[Any] = [status, json.dumps(result) if result is not None else None, error, time.time(), job_id]
+        if worker_id is not None:
+            # Only the current lease holder may record the outcome
+            query += " AND worker_id = ? AND status = 'running'"
+            params.append(worker_id)
+        return self._connect().execute(query, params).rowcount == 1
+
+    def complete(self, job_id: int, result: Dict[str, Any], worker_id: Optional[str] = None) -> bool:
+        """Mark a job done and store its result."""
+        return self._finish(job_id, "done", worker_id, result=result)
+
+    def fail(self, job_id: int, error: str, worker_id: Optional[str] = None) -> bool:
+        """Mark a job failed with an error message."""
+        return self._finish(job_id, "failed", worker_id, error=error)
+
+    def release(self, job_id: int, worker_id: str) -> bool:
+        """Give a claimed job back to the queue (e.g. on worker shutdown)."""
+        cursor = self._connect().execute(
+            "UPDATE jobs SET status = 'queued', started = NULL, worker_id = NULL, lease_expires = NULL, "
+            "attempts = MAX(attempts - 1, 0) WHERE id = ? AND worker_id = ? AND status = 'running'",
+            (job_id, worker_id),
+        )
+        return cursor.rowcount == 1
+
+    def get(self, job_id: int) -> Optional[Job]:
+        row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def list(self, status: Optional[str] = None, limit: int = 50) -> List[Job]:
+        """Most recent jobs first, optionally filtered by status."""
+        if status:
+            rows = self._connect().execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY id DESC LIMIT ?", (status, limit)
+            ).fetchall()
+        else:
+            rows = self._connect().execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs in each status."""
+        counts = {status: 0 for status in JOB_STATUSES}
+        for row in self._connect().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status"):
+            counts[row["status"]] = row["n"]
+        return counts
+
+    def requeue_running(self) -> int:
+        """Put jobs left running by a previous (crashed) process back in the queue."""
+        cursor = self._connect().execute(
+            "UPDATE jobs SET status = 'queued', started = NULL WHERE status = 'running'"
+        )
+        return cursor.rowcount
+
+    def requeue_expired(self, max_attempts: int = 3) -> int:
+        """
+        Re-queue running jobs whose lease has expired.
+
+        Jobs that have already been attempted max_attempts times are marked
+        failed instead, so a job that crashes every worker can't loop forever.
+
+        Returns:
+            Number of jobs re-queued or failed
+        """
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            failed = conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'lease expired too many times', finished = ?, "
+                "lease_expires = NULL WHERE status = 'running' AND lease_expires IS NOT NULL "
+                "AND lease_expires < ? AND attempts >= ?",
+                (now, now, max_attempts),
+            ).rowcount
+            requeued = conn.execute(
+                "UPDATE jobs SET status = 'queued', started = NULL, worker_id = NULL, lease_expires = NULL "
+                "WHERE status = 'running' AND lease_expires IS NOT NULL AND lease_expires < ?",
+                (now,),
+            ).rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return failed + requeued
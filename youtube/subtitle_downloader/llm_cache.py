@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "subtitle_downloader" / "llm"
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters and size of a response cache"""
+    hits: int = 0
+    misses: int = 0
+    entries: int = 0
+    size_bytes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ResponseCache:
+    """
+    On-disk cache of LLM completions.
+
+    Each entry is a JSON file named after a hash of everything that determines
+    the completion. Reads refresh an entry's mtime, and the least recently used
+    entries are evicted once the cache exceeds max_entries or max_bytes.
+    """
+
+    def __init__(self,
+                 cache_dir: Optional[str] = None,
+                 max_entries: int = 500,
+                 max_bytes: int = 100 * 1024 * 1024):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory to store entries in. Defaults to
+                       $SUBTITLE_DOWNLOADER_CACHE_DIR/llm or ~/.cache/subtitle_downloader/llm.
+            max_entries: Maximum number of cached completions
+            max_bytes: Maximum total size of cached completions
+        """
+        if cache_dir is None:
+            env_dir = os.environ.get("SUBTITLE_DOWNLOADER_CACHE_DIR")
+            cache_dir = Path(env_dir) / "llm" if env_dir else DEFAULT_CACHE_DIR
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._stats_path = self.cache_dir / "stats.json"
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(api_url: str,
+                 model: str,
+                 system_prompt: str,
+                 user_prompt: str,
+                 transcript: str,
+                 temperature: float) -> str:
+        """Hash the inputs that determine a completion into a cache key."""
+        material = json.dumps(
+            [api_url, model, system_prompt, user_prompt, transcript, float(temperature)],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _write_json(self, path: Path, data: Dict[str, Any]):
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _record(self, hit: bool):
+        with self._lock:
+            counters = self._read_counters()
+            counters["hits" if hit else "misses"] += 1
+            self._write_json(self._stats_path, counters)
+
+    def _read_counters(self) -> Dict[str, int]:
+        try:
+            with open(self._stats_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return {"hits": int(data.get("hits", 0)), "misses": int(data.get("misses", 0))}
+        except (OSError, ValueError):
+            return {"hits": 0, "misses": 0}
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached completion.
+
+        Returns:
+            Dict with "text" and "usage", or None on a miss
+        """
+        path = self._entry_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)  # mark as recently used
+        except (OSError, ValueError):
+            self._record(hit=False)
+            return None
+        self._record(hit=True)
+        return entry
+
+    def put(self, key: str, text: str, usage: Optional[Dict[str, Any]] = None, model: Optional[str] = None):
+        """Store a completion and evict old entries if over the limits."""
+        self._write_json(self._entry_path(key), {
+            "text": text,
+            "usage": usage,
+            "model": model,
+            "created": time.time(),
+        })
+        self.evict()
+
+    def _entries(self):
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            if path == self._stats_path:
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self) -> int:
+        """
+        Remove least recently used entries until within max_entries and max_bytes.
+
+        Returns:
+            Number of entries removed
+        """
+        entries = sorted(self._entries())
+        total_bytes = sum(size for _, size, _ in entries)
+        removed = 0
+        while entries and (len(entries) > self.max_entries or total_bytes > self.max_bytes):
+            _, size, path = entries.pop(0)
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total_bytes -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        """Remove every entry and reset the hit/miss counters."""
+        for _, _, path in self._entries():
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        with self._lock:
+            self._write_json(self._stats_path, {"hits": 0, "misses": 0})
+
+    def stats(self) -> CacheStats:
+        """Return hit/miss counters and the current cache size."""
+        counters = self._read_counters()
+        entries = self._entries()
+        return CacheStats(
+            hits=counters["hits"],
+            misses=counters["misses"],
+            entries=len(entries),
+            size_bytes=sum(size for _, size, _ in entries),
+        )
@@ -0,0 +1,328 @@
+import http.client
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, Iterator, List, Tuple
+from urllib.parse import urlsplit
+
+
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class LLMError(Exception):
+    """Raised when the LLM endpoint returns an error or an unusable response"""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass
+class LLMCompletion:
+    """Result object for a single LLM completion"""
+    text: str
+    usage: Optional[Dict[str, Any]] = None
+    elapsed: float = 0.0
+    time_to_first_token: Optional[float] = None
+
+
+def extract_output_text(response_payload: Dict[str, Any]) -> str:
+    """Pull the completion text out of any of the response shapes we support."""
+    if "choices" in response_payload and response_payload["choices"]:
+        choice = response_payload["choices"][0]
+        if "message" in choice and "content" in choice["message"]:
+            return choice["message"]["content"].strip()
+        if "text" in choice:
+            return choice["text"].strip()
+
+    if "output_text" in response_payload:
+        return response_payload["output_text"].strip()
+
+    raise ValueError("LLM response did not include any recognizable output text.")
+
+
+def _extract_delta(event: Dict[str, Any]) -> str:
+    """Pull the incremental text out of one streamed (SSE) event."""
+    if event.get("choices"):
+        choice = event["choices"][0]
+        delta = choice.get("delta")
+        if delta and delta.get("content"):
+            return delta["content"]
+        if choice.get("text"):
+            return choice["text"]
+    # Responses API style events
+    if event.get("type") == "response.output_text.delta":
+        return event.get("delta", "")
+    return ""
+
+
+class _ConnectionPool:
+    """Keep-alive HTTP(S) connections to a single host, shared between calls"""
+
+    def __init__(self, scheme: str, host: str, port: Optional[int], max_idle: int = 8):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.max_idle = max_idle
+        self._idle: List[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float) -> http.client.HTTPConnection:
+        with self._lock:
+            if self._idle:
+                conn = self._idle.pop()
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.host, self.port, timeout=timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+
+    def release(self, conn: http.client.HTTPConnection):
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+
+_POOLS: Dict[Tuple[str, str, Optional[int]], _ConnectionPool] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def _get_pool(scheme: str, host: str, port: Optional[int]) -> _ConnectionPool:
+    key = (scheme, host, port)
+    with _POOLS_LOCK:
+        if key not in _POOLS:
+            _POOLS[key] = _ConnectionPool(scheme, host, port)
+        return _POOLS[key]
+
+
+class LLMStream:
+    """
+    Iterable over the text deltas of a streamed completion.
+
+    Iterate it to receive deltas as they arrive. Once exhausted, ``completion``
+    holds the full text, token usage (if the server reported it) and timings.
+    """
+
+    def __init__(self, client: "LLMClient", payload: Dict[str, Any]):
+        self._client = client
+        self._payload = payload
+        self.completion: Optional[LLMCompletion] = None
+
+    def __iter__(self) -> Iterator[str]:
+        started = time.perf_counter()
+        first_token_at = None
+        parts: List[str] = []
+        usage = None
+
+        conn, response = self._client._open(self._payload, stream=True)
+        reusable = False
+        try:
+            content_type = response.getheader("Content-Type", "")
+            if "text/event-stream" not in content_type:
+                # Server ignored "stream": true — treat it as a regular response
+                body = json.loads(response.read().decode("utf-8"))
+                text = extract_output_text(body)
+                usage = body.get("usage")
+                first_token_at = time.perf_counter()
+                parts.append(text)
+                reusable = not response.will_close
+                yield text
+            else:
+                for event in self._iter_events(response):
+                    if event.get("usage"):
+                        usage = event["usage"]
+                    elif event.get("type") == "response.completed":
+                        usage = event.get("response", {}).get("usage") or usage
+                    delta = _extract_delta(event)
+                    if not delta:
+                        continue
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    parts.append(delta)
+                    yield delta
+                response.read()  # drain so the connection can be reused
+                reusable = not response.will_close
+        finally:
+            if reusable:
+                self._client._pool.release(conn)
+            else:
+                conn.close()
+
+        self.completion = LLMCompletion(
+            text="".join(parts).strip(),
+            usage=usage,
+            elapsed=time.perf_counter() - started,
+            time_to_first_token=(first_token_at - started) if first_token_at else None,
+        )
+
+    @staticmethod
+    def _iter_events(response) -> Iterator[Dict[str, Any]]:
+        """Parse server-sent events, yielding each JSON data payload."""
+        data_lines: List[str] = []
+        while True:
+            raw = response.readline()
+            if not raw:
+                break
+            line = raw.decode("utf-8").rstrip("\r\n")
+            if line.startswith(":"):
+                continue
+            if line.startswith("data:"):
+                data_lines.append(line[5:].lstrip())
+                continue
+            if line == "" and data_lines:
+                data = "\n".join(data_lines)
+                data_lines = []
+                if data == "[DONE]":
+                    return
+                yield json.loads(data)
+        if data_lines and data_lines != ["[DONE]"]:
+            yield json.loads("\n".join(data_lines))
+
+    def text(self) -> str:
+        """Consume the stream and return the full completion text."""
+        for _ in self:
+            pass
+        return self.completion.text
+
+
+class LLMClient:
+    """
+    Client for OpenAI-compatible chat completion endpoints.
+
+    HTTP connections are kept alive and shared between clients talking to the
+    same host, and transient failures (429/5xx, dropped connections) are
+    retried with exponential backoff.
+    """
+
+    def __init__(self,
+                 api_url: str,
+                 api_key: str,
+                 timeout: float = 120,
+                 max_retries: int = 3,
+                 backoff: float = 1.0):
+        """
+        Initialize the client.
+
+        Args:
+            api_url: Full chat completions endpoint URL
+            api_key: Bearer token for the endpoint
+            timeout: Socket timeout in seconds (applies per read, not per completion)
+            max_retries: How many times to retry a transient failure
+            backoff: Base delay in seconds for exponential backoff between retries
+        """
+        parts = urlsplit(api_url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Unsupported LLM API URL: {api_url}")
+        self.api_url = api_url
+        self.api_key = api_key
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._path = parts.path or "/"
+        if parts.query:
+            self._path += f"?{parts.query}"
+        self._pool = _get_pool(parts.scheme, parts.hostname, parts.port)
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return self.backoff * (2 ** attempt) + random.uniform(0, self.backoff / 2)
+
+    def _open(self, payload: Dict[str, Any], stream: bool):
+        """Send the request, retrying transient failures; return (connection, response)."""
+        body = json.dumps(payload).encode("utf-8")
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}",
+            "Connection": "keep-alive",
+        }
+        if stream:
+            headers["Accept"] = "text/event-stream"
+
+        attempt = 0
+        while True:
+            conn = self._pool.acquire(self.timeout)
+            reused = conn.sock is not None
+            try:
+                conn.request("POST", self._path, body=body, headers=headers)
+                response = conn.getresponse()
+            except (ConnectionError, http.client.HTTPException, OSError) as e:
+                conn.close()
+                if reused:
+                    # The server closed an idle keep-alive connection; retry on a fresh one
+                    continue
+                if attempt >= self.max_retries:
+                    raise LLMError(f"Connection to LLM endpoint failed: {e}") from e
+                time.sleep(self._retry_delay(attempt))
+                attempt += 1
+                continue
+
+            if response.status < 400:
+                return conn, response
+
+            error_body = response.read().decode("utf-8", errors="replace")
+            if response.will_close:
+                conn.close()
+            else:
+                self._pool.release(conn)
+
+            if response.status in RETRYABLE_STATUS_CODES and attempt < self.max_retries:
+                time.sleep(self._retry_delay(attempt, response.getheader("Retry-After")))
+                attempt += 1
+                continue
+
+            raise LLMError(
+                f"LLM endpoint returned HTTP {response.status}: {error_body[:500]}",
+                status=response.status,
+            )
+
+    def complete(self, payload: Dict[str, Any]) -> LLMCompletion:
+        """
+        Run a non-streaming completion.
+
+        Args:
+            payload: Request body (model, messages, temperature, ...)
+
+        Returns:
+            LLMCompletion object
+        """
+        started = time.perf_counter()
+        conn, response = self._open(dict(payload, stream=False), stream=False)
+        try:
+            response_payload = json.loads(response.read().decode("utf-8"))
+        except Exception:
+            conn.close()
+            raise
+        if response.will_close:
+            conn.close()
+        else:
+            self._pool.release(conn)
+
+        elapsed = time.perf_counter() - started
+        return LLMCompletion(
+            text=extract_output_text(response_payload),
+            usage=response_payload.get("usage"),
+            elapsed=elapsed,
+            time_to_first_token=elapsed,
+        )
+
+    def stream(self, payload: Dict[str, Any]) -> LLMStream:
+        """
+        Start a streaming completion.
+
+        Args:
+            payload: Request body (model, messages, temperature, ...)
+
+        Returns:
+            LLMStream yielding text deltas as they arrive
+        """
+        return LLMStream(self, dict(payload, stream=True))
@@ -0,0 +1,427 @@
+import hashlib
+import json
+import os
+import string
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Callable
+
+
+class PipelineError(Exception):
+    """Raised for invalid pipeline definitions or failed stages"""
+
+
+@dataclass
+class PipelineStage:
+    """One stage of a pipeline definition"""
+    name: str
+    type: str
+    needs: List[str] = field(default_factory=list)
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class StageRun:
+    """Outcome of a stage in a pipeline run"""
+    name: str
+    status: str  # "ran", "cached", "failed" or "skipped"
+    seconds: float = 0.0
+    output_path: Optional[str] = None
+    error_message: Optional[str] = None
+
+
+# --- Stage implementations -------------------------------------------------
+#
+# Each takes (params, input paths from `needs`, stage output directory) and
+# returns the path of the single artifact it produced. Bump a stage's version
+# when its behaviour changes so previously cached outputs are invalidated.
+
+def _run_download(params: Dict[str, Any], inputs: List[str], out_dir: Path) -> str:
+    from video_downloader import VideoDownloader
+
+    if "url" not in params:
+        raise PipelineError("download stage requires a 'url' parameter")
+    result = VideoDownloader(output_dir=str(out_dir)).download_video(
+        params["url"],
+        start_time=params.get("start_time"),
+        end_time=params.get("end_time"),
+        extract_audio=params.get("extract_audio", True),
+    )
+    if not result.success:
+        raise PipelineError(f"Download failed: {result.error_message}")
+    return result.output_path
+
+
+def _run_trim(params: Dict[str, Any], inputs: List[str], out_dir: Path) -> str:
+    from audio_extractor import AudioExtractor
+
+    result = AudioExtractor(output_dir=str(out_dir)).trim_audio(
+        _single_input("trim", inputs),
+        start_time=params.get("start_time"),
+        end_time=params.get("end_time"),
+        output_format=params.get("output_format", "mp3"),
+    )
+    if not result.success:
+        raise PipelineError(f"Trim failed: {result.error_message}")
+    return result.output_path
+
+
+def _run_vad(params: Dict[str, Any], inputs: List[str], out_dir: Path) -> str:
+    from audio_extractor import AudioExtractor
+
+    result = AudioExtractor(output_dir=str(out_dir)).remove_silence(
+        _single_input("vad", inputs),
+        threshold_db=float(params.get("threshold_db", -40.0)),
+        min_silence=float(params.get("min_silence", 2.0)),
+        output_format=params.get("output_format", "mp3"),
+    )
+    if not result.success:
+        raise PipelineError(f"Silence removal failed: {result.error_message}")
+    return result.output_path
+
+
+def _run_transcribe(params: Dict[str, Any], inputs: List[str], out_dir: Path) -> str:
+    from transcriber import Transcriber
+
+    audio_path = _single_input("transcribe", inputs)
+    transcriber = Transcriber(
+        model_size=params.get("model_size", "default"),
+        output_dir=str(out_dir),
+        fast=params.get("fast", False),
+    )
+    result = transcriber.transcribe_audio(
+        audio_path,
+        timestamps=params.get("timestamps", False),
+        condition_on_previous_text=params.get("condition_on_previous_text", False),
+    )
+    if not result.success:
+        raise PipelineError(f"Transcription failed: {result.error_message}")
+    return result.output_path
+
+
+def _run_glossary(params: Dict[str, Any], inputs: List[str], out_dir: Path) -> str:
+    from glossary import load_glossary, compile_glossary, apply_glossary
+
+    input_path = Path(_single_input("glossary-correct", inputs))
+    rules = compile_glossary(load_glossary(params.get("glossary")))
+    text, replacements = apply_glossary(input_path.read_text(encoding="utf-8"), rules)
+    output_path = out_dir / f"{input_path.stem}_corrected.txt"
+    output_path.write_text(text, encoding="utf-8")
+    print(f"Glossary: {replacements} corrections applied")
+    return str(output_path)
+
+
+def _run_blog(params: Dict[str, Any], inputs: List[str], out_dir: Path) -> str:
+    from blog_generator import generate_blog_post, generate_blog_post_map_reduce
+    from llm_cache import ResponseCache
+
+    api_key_env = params.get("api_key_env", "OPENAI_API_KEY")
+    api_key = os.environ.get(api_key_env)
+    if not api_key:
+        raise PipelineError(f"blog stage needs an API key in ${api_key_env}")
+
+    transcript = Path(_single_input("blog", inputs)).read_text(encoding="utf-8")
+    kwargs = dict(
+        api_url=params.get("api_url", "https://api.openai.com/v1/chat/completions"),
+        api_key=api_key,
+        model=params.get("model", "gpt-4o-mini"),
+        system_prompt=params.get("system_prompt", "You are a helpful assistant that writes engaging blog posts."),
+        user_prompt=params.get("user_prompt", "Write a blog post summarizing the sermon."),
+        transcript=transcript,
+        temperature=float(params.get("temperature", 0.3)),
+        cache=ResponseCache(),
+    )
+    if params.get("map_reduce"):
+        text = generate_blog_post_map_reduce(
+            **kwargs,
+            max_section_chars=int(params.get("max_section_chars", 12000)),
+            concurrency=int(params.get("concurrency", 4)),
+        ).text
+    else:
+        text = generate_blog_post(**kwargs)
+
+    output_path = out_dir / "blog_post.md"
+    output_path.write_text(text, encoding="utf-8")
+    return str(output_path)
+
+
+def _single_input(stage_type: str, inputs: List[str]) -> str:
+    if len(inputs) != 1:
+        raise PipelineError(f"{stage_type} stage needs exactly one upstream stage, got {len(inputs)}")
+    return inputs[0]
+
+
+STAGE_TYPES: Dict[str, Callable[[Dict[str, Any], List[str], Path], str]] = {
+    "download": _run_download,
+    "trim": _run_trim,
+    "vad": _run_vad,
+    "transcribe": _run_transcribe,
+    "glossary-correct": _run_glossary,
+    "blog": _run_blog,
+}
+
+STAGE_VERSIONS = {
+    "download": 1,
+    "trim": 1,
+    "vad": 1,
+    "transcribe": 1,
+    "glossary-correct": 1,
+    "blog": 1,
+}
+
+
+# --- Pipeline -------------------------------------------------------------------
+
+class Pipeline:
+    """
+    A DAG of stages loaded from a YAML (or JSON) pipeline file.
+
+    Every stage writes one artifact under work_dir/<stage name>/. A stage's
+    fingerprint is a hash of its type, version, parameters and the contents of
+    its inputs; if it matches the fingerprint recorded for the existing output,
+    the stage is skipped. Stages whose dependencies are satisfied run in
+    parallel.
+    """
+
+    def __init__(self, stages: List[PipelineStage], work_dir: str, max_workers: int = 2):
+        self.stages = {stage.name: stage for stage in stages}
+        self.work_dir = Path(work_dir)
+        self.max_workers = max_workers
+        self._manifest_path = self.work_dir / ".pipeline" / "manifest.json"
+        self._manifest_lock = threading.Lock()
+        self._hash_cache: Dict[str, Any] = {}
+        self._validate()
+
+    @classmethod
+    def load(cls, path: str, variables: Optional[Dict[str, str]] = None) -> "Pipeline":
+        """
+        Load a pipeline file.
+
+        String values may reference variables as ${name}; they are taken from
+        the file's `vars:` section, overridden by `variables`.
+
+        Args:
+            path: Pipeline YAML/JSON file
+            variables: Variable overrides (e.g. from --set name=value)
+
+        Returns:
+            Pipeline object
+        """
+        pipeline_file = Path(path)
+        with open(pipeline_file, 'r', encoding='utf-8') as f:
+            if pipeline_file.suffix == ".json":
+                definition = json.load(f)
+            else:
+                import yaml
+                definition = yaml.safe_load(f)
+
+        if not isinstance(definition, dict) or "stages" not in definition:
+            raise PipelineError(f"{path}: pipeline must be a mapping with a 'stages' section")
+
+        values = {key: str(value) for key, value in (definition.get("vars") or {}).items()}
+        values.update(variables or {})
+
+        def substitute(value):
+            if isinstance(value, str):
+                try:
+                    return string.Template(value).substitute(values)
+                except KeyError as e:
+                    raise PipelineError(f"{path}: undefined variable {e}")
+            if isinstance(value, list):
+                return [substitute(item) for item in value]
+            if isinstance(value, dict):
+                return {key: substitute(item) for key, item in value.items()}
+            return value
+
+        raw_stages = definition["stages"]
+        if isinstance(raw_stages, dict):
+            raw_stages = [dict(spec or {}, name=name) for name, spec in raw_stages.items()]
+
+        stages = []
+        for spec in raw_stages:
+            name = spec.get("name")
+            if not name:
+                raise PipelineError(f"{path}: every stage needs a name")
+            needs = spec.get("needs") or []
+            stages.append(PipelineStage(
+                name=name,
+                type=spec.get("type", name),
+                needs=[needs] if isinstance(needs, str) else list(needs),
+                params=substitute(spec.get("params") or {}),
+            ))
+
+        work_dir = Path(substitute(definition.get("work_dir", "pipeline-output")))
+        if not work_dir.is_absolute():
+            work_dir = pipeline_file.parent / work_dir
+        return cls(stages, str(work_dir), max_workers=int(definition.get("max_workers", 2)))
+
+    def _validate(self):
+        for stage in self.stages.values():
+            if stage.type not in STAGE_TYPES:
+                raise PipelineError(
+                    f"Stage '{stage.name}' has unknown type '{stage.type}' "
+                    f"(expected one of: {', '.join(STAGE_TYPES)})"
+                )
+            for dependency in stage.needs:
+                if dependency not in self.stages:
+                    raise PipelineError(f"Stage '{stage.name}' needs unknown stage '{dependency}'")
+        self.order()  # raises on cycles
+
+    def order(self) -> List[str]:
+        """Return stage names in a valid execution order."""
+        ordered: List[str] = []
+        state: Dict[str, str] = {}
+
+        def visit(name: str):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise PipelineError(f"Pipeline has a dependency cycle through '{name}'")
+            state[name] = "visiting"
+            for dependency in self.stages[name].needs:
+                visit(dependency)
+            state[name] = "done"
+            ordered.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return ordered
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self._manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _update_manifest(self, name: str, entry: Dict[str, Any]):
+        with self._manifest_lock:
+            manifest = self._read_manifest()
+            manifest[name] = entry
+            self._manifest_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._manifest_path.with_suffix(".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(tmp_path, self._manifest_path)
+
+    def _file_hash(self, path: str) -> str:
+        """Content hash of a file, memoised on (size, mtime) so unchanged files aren't re-read."""
+        stat = os.stat(path)
+        signature = (stat.st_size, stat.st_mtime_ns)
+        cached = self._hash_cache.get(path)
+        if cached and cached[0] == signature:
+            return cached[1]
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        self._hash_cache[path] = (signature, digest.hexdigest())
+        return digest.hexdigest()
+
+    def _fingerprint(self, stage: PipelineStage, inputs: List[str]) -> str:
+        material = json.dumps({
+            "type": stage.type,
+            "version": STAGE_VERSIONS[stage.type],
+            "params": stage.params,
+            "inputs": [self._file_hash(path) for path in inputs],
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _is_current(self, name: str, fingerprint: str) -> Optional[str]:
+        entry = self._read_manifest().get(name)
+        if not entry or entry.get("fingerprint") != fingerprint:
+            return None
+        output_path = entry.get("output_path")
+        if not output_path or not os.path.exists(output_path):
+            return None
+        if entry.get("output_hash") != self._file_hash(output_path):
+            return None
+        return output_path
+
+    def _run_stage(self, stage: PipelineStage, inputs: List[str], force: bool) -> StageRun:
+        started = time.perf_counter()
+        try:
+            fingerprint = self._fingerprint(stage, inputs)
+            if not force:
+                output_path = self._is_current(stage.name, fingerprint)
+                if output_path:
+                    return StageRun(stage.name, "cached", time.perf_counter() - started, output_path)
+
+            out_dir = self.work_dir / stage.name
+            out_dir.mkdir(parents=True, exist_ok=True)
+            output_path = STAGE_TYPES[stage.type](stage.params, inputs, out_dir)
+            self._update_manifest(stage.name, {
+                "fingerprint": fingerprint,
+                "output_path": output_path,
+                "output_hash": self._file_hash(output_path),
+                "completed": time.time(),
+            })
+            return StageRun(stage.name, "ran", time.perf_counter() - started, output_path)
+        except Exception as e:
+            return StageRun(stage.name, "failed", time.perf_counter() - started, error_message=str(e))
+
+    def run(self, force: bool = False, only: Optional[List[str]] = None) -> List[StageRun]:
+        """
+        Run the pipeline.
+
+        Args:
+            force: Re-run every stage even if its output is up to date
+            only: Restrict the run to these stages (and what they depend on)
+
+        Returns:
+            List of StageRun objects in execution order
+        """
+        wanted = set(self.order())
+        if only:
+            wanted = set()
+            pending = list(only)
+            while pending:
+                name = pending.pop()
+                if name not in self.stages:
+                    raise PipelineError(f"Unknown stage '{name}'")
+                if name not in wanted:
+                    wanted.add(name)
+                    pending.extend(self.stages[name].needs)
+
+        results: Dict[str, StageRun] = {}
+        running = {}
+        with ThreadPoolExecutor(max_workers=max(1, self.max_workers)) as pool:
+            while len(results) < len(wanted):
+                for name in self.order():
+                    if name not in wanted or name in results or name in running.values():
+                        continue
+                    stage = self.stages[name]
+                    upstream = [results.get(dependency) for dependency in stage.needs]
+                    if any(run is None for run in upstream):
+                        continue
+                    if any(run.status in ("failed", "skipped") for run in upstream):
+                        results[name] = StageRun(name, "skipped", error_message="upstream stage failed")
+                        continue
+                    inputs = [run.output_path for run in upstream]
+                    print(f"[pipeline] starting {name} ({stage.type})")
+                    running[pool.submit(self._run_stage, stage, inputs, force)] = name
+
+                if not running:
+                    continue
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    run = future.result()
+                    results[running.pop(future)] = run
+                    detail = run.output_path if run.status != "failed" else run.error_message
+                    print(f"[pipeline] {run.name}: {run.status} in {run.seconds:.1f}s - {detail}")
+
+        return [results[name] for name in self.order() if name in results]
+
+
+def format_summary(runs: List[StageRun]) -> str:
+    """Render a per-stage timing table."""
+    lines = [f"{'Stage':<20} {'Status':<8} {'Seconds':>9}  Output"]
+    for run in runs:
+        detail = run.output_path or run.error_message or ""
+        lines.append(f"{run.name:<20} {run.status:<8} {run.seconds:>9.1f}  {detail}")
+    total = sum(run.seconds for run in runs)
+    lines.append(f"{'total (stage time)':<20} {'':<8} {total:>9.1f}")
+    return "\n".join(lines)
@@ -0,0 +1,203 @@
+import collections
+import importlib.util
+import sys
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Dict, List
+
+
+@dataclass
+class ProfileReport:
+    """Files written by a profiled run"""
+    summary: str
+    summary_path: str
+    folded_path: str
+    torch_trace_path: Optional[str] = None
+
+
+class SamplingProfiler:
+    """
+    Low-overhead wall-clock sampling profiler built on sys._current_frames().
+
+    A background thread snapshots the stacks of the profiled threads every
+    interval seconds. Threads blocked in C code (Whisper inference in torch,
+    waiting on ffmpeg) show up at the Python call that is blocked, so the
+    profile shows where wall time goes rather than only Python CPU time.
+
+    Only the starting thread and threads created after start() are sampled,
+    so servers with many idle threads (Streamlit) don't drown the profile.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples: Dict[str, int] = collections.Counter()
+        self.sample_count = 0
+        self._ignored_threads = set()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        current = threading.get_ident()
+        self._ignored_threads = {ident for ident in sys._current_frames() if ident != current}
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stopping.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or ident in self._ignored_threads:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{Path(code.co_filename).stem}:{code.co_name}:{frame.f_lineno}")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.samples[";".join(reversed(stack))] += 1
+            self.sample_count += 1
+
+    def write_folded(self, path: str) -> str:
+        """Write stacks in folded format for flamegraph.pl, speedscope or inferno."""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(self.samples.items()):
+                f.write(f"{stack} {count}\n")
+        return path
+
+    def hotspots(self, top_n: int = 20) -> List[str]:
+        """Functions by self and total sampled time."""
+        total = sum(self.samples.values()) or 1
+        self_counts: Dict[str, int] = collections.Counter()
+        total_counts: Dict[str, int] = collections.Counter()
+        for stack, count in self.samples.items():
+            frames = [frame.rsplit(":", 1)[0] for frame in stack.split(";")[1:]]
+            if frames:
+                self_counts[frames[-1]] += count
+            for function in set(frames):
+                total_counts[function] += count
+        lines = [f"{'self %':>7} {'total %':>8}  function"]
+        for function, count in self_counts.most_common(top_n):
+            lines.append(f"{100 * count / total:6.1f}% {100 * total_counts[function] / total:7.1f}%  {function}")
+        return lines
+
+
+class Profiler:
+    """
+    Deep-profile a download or transcription run.
+
+    Combines the sampling profiler (flamegraph-ready folded stacks), the torch
+    profiler when torch is installed (operator-level view of Whisper
+    inference, exported as a Chrome trace), and tracemalloc for the largest
+    Python allocations. ffmpeg runs in a child process, so its time shows up
+    as the Python frame waiting on it.
+
+    Usage:
+        with Profiler() as profiler:
+            result = transcriber.transcribe_audio(path)
+        report = profiler.write(result.output_path)
+    """
+
+    def __init__(self,
+                 interval: float = 0.005,
+                 top_n: int = 20,
+                 torch_profile: bool = True,
+                 memory: bool = True):
+        self.top_n = top_n
+        self.sampler = SamplingProfiler(interval)
+        self.torch_profile = torch_profile and importlib.util.find_spec("torch") is not None
+        self.memory = memory
+        self._torch = None
+        self._snapshot = None
+        self._peak_traced = 0
+        self._wall = 0.0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        if self.memory:
+            tracemalloc.start(25)
+        if self.torch_profile:
+            import torch.profiler
+
+            activities = [torch.profiler.ProfilerActivity.CPU]
+            if torch.cuda.is_available():
+                activities.append(torch.profiler.ProfilerActivity.CUDA)
+            self._torch = torch.profiler.profile(activities=activities)
+            self._torch.__enter__()
+        self._started = time.perf_counter()
+        self.sampler.start()
+
+    def stop(self):
+        self.sampler.stop()
+        self._wall = time.perf_counter() - self._started
+        if self._torch is not None:
+            self._torch.__exit__(None, None, None)
+        if self.memory:
+            self._snapshot = tracemalloc.take_snapshot()
+            self._peak_traced = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    def write(self, output_hint: Optional[str] = None, output_dir: str = ".") -> ProfileReport:
+        """
+        Write profile files next to output_hint (e.g. the transcript path).
+
+        Files:
+            <stem>_profile.folded        folded stacks for flamegraph tools
+            <stem>_profile.txt           top-N hotspot and allocation summary
+            <stem>_torch_trace.json      torch profiler Chrome trace (if torch was profiled)
+        """
+        if output_hint:
+            base = Path(output_hint)
+            directory, stem = base.parent, base.stem
+        else:
+            directory, stem = Path(output_dir), f"run_{time.strftime('%Y%m%d_%H%M%S')}"
+        directory.mkdir(parents=True, exist_ok=True)
+
+        folded_path = self.sampler.write_folded(str(directory / f"{stem}_profile.folded"))
+        lines = [
+            f"Wall time: {self._wall:.2f}s, {self.sampler.sample_count} samples "
+            f"every {self.sampler.interval * 1000:.0f} ms",
+            "",
+            f"== Top {self.top_n} functions (sampled wall time) ==",
+            *self.sampler.hotspots(self.top_n),
+        ]
+
+        torch_trace_path = None
+        if self._torch is not None:
+            torch_trace_path = str(directory / f"{stem}_torch_trace.json")
+            self._torch.export_chrome_trace(torch_trace_path)
+            lines += [
+                "",
+                f"== Top {self.top_n} torch operators ==",
+                self._torch.key_averages().table(sort_by="self_cpu_time_total", row_limit=self.top_n),
+            ]
+
+        if self._snapshot is not None:
+            lines += ["", f"== Top {self.top_n} allocations still live (peak traced {self._peak_traced / 1e6:.1f} MB) =="]
+            for stat in self._snapshot.statistics("lineno")[:self.top_n]:
+                frame = stat.traceback[0]
+                lines.append(f"{stat.size / 1e6:8.2f} MB {stat.count:8d} blocks  {frame.filename}:{frame.lineno}")
+
+        summary = "\n".join(lines)
+        summary_path = directory / f"{stem}_profile.txt"
+        summary_path.write_text(summary + "\n", encoding="utf-8")
+        return ProfileReport(
+            summary=summary,
+            summary_path=str(summary_path),
+            folded_path=folded_path,
+            torch_trace_path=torch_trace_path,
+        )
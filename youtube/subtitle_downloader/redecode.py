@@ -0,0 +1,327 @@
+import re
+import tempfile
+import zlib
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+from instrumentation import Instrumentation, StageTiming, file_size
+from segment_store import SegmentStore, segments_path_for
+from transcriber import Transcriber, TranscriptionResult
+from transcript_search import TranscriptIndex
+
+
+# Whisper's own fallback thresholds; segments beyond them are what its
+# temperature fallback failed to fix
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+# This many identical segments in a row is a repetition loop
+MIN_REPEATS = 3
+# Seconds of context added either side of a suspect stretch, and the gap
+# below which neighbouring stretches are re-decoded together
+WINDOW_PADDING = 1.0
+MERGE_GAP = 5.0
+
+# Used for the re-decode: no carry-over from the bad text, earlier fallback,
+# and a quicker verdict of silence
+STRICT_DECODE_OPTIONS = {
+    "temperature": (0.0, 0.2, 0.4, 0.6, 0.8, 1.0),
+    "compression_ratio_threshold": 2.0,
+    "logprob_threshold": -0.8,
+    "no_speech_threshold": 0.4,
+}
+
+# A phrase of 3-40 characters repeated back to back at least three more times
+_LOOP = re.compile(r"(\b.{3,40}?)(?:\W+\1\b){3,}", re.IGNORECASE | re.DOTALL)
+_TIMESTAMPED = re.compile(r"^\[\d+:\d{2}:\d{2}\]")
+
+
+@dataclass
+class SuspectWindow:
+    """A stretch of audio whose segments look hallucinated"""
+    start: float
+    end: float
+    reasons: List[str]
+    segments: int
+
+
+def compression_ratio(text: str) -> float:
+    """gzip ratio as Whisper computes it; repetitive text compresses far better than speech."""
+    data = text.encode("utf-8")
+    return len(data) / len(zlib.compress(data)) if data else 0.0
+
+
+def _normalise(text: str) -> str:
+    return " ".join(re.sub(r"[^\w\s']", " ", text.lower()).split())
+
+
+def segment_reasons(store: SegmentStore) -> List[List[str]]:
+    """
+    Why each segment looks hallucinated (an empty list if it doesn't).
+
+    Signals are repetition loops (within a segment, or the same text in
+    MIN_REPEATS or more consecutive segments), a compression ratio spike, a
+    high no-speech probability on a segment that still produced text, and a
+    low average log probability.
+    """
+    reasons: List[List[str]] = [[] for _ in range(len(store))]
+    texts = [_normalise(segment.text) for segment in store]
+
+    run_start = 0
+    for index in range(1, len(store) + 1):
+        if index < len(store) and texts[index] and texts[index] == texts[run_start]:
+            continue
+        if texts[run_start] and index - run_start >= MIN_REPEATS:
+            for repeated in range(run_start, index):
+                reasons[repeated].append("repeated")
+        run_start = index
+
+    for index, segment in enumerate(store):
+        if not texts[index]:
+            continue
+        if _LOOP.search(texts[index]):
+            reasons[index].append("loop")
+        if compression_ratio(segment.text) > COMPRESSION_RATIO_THRESHOLD:
+            reasons[index].append("compression_ratio")
+        if segment.no_speech_prob is not None and segment.no_speech_prob > NO_SPEECH_THRESHOLD:
+            reasons[index].append("no_speech")
+        if segment.avg_logprob is not None and segment.avg_logprob < LOGPROB_THRESHOLD:
+            reasons[index].append("low_logprob")
+    return reasons
+
+
+def detect_suspect_windows(store: SegmentStore,
+                           padding: float = WINDOW_PADDING,
+                           merge_gap: float = MERGE_GAP,
+                           duration: Optional[float] = None) -> List[SuspectWindow]:
+    """
+    Group suspect segments into padded time windows to re-decode.
+
+    A lone low-confidence segment is not worth a re-decode, so low_logprob
+    only counts alongside another signal or next to another suspect segment.
+
+    Args:
+        store: Segments of a finished transcription
+        padding: Seconds of context added either side of each window
+        merge_gap: Windows closer than this are merged
+        duration: Audio length, to clamp the last window (defaults to the last segment's end)
+
+    Returns:
+        Windows in time order
+    """
+    reasons = segment_reasons(store)
+    flagged = []
+    for index, signals in enumerate(reasons):
+        if not signals:
+            continue
+        if signals == ["low_logprob"]:
+            neighbours = [reasons[i] for i in (index - 1, index + 1) if 0 <= i < len(reasons)]
+            if not any(neighbour for neighbour in neighbours):
+                continue
+        flagged.append(index)
+
+    end_limit = duration if duration is not None else store.duration
+    windows: List[SuspectWindow] = []
+    for index in flagged:
+        segment = store[index]
+        start = max(0.0, segment.start - padding)
+        end = min(end_limit, segment.end + padding)
+        if windows and start - windows[-1].end <= merge_gap:
+            window = windows[-1]
+            window.end = max(window.end, end)
+            window.reasons = sorted(set(window.reasons) | set(reasons[index]))
+            window.segments += 1
+        else:
+            windows.append(SuspectWindow(start=start, end=end, reasons=sorted(set(reasons[index])), segments=1))
+    return windows
+
+
+class Redecoder:
+    """
+    Re-decode only the hallucinated stretches of a finished transcription.
+
+    Whisper tends to loop or invent text over music and silence. Rather than
+    re-running the whole file with different settings, the suspect windows
+    found by detect_suspect_windows() are cut from the audio, transcribed
+    again with STRICT_DECODE_OPTIONS (optionally with a larger model), and
+    spliced back in place of the segments they cover. Segments the stricter
+    pass still flags as loops or non-speech are dropped.
+    """
+
+    def __init__(self,
+                 transcriber: Optional[Transcriber] = None,
+                 model_size: Optional[str] = None,
+                 decode_options: Optional[Dict[str, Any]] = None,
+                 padding: float = WINDOW_PADDING,
+                 merge_gap: float = MERGE_GAP):
+        """
+        Args:
+            transcriber: Transcriber for the windows (created on demand if None)
+            model_size: Model for the windows, e.g. "large" (overrides the transcriber's)
+            decode_options: Whisper options for the windows (defaults to STRICT_DECODE_OPTIONS)
+            padding: Seconds of context added either side of each window
+            merge_gap: Windows closer than this are merged
+        """
+        if transcriber is not None and model_size is not None:
+            transcriber = Transcriber(model_size=model_size, output_dir=str(transcriber.output_dir),
+                                      backend=transcriber.backend, fp16=transcriber.fp16, search_index=False)
+        self.transcriber = transcriber
+        self.model_size = model_size
+        self.decode_options = STRICT_DECODE_OPTIONS if decode_options is None else decode_options
+        self.padding = padding
+        self.merge_gap = merge_gap
+
+    def _redecode_windows(self,
+                          audio_path: str,
+                          windows: List[SuspectWindow],
+                          instrumentation: Instrumentation) -> List[Dict[str, Any]]:
+        """Transcribe each window, with segment times in the original audio's time."""
+        from audio_extractor import AudioExtractor
+
+        segments = []
+        with tempfile.TemporaryDirectory(prefix="redecode_") as scratch:
+            if self.transcriber is None:
+                self.transcriber = Transcriber(model_size=self.model_size or "default", output_dir=scratch,
+                                               search_index=False)
+            extractor = AudioExtractor(output_dir=scratch)
+            # The window transcripts are scratch files; keep them out of the search index
+            search_index, self.transcriber.search_index = self.transcriber.search_index, False
+            try:
+                for number, window in enumerate(windows):
+                    with instrumentation.stage("trim", window=number) as span:
+                        trimmed = extractor.trim_audio(audio_path, str(window.start), str(window.end),
+                                                       output_format="wav")
+                        if not trimmed.success:
+                            raise RuntimeError(trimmed.error_message)
+                        span.bytes = file_size(trimmed.output_path)
+                    result = self.transcriber.transcribe_audio(
+                        trimmed.output_path,
+                        output_path=str(Path(scratch) / f"window_{number}_transcript.txt"),
+                        decode_options=self.decode_options,
+                    )
+                    if not result.success:
+                        raise RuntimeError(f"Re-decoding {window.start:.0f}-{window.end:.0f}s failed: "
+                                           f"{result.error_message}")
+                    for timing in result.metadata.get("timings", []):
+                        instrumentation.add(StageTiming(**timing))
+                    if not result.metadata.get("segments_path"):
+                        continue
+                    redecoded = SegmentStore.load(result.metadata["segments_path"])
+                    for segment, reasons in zip(redecoded, segment_reasons(redecoded)):
+                        if {"loop", "repeated", "no_speech"} & set(reasons) or segment.start >= window.end - window.start:
+                            continue
+                        segments.append({
+                            **segment.to_dict(),
+                            "start": segment.start + window.start,
+                            "end": min(segment.end + window.start, window.end),
+                        })
+            finally:
+                self.transcriber.search_index = search_index
+        return segments
+
+    def redecode(self,
+                 audio_path: str,
+                 segments_path: str,
+                 transcript_path: Optional[str] = None,
+                 timestamps: Optional[bool] = None,
+                 dry_run: bool = False,
+                 force: bool = False) -> TranscriptionResult:
+        """
+        Find suspect windows in a saved transcription and re-decode just those.
+
+        Args:
+            audio_path: The audio the segments were transcribed from
+            segments_path: The transcription's .segments file
+            transcript_path: Transcript to rewrite (defaults to the .txt next to the segments)
+            timestamps: Write [HH:MM:SS] timestamps (default: keep the transcript's current style)
+            dry_run: Only report the suspect windows
+            force: Rewrite the transcript even if it was edited after transcription
+                   (glossary-apply or by hand); those edits are lost
+
+        Returns:
+            TranscriptionResult; metadata lists the windows and how much audio was re-decoded
+        """
+        instrumentation = Instrumentation()
+        try:
+            store = SegmentStore.load(segments_path)
+            duration = store.duration
+            transcript_file = Path(transcript_path) if transcript_path else Path(segments_path).with_suffix(".txt")
+            with instrumentation.stage("detect"):
+                windows = detect_suspect_windows(store, self.padding, self.merge_gap)
+            redecoded_seconds = sum(window.end - window.start for window in windows)
+            print(f"{len(windows)} suspect window(s), {redecoded_seconds:.0f}s of {duration:.0f}s")
+            for window in windows:
+                print(f"  {window.start:8.1f}-{window.end:8.1f}s  {', '.join(window.reasons)}")
+
+            if windows and not dry_run:
+                if not Path(audio_path).exists():
+                    raise FileNotFoundError(f"Audio file not found: {audio_path}")
+                # The transcript is rebuilt from the segments, so refuse to drop edits made to it since
+                if transcript_file.exists() and not force:
+                    existing = transcript_file.read_text(encoding="utf-8").strip()
+                    if existing not in (store.to_plain(), store.to_timestamped()):
+                        raise ValueError(f"{transcript_file} no longer matches its segments (edited after "
+                                         f"transcription?); re-decoding would overwrite those edits. "
+                                         f"Use --force to re-decode anyway")
+                replacements = self._redecode_windows(audio_path, windows, instrumentation)
+                # An old segment belongs to the window its midpoint falls in
+                kept = [segment.to_dict() for segment in store
+                        if not any(window.start <= (segment.start + segment.end) / 2 < window.end
+                                   for window in windows)]
+                store = SegmentStore.from_segments(sorted(kept + replacements, key=lambda segment: segment["start"]))
+
+            if timestamps is None:
+                existing = transcript_file.read_text(encoding="utf-8") if transcript_file.exists() else ""
+                timestamps = bool(_TIMESTAMPED.match(existing))
+            transcript_text = store.to_timestamped() if timestamps and len(store) else store.to_plain()
+
+            if windows and not dry_run:
+                with instrumentation.stage("file_write") as span:
+                    transcript_file.parent.mkdir(parents=True, exist_ok=True)
+                    transcript_file.write_text(transcript_text, encoding="utf-8")
+                    store.save(segments_path)
+                    span.bytes = (file_size(transcript_file) or 0) + (file_size(segments_path) or 0)
+                print(f"Transcript saved to: {transcript_file}")
+                try:
+                    with TranscriptIndex() as index:
+                        index.add_segments(str(transcript_file), [(s.start, s.text) for s in store],
+                                           video=index.video_id(str(transcript_file)))
+                except Exception as e:
+                    print(f"Warning: could not update search index: {e}")
+
+            return TranscriptionResult(
+                success=True,
+                transcript=transcript_text,
+                output_path=str(transcript_file),
+                metadata={
+                    "source": "redecode",
+                    "windows": [asdict(window) for window in windows],
+                    "redecoded_seconds": redecoded_seconds,
+                    "duration": duration,
+                    "decode_options": {key: list(value) if isinstance(value, tuple) else value
+                                       for key, value in self.decode_options.items()},
+                    "model": self.transcriber.model_size if self.transcriber else self.model_size,
+                    "segments_path": str(segments_path),
+                    "timings": instrumentation.to_metadata(),
+                }
+            )
+
+        except Exception as e:
+            return TranscriptionResult(
+                success=False,
+                error_message=str(e),
+                metadata={"timings": instrumentation.to_metadata()}
+            )
+
+
+def redecode_transcript(audio_path: str,
+                        transcript_path: str,
+                        transcriber: Optional[Transcriber] = None,
+                        model_size: Optional[str] = None,
+                        dry_run: bool = False,
+                        force: bool = False) -> TranscriptionResult:
+    """Re-decode the suspect windows of a transcript saved by Transcriber (uses its .segments file)."""
+    return Redecoder(transcriber=transcriber, model_size=model_size).redecode(
+        audio_path, str(segments_path_for(transcript_path)), transcript_path=transcript_path, dry_run=dry_run,
+        force=force)
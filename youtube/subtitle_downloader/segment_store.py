@@ -0,0 +1,263 @@
+import json
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterable, Iterator
+
+
+MAGIC = b"SEG1"
+# magic, flags, segment count, text buffer length
+HEADER = struct.Struct("<4sBIQ")
+HAS_AVG_LOGPROB = 1
+HAS_NO_SPEECH_PROB = 2
+
+FORMATS = ("txt", "timestamped", "srt", "vtt", "json")
+# Suffixes for renders saved next to a .segments file; never plain ".txt", which is the transcript itself
+FORMAT_SUFFIXES = {"txt": ".plain.txt", "timestamped": ".timestamped.txt", "srt": ".srt", "vtt": ".vtt", "json": ".json"}
+
+
+def _clock(seconds: float, separator: str) -> str:
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3_600_000)
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    secs, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{milliseconds:03d}"
+
+
+def format_timestamp(seconds: float) -> str:
+    """[HH:MM:SS] prefix used by timestamped transcripts."""
+    h = int(seconds // 3600)
+    m = int((seconds % 3600) // 60)
+    s = int(seconds % 60)
+    return f"[{h:02d}:{m:02d}:{s:02d}]"
+
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _read_array(typecode: str, data: memoryview, offset: int, count: int):
+    values = array(typecode)
+    end = offset + values.itemsize * count
+    values.frombytes(data[offset:end])
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values, end
+
+
+class Segment:
+    """Read-only view of one segment in a SegmentStore"""
+
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store: "SegmentStore", index: int):
+        self._store = store
+        self._index = index
+
+    @property
+    def start(self) -> float:
+        return self._store.starts[self._index]
+
+    @property
+    def end(self) -> float:
+        return self._store.ends[self._index]
+
+    @property
+    def text(self) -> str:
+        return self._store.text_at(self._index)
+
+    @property
+    def avg_logprob(self) -> Optional[float]:
+        values = self._store.avg_logprobs
+        return values[self._index] if values is not None else None
+
+    @property
+    def no_speech_prob(self) -> Optional[float]:
+        values = self._store.no_speech_probs
+        return values[self._index] if values is not None else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        segment = {"start": self.start, "end": self.end, "text": self.text}
+        # Stored as float32, so drop the digits that precision doesn't have
+        if self._store.avg_logprobs is not None:
+            segment["avg_logprob"] = round(self.avg_logprob, 4)
+        if self._store.no_speech_probs is not None:
+            segment["no_speech_prob"] = round(self.no_speech_prob, 4)
+        return segment
+
+    def __repr__(self):
+        return f"Segment({self.start:.2f}-{self.end:.2f}: {self.text.strip()!r})"
+
+
+class SegmentStore:
+    """
+    Whisper segments in compact, array-backed form.
+
+    Start/end times are float64 arrays and the segment texts live in one
+    UTF-8 buffer addressed by an offsets array, so an hour-long sermon takes
+    a few tens of kilobytes instead of a list of per-segment dicts. Plain,
+    timestamped, SRT, VTT and JSON outputs are rendered from it on demand,
+    so any of them can be produced later without transcribing again.
+
+    Usage:
+        store = SegmentStore.from_whisper(result)
+        store.save("sermon.segments")
+        srt = SegmentStore.load("sermon.segments").render("srt")
+    """
+
+    __slots__ = ("starts", "ends", "offsets", "text", "avg_logprobs", "no_speech_probs")
+
+    def __init__(self,
+                 starts: array,
+                 ends: array,
+                 offsets: array,
+                 text: bytes,
+                 avg_logprobs: Optional[array] = None,
+                 no_speech_probs: Optional[array] = None):
+        self.starts = starts
+        self.ends = ends
+        self.offsets = offsets  # len(starts) + 1 byte offsets into text
+        self.text = text
+        self.avg_logprobs = avg_logprobs
+        self.no_speech_probs = no_speech_probs
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[Dict[str, Any]]) -> "SegmentStore":
+        """
+        Build a store from Whisper-style segment dicts.
+
+        avg_logprob and no_speech_prob are kept only if every segment has them.
+        """
+        segments = list(segments)
+        starts, ends, offsets = array("d"), array("d"), array("I", [0])
+        buffer = bytearray()
+        for segment in segments:
+            starts.append(float(segment["start"]))
+            ends.append(float(segment["end"]))
+            buffer += segment["text"].encode("utf-8")
+            offsets.append(len(buffer))
+
+        def optional(key):
+            if segments and all(segment.get(key) is not None for segment in segments):
+                return array("f", (float(segment[key]) for segment in segments))
+            return None
+
+        return cls(starts, ends, offsets, bytes(buffer), optional("avg_logprob"), optional("no_speech_prob"))
+
+    @classmethod
+    def from_whisper(cls, result: Dict[str, Any]) -> "SegmentStore":
+        """Build a store from a whisper/mlx_whisper transcribe() result."""
+        return cls.from_segments(result.get("segments") or [])
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, index: int) -> Segment:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("segment index out of range")
+        return Segment(self, index)
+
+    def __iter__(self) -> Iterator[Segment]:
+        return (Segment(self, index) for index in range(len(self)))
+
+    def text_at(self, index: int) -> str:
+        return self.text[self.offsets[index]:self.offsets[index + 1]].decode("utf-8")
+
+    @property
+    def duration(self) -> float:
+        return self.ends[-1] if len(self) else 0.0
+
+    def save(self, path: str) -> str:
+        """Write the store to a binary .segments file and return its path."""
+        flags = (HAS_AVG_LOGPROB if self.avg_logprobs is not None else 0) | \
+                (HAS_NO_SPEECH_PROB if self.no_speech_probs is not None else 0)
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, flags, len(self), len(self.text)))
+            for values in (self.starts, self.ends, self.offsets, self.avg_logprobs, self.no_speech_probs):
+                if values is not None:
+                    f.write(_little_endian(values))
+            f.write(self.text)
+        return str(path)
+
+    @classmethod
+    def load(cls, path: str) -> "SegmentStore":
+        """
+        Read a .segments file written by save().
+
+        Raises:
+            ValueError: If the file is not a segment store
+        """
+        data = memoryview(Path(path).read_bytes())
+        if len(data) < HEADER.size:
+            raise ValueError(f"Not a segment store: {path}")
+        magic, flags, count, text_length = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f"Not a segment store: {path}")
+        offset = HEADER.size
+        starts, offset = _read_array("d", data, offset, count)
+        ends, offset = _read_array("d", data, offset, count)
+        offsets, offset = _read_array("I", data, offset, count + 1)
+        avg_logprobs = no_speech_probs = None
+        if flags & HAS_AVG_LOGPROB:
+            avg_logprobs, offset = _read_array("f", data, offset, count)
+        if flags & HAS_NO_SPEECH_PROB:
+            no_speech_probs, offset = _read_array("f", data, offset, count)
+        text = bytes(data[offset:offset + text_length])
+        if len(text) != text_length:
+            raise ValueError(f"Truncated segment store: {path}")
+        return cls(starts, ends, offsets, text, avg_logprobs, no_speech_probs)
+
+    def to_plain(self) -> str:
+        """The transcript as Whisper's result["text"] gives it."""
+        return self.text.decode("utf-8").strip()
+
+    def to_timestamped(self) -> str:
+        return "\n".join(f"{format_timestamp(segment.start)} {segment.text.strip()}" for segment in self)
+
+    def to_srt(self) -> str:
+        blocks = [
+            f"{number}\n{_clock(segment.start, ',')} --> {_clock(segment.end, ',')}\n{segment.text.strip()}\n"
+            for number, segment in enumerate(self, 1)
+        ]
+        return "\n".join(blocks)
+
+    def to_vtt(self) -> str:
+        blocks = [
+            f"{_clock(segment.start, '.')} --> {_clock(segment.end, '.')}\n{segment.text.strip()}\n"
+            for segment in self
+        ]
+        return "\n".join(["WEBVTT\n"] + blocks)
+
+    def to_json(self) -> str:
+        return json.dumps({"text": self.to_plain(), "segments": [segment.to_dict() for segment in self]},
+                          ensure_ascii=False, indent=1)
+
+    def render(self, output_format: str) -> str:
+        """
+        Render the transcript in one of FORMATS.
+
+        Raises:
+            ValueError: For an unknown format
+        """
+        renderers = {
+            "txt": self.to_plain,
+            "timestamped": self.to_timestamped,
+            "srt": self.to_srt,
+            "vtt": self.to_vtt,
+            "json": self.to_json,
+        }
+        if output_format not in renderers:
+            raise ValueError(f"Unknown format '{output_format}', expected one of: {', '.join(FORMATS)}")
+        return renderers[output_format]()
+
+
+def segments_path_for(transcript_path: str) -> Path:
+    """Where the segment store for a transcript is kept: next to it, as <stem>.segments."""
+    path = Path(transcript_path)
+    return path.with_suffix(".segments")
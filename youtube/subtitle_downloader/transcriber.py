@@ -1,8 +1,15 @@
 import os
 import platform
+import subprocess
+import threading
+import time
 from pathlib import Path
 from dataclasses import dataclass
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator
+
+from instrumentation import Instrumentation, StageTiming, file_size
+from segment_store import SegmentStore, segments_path_for
+from transcript_search import TranscriptIndex, parse_transcript, video_id_from
 
 
 def _is_apple_silicon() -> bool:
@@ -15,6 +22,49 @@ def _get_backend() -> str:
     return "mlx" if _is_apple_silicon() else "openai"
 
 
+# Whisper works on 16 kHz mono audio
+SAMPLE_RATE = 16000
+# Windowed mode: seconds of audio decoded and transcribed at a time
+DEFAULT_WINDOW_SECONDS = 600.0
+# At most this much audio (the last, possibly cut-off segment) is carried into the next window
+MAX_CARRY_SECONDS = 30.0
+# Characters of transcript carried into the next window's prompt when conditioning on previous text
+CARRY_PROMPT_CHARS = 400
+# Segment fields kept from each window; Whisper's token lists would grow with the recording
+SEGMENT_KEYS = ("start", "end", "text", "avg_logprob", "no_speech_prob", "compression_ratio", "temperature")
+
+
+def pcm_windows(audio_path: str, window_seconds: float) -> Iterator[bytes]:
+    """
+    Decode audio with ffmpeg and yield it as 16 kHz mono s16le PCM, window_seconds at a time.
+
+    ffmpeg writes into a pipe that is read one window at a time, so only a
+    window is ever held in memory, however long the recording.
+
+    Raises:
+        RuntimeError: If ffmpeg fails to decode the file
+    """
+    cmd = ["ffmpeg", "-nostdin", "-loglevel", "error", "-threads", "0", "-i", audio_path,
+           "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(SAMPLE_RATE), "-"]
+    window_bytes = int(window_seconds * SAMPLE_RATE) * 2
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        while True:
+            chunk = process.stdout.read(window_bytes)
+            if not chunk:
+                break
+            yield chunk
+        error = process.stderr.read().decode("utf-8", "replace")
+        if process.wait() != 0:
+            raise RuntimeError(f"FFmpeg error: {error}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
+
+
 # Model mapping for each backend
 MLX_MODELS = {
     "default": "mlx-community/whisper-large-v3-turbo",
@@ -37,10 +87,60 @@ class TranscriptionResult:
     metadata: Optional[Dict[str, Any]] = None
 
 
+class ModelWarmUp:
+    """Handle for a Transcriber model load running on a background thread"""
+
+    def __init__(self, transcriber: "Transcriber"):
+        self.transcriber = transcriber
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.error: Optional[Exception] = None
+        self._thread = threading.Thread(target=self._run, name="model-warm-up", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            self.transcriber.warm_up()
+        except Exception as e:
+            # transcribe_audio() retries the load and reports the error
+            self.error = e
+        finally:
+            self.finished = time.perf_counter()
+
+    @property
+    def done(self) -> bool:
+        return self.finished is not None
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the warm-up finishes; returns False on timeout."""
+        self._thread.join(timeout)
+        return self.done
+
+    def seconds_saved(self, audio_ready: float) -> float:
+        """
+        Warm-up time that overlapped work finishing at audio_ready.
+
+        Args:
+            audio_ready: time.perf_counter() value when the audio became available
+
+        Returns:
+            Seconds of model loading taken off the critical path
+        """
+        end = self.finished if self.finished is not None else audio_ready
+        return max(0.0, min(end, audio_ready) - self.started)
+
+
 class Transcriber:
     """Transcribe audio files to text using Whisper (MLX on Apple Silicon, OpenAI elsewhere)"""
 
-    def __init__(self, model_size: str = "default", output_dir: str = ".", fast: bool = False):
+    def __init__(self,
+                 model_size: str = "default",
+                 output_dir: str = ".",
+                 fast: bool = False,
+                 backend: Optional[str] = None,
+                 fp16: Optional[bool] = None,
+                 search_index: bool = False,
+                 window_seconds: Optional[float] = None):
         """
         Initialize transcriber.
 
@@ -49,13 +149,30 @@ class Transcriber:
                         selection, or pass an explicit model name to override.
             output_dir: Directory to save transcript files.
             fast: If True, use the smaller/faster model variant.
+            backend: "mlx" or "openai" (default: mlx on Apple Silicon, else openai).
+            fp16: Force half (True) or full (False) precision decoding; None
+                  uses the backend's default.
+            search_index: Add saved transcripts' segments to the full-text
+                          search index (see transcript_search.py). Off by
+                          default so library callers don't write to the
+                          shared index; cli.py and the server turn it on.
+            window_seconds: Decode and transcribe the audio this many seconds at
+                            a time from an ffmpeg stream, so peak memory does not
+                            grow with the recording's length. None decodes the
+                            whole file up front.
         """
-        self.backend = _get_backend()
+        self.backend = backend or _get_backend()
         self.fast = fast
+        self.fp16 = fp16
+        self.search_index = search_index
+        self.window_seconds = window_seconds
         self.model_size = self._resolve_model(model_size)
         self.model = None  # Load lazily
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._executor = None  # Created on first async call
+        self._model_lock = threading.Lock()
+        self._load_timing: Optional[StageTiming] = None  # Reported with the next result
 
     def _resolve_model(self, model_size: str) -> str:
         """Resolve the model name based on backend and fast flag."""
@@ -74,35 +191,159 @@ class Transcriber:
             return OPENAI_MODELS[profile]
 
     def _load_model(self):
-        """Load Whisper model if not already loaded"""
+        """Load Whisper model if not already loaded (safe to call from several threads)"""
         if self.model is not None:
             return
 
-        print(f"Loading {self.backend}-whisper {self.model_size} model...")
+        with self._model_lock:
+            if self.model is not None:
+                return
+
+            print(f"Loading {self.backend}-whisper {self.model_size} model...")
+
+            recorder = Instrumentation()
+            with recorder.stage("model_load", model=self.model_size):
+                if self.backend == "mlx":
+                    # mlx-whisper exposes a module-level transcribe(); no model object to hold.
+                    # We just import it here to trigger the download/cache on first use.
+                    import mlx_whisper  # noqa: F401
+                    self.model = "mlx"  # sentinel — actual call goes through mlx_whisper.transcribe()
+                else:
+                    import whisper
+                    self.model = whisper.load_model(self.model_size)
+            self._load_timing = recorder.stages[0]
+
+    def warm_up(self):
+        """
+        Load the model so the first transcription starts decoding immediately.
 
+        For openai-whisper this loads the weights; for mlx-whisper it also
+        fetches the weights into mlx_whisper's model cache, which transcribe()
+        would otherwise do on its first call.
+        """
+        self._load_model()
         if self.backend == "mlx":
-            # mlx-whisper exposes a module-level transcribe(); no model object to hold.
-            # We just import it here to trigger the download/cache on first use.
-            import mlx_whisper  # noqa: F401
-            self.model = "mlx"  # sentinel — actual call goes through mlx_whisper.transcribe()
-        else:
-            import whisper
-            self.model = whisper.load_model(self.model_size)
+            try:
+                import mlx.core as mx
+                from mlx_whisper.transcribe import ModelHolder
+                ModelHolder.get_model(self.model_size, mx.float32 if self.fp16 is False else mx.float16)
+            except (ImportError, AttributeError):
+                pass  # Older mlx-whisper; the weights load on first transcribe()
+
+    def start_warm_up(self) -> "ModelWarmUp":
+        """Warm up the model on a background thread, e.g. while audio downloads."""
+        return ModelWarmUp(self)
+
+    def _run_model(self, audio, condition_on_previous_text: bool, decode_options: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the backend's transcribe() on decoded audio."""
+        if self.backend == "mlx":
+            import mlx_whisper
+            return mlx_whisper.transcribe(
+                audio,
+                path_or_hf_repo=self.model_size,
+                condition_on_previous_text=condition_on_previous_text,
+                **decode_options,
+            )
+        return self.model.transcribe(
+            audio,
+            condition_on_previous_text=condition_on_previous_text,
+            **decode_options,
+        )
+
+    def _transcribe_windowed(self,
+                             audio_path: str,
+                             instrumentation: Instrumentation,
+                             condition_on_previous_text: bool,
+                             decode_options: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Transcribe a stream of fixed-size windows and join them into one result.
+
+        The last segment of each window may be cut off at the window edge, so
+        its audio (at most MAX_CARRY_SECONDS) is carried into the next window
+        and transcribed again there. The language detected in the first window
+        is kept for the rest, and when conditioning on previous text the tail
+        of the transcript so far is the next window's prompt. What is carried
+        over has a fixed upper size, so memory stays flat however long the
+        recording is.
+        """
+        import numpy as np
+
+        decode_options = dict(decode_options)
+        prompt = decode_options.pop("initial_prompt", None)
+        segments = []
+        language = decode_options.get("language")
+        carry = np.zeros(0, dtype=np.float32)
+        offset = 0.0  # Recording time of carry[0]
+
+        windows = pcm_windows(audio_path, self.window_seconds)
+        with instrumentation.stage("decode", window=0) as span:
+            chunk = next(windows, None)
+            span.bytes = len(chunk) if chunk else 0
+        number = 0
+        while chunk is not None:
+            samples = np.frombuffer(chunk, dtype=np.int16).astype(np.float32)
+            samples /= 32768.0
+            audio = np.concatenate([carry, samples]) if len(carry) else samples
+            del samples
+            # Read ahead one window so the last one is transcribed to its end
+            with instrumentation.stage("decode", window=number + 1) as span:
+                chunk = next(windows, None)
+                span.bytes = len(chunk) if chunk else 0
+
+            options = dict(decode_options)
+            if prompt:
+                options["initial_prompt"] = prompt
+            if language:
+                options["language"] = language
+            with instrumentation.stage("inference", model=self.model_size, window=number) as span:
+                result = self._run_model(audio, condition_on_previous_text, options)
+                span.bytes = audio.nbytes
+            language = language or result.get("language")
+
+            window_segments = result.get("segments") or []
+            length = len(audio) / SAMPLE_RATE
+            carry_from = length
+            if chunk is not None and len(window_segments) > 1 \
+                    and length - window_segments[-1]["start"] <= MAX_CARRY_SECONDS:
+                carry_from = window_segments[-1]["start"]
+                window_segments = window_segments[:-1]
+            for segment in window_segments:
+                segment = {key: segment[key] for key in SEGMENT_KEYS if key in segment}
+                segment["start"] += offset
+                segment["end"] = min(segment["end"], carry_from) + offset
+                segments.append(segment)
+
+            carry = audio[int(carry_from * SAMPLE_RATE):].copy()
+            offset += carry_from
+            prompt = None
+            if condition_on_previous_text and segments:
+                prompt = "".join(segment["text"] for segment in segments[-20:])[-CARRY_PROMPT_CHARS:]
+            number += 1
+
+        return {"text": "".join(segment["text"] for segment in segments), "segments": segments, "language": language}
 
     @staticmethod
-    def _format_timestamp(seconds: float) -> str:
-        """Format seconds as [HH:MM:SS]"""
-        h = int(seconds) // 3600
-        m = (int(seconds) % 3600) // 60
-        s = int(seconds) % 60
-        return f"[{h:02d}:{m:02d}:{s:02d}]"
+    def _index_transcript(transcript_path: str, result: Dict[str, Any], transcript_text: str, video: Optional[str]):
+        """Add a saved transcript to the search index, keeping Whisper's segment times."""
+        if result.get("segments"):
+            segments = [(seg["start"], seg["text"]) for seg in result["segments"]]
+        else:
+            segments = parse_transcript(transcript_text)
+        try:
+            with TranscriptIndex() as index:
+                index.add_segments(transcript_path, segments, video=video)
+        except Exception as e:
+            # Search is a convenience; never fail a finished transcription over it
+            print(f"Warning: could not update search index: {e}")
 
     def transcribe_audio(self,
                          audio_path: str,
                          save_to_file: bool = True,
                          output_path: Optional[str] = None,
                          timestamps: bool = False,
-                         condition_on_previous_text: bool = False) -> TranscriptionResult:
+                         condition_on_previous_text: bool = False,
+                         video: Optional[str] = None,
+                         decode_options: Optional[Dict[str, Any]] = None) -> TranscriptionResult:
         """
         Transcribe audio file to text.
 
@@ -111,10 +352,14 @@ class Transcriber:
             save_to_file: Whether to save transcript to a text file
             output_path: Specific output file path (overrides auto-generated name)
             timestamps: If True, prefix each segment with [HH:MM:SS] timestamps
+            video: YouTube URL or video id of the audio, so search hits can link to it
+            decode_options: Extra whisper transcribe() options, e.g. temperature
+                            or no_speech_threshold
 
         Returns:
             TranscriptionResult object
         """
+        instrumentation = Instrumentation()
         try:
             if not os.path.exists(audio_path):
                 return TranscriptionResult(
@@ -123,31 +368,40 @@ class Transcriber:
                 )
 
             self._load_model()
+            # Report the model load (possibly done earlier by a warm-up) with the first result after it
+            load_timing, self._load_timing = self._load_timing, None
+            if load_timing is not None:
+                instrumentation.add(load_timing)
 
             print(f"Transcribing {audio_path} with {self.backend}-whisper ({self.model_size})...")
 
-            if self.backend == "mlx":
-                import mlx_whisper
-                result = mlx_whisper.transcribe(
-                    audio_path,
-                    path_or_hf_repo=self.model_size,
-                    condition_on_previous_text=condition_on_previous_text,
-                )
+            decode_options = {**({} if self.fp16 is None else {"fp16": self.fp16}), **(decode_options or {})}
+            if self.window_seconds:
+                result = self._transcribe_windowed(audio_path, instrumentation, condition_on_previous_text,
+                                                   decode_options)
             else:
-                result = self.model.transcribe(
-                    audio_path,
-                    condition_on_previous_text=condition_on_previous_text,
-                )
-
-            if timestamps and result.get("segments"):
-                transcript_text = "\n".join(
-                    f"{self._format_timestamp(seg['start'])} {seg['text'].strip()}"
-                    for seg in result["segments"]
-                )
+                # Decode with ffmpeg up front so decode and inference are timed separately
+                with instrumentation.stage("decode") as span:
+                    if self.backend == "mlx":
+                        from mlx_whisper.audio import load_audio
+                    else:
+                        from whisper.audio import load_audio
+                    audio = load_audio(audio_path)
+                    span.bytes = file_size(audio_path)
+
+                with instrumentation.stage("inference", model=self.model_size) as span:
+                    result = self._run_model(audio, condition_on_previous_text, decode_options)
+                    span.bytes = getattr(audio, "nbytes", None)
+
+            # Keep the segments so other formats can be rendered later without transcribing again
+            segments = SegmentStore.from_whisper(result)
+            if timestamps and len(segments):
+                transcript_text = segments.to_timestamped()
             else:
                 transcript_text = result["text"].strip()
 
             saved_path = None
+            segments_path = None
 
             if save_to_file:
                 if output_path:
@@ -157,12 +411,21 @@ class Transcriber:
                     audio_file = Path(audio_path)
                     transcript_file = self.output_dir / f"{audio_file.stem}_transcript.txt"
 
-                with open(transcript_file, 'w', encoding='utf-8') as f:
-                    f.write(transcript_text)
+                with instrumentation.stage("file_write") as span:
+                    with open(transcript_file, 'w', encoding='utf-8') as f:
+                        f.write(transcript_text)
+                    span.bytes = file_size(transcript_file)
+                    if len(segments):
+                        segments_path = segments.save(segments_path_for(transcript_file))
+                        span.bytes = (span.bytes or 0) + (file_size(segments_path) or 0)
 
                 saved_path = str(transcript_file)
                 print(f"Transcript saved to: {saved_path}")
 
+                if self.search_index:
+                    with instrumentation.stage("search_index"):
+                        self._index_transcript(saved_path, result, transcript_text, video)
+
             return TranscriptionResult(
                 success=True,
                 transcript=transcript_text,
@@ -172,11 +435,58 @@ class Transcriber:
                     "duration": result.get("segments", [{}])[-1].get("end", 0) if result.get("segments") else 0,
                     "backend": self.backend,
                     "model": self.model_size,
+                    "window_seconds": self.window_seconds,
+                    "video_id": video_id_from(video),
+                    "segments_path": segments_path,
+                    "timings": instrumentation.to_metadata(),
                 }
             )
 
         except Exception as e:
             return TranscriptionResult(
                 success=False,
-                error_message=str(e)
+                error_message=str(e),
+                metadata={"timings": instrumentation.to_metadata()}
             )
+
+    async def transcribe_audio_async(self,
+                                     audio_path: str,
+                                     save_to_file: bool = True,
+                                     output_path: Optional[str] = None,
+                                     timestamps: bool = False,
+                                     condition_on_previous_text: bool = False,
+                                     video: Optional[str] = None,
+                                     decode_options: Optional[Dict[str, Any]] = None,
+                                     timeout: Optional[float] = None) -> TranscriptionResult:
+        """
+        Async counterpart of transcribe_audio.
+
+        Jobs run one at a time on this transcriber's own worker thread, so the
+        model is never used concurrently and downloads on the shared I/O pool
+        are not starved. Cancelling the await (or hitting the timeout) returns
+        control immediately, but a Whisper decode already in progress cannot be
+        interrupted and finishes in the background.
+
+        Args:
+            timeout: Seconds before raising asyncio.TimeoutError
+
+        Returns:
+            TranscriptionResult object
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        from async_utils import run_blocking
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="transcriber")
+        return await run_blocking(
+            self.transcribe_audio,
+            audio_path,
+            save_to_file=save_to_file,
+            output_path=output_path,
+            timestamps=timestamps,
+            condition_on_previous_text=condition_on_previous_text,
+            video=video,
+            decode_options=decode_options,
+            executor=self._executor,
+            timeout=timeout,
+        )
@@ -0,0 +1,248 @@
+import os
+import re
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, List, Tuple, Iterable
+from urllib.parse import urlparse, parse_qs
+
+
+DEFAULT_INDEX_PATH = Path.home() / ".cache" / "subtitle_downloader" / "transcripts.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL UNIQUE,
+    video_id TEXT,
+    title TEXT,
+    mtime_ns INTEGER,
+    size INTEGER,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    transcript_id INTEGER NOT NULL,
+    start REAL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS segments_by_transcript ON segments (transcript_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS segments_fts USING fts5(
+    text, content='segments', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS segments_insert AFTER INSERT ON segments BEGIN
+    INSERT INTO segments_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS segments_delete AFTER DELETE ON segments BEGIN
+    INSERT INTO segments_fts (segments_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+_VIDEO_ID = re.compile(r"^[\w-]{11}$")
+_TIMESTAMPED_LINE = re.compile(r"^\[(\d+):(\d{2}):(\d{2})\]\s*(.*)$")
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+# Queries using any of these are passed to FTS5 as written
+_FTS_SYNTAX = re.compile(r'["*()^:]|\b(AND|OR|NOT|NEAR)\b')
+
+
+def default_index_path() -> Path:
+    env_dir = os.environ.get("SUBTITLE_DOWNLOADER_CACHE_DIR")
+    return Path(env_dir) / "transcripts.sqlite3" if env_dir else DEFAULT_INDEX_PATH
+
+
+def video_id_from(video: Optional[str]) -> Optional[str]:
+    """
+    Extract a YouTube video id from a watch, youtu.be, live or shorts URL, or a bare id.
+
+    Returns:
+        The 11-character video id, or None if there isn't one
+    """
+    if not video:
+        return None
+    if _VIDEO_ID.match(video):
+        return video
+    parsed = urlparse(video)
+    host = parsed.hostname or ""
+    if host.endswith("youtu.be"):
+        candidate = parsed.path.strip("/").split("/")[0]
+    elif "v" in parse_qs(parsed.query):
+        candidate = parse_qs(parsed.query)["v"][0]
+    else:
+        parts = parsed.path.strip("/").split("/")
+        candidate = parts[1] if len(parts) > 1 and parts[0] in ("live", "shorts", "embed") else ""
+    return candidate if _VIDEO_ID.match(candidate) else None
+
+
+def youtube_link(video_id: str, start: Optional[float] = None) -> str:
+    """Watch URL for a video, starting at `start` seconds if given."""
+    link = f"https://www.youtube.com/watch?v={video_id}"
+    return f"{link}&t={int(start)}s" if start is not None else link
+
+
+def parse_transcript(text: str) -> List[Tuple[Optional[float], str]]:
+    """
+    Split a saved transcript into (start seconds, text) segments.
+
+    Timestamped transcripts ([HH:MM:SS] lines) keep their start times; plain
+    ones are split into sentences without times.
+    """
+    segments = []
+    for line in text.splitlines():
+        match = _TIMESTAMPED_LINE.match(line.strip())
+        if match:
+            hours, minutes, seconds, content = match.groups()
+            if content:
+                segments.append((int(hours) * 3600 + int(minutes) * 60 + int(seconds), content))
+    if segments:
+        return segments
+    return [(None, sentence) for sentence in _SENTENCE_BREAK.split(text.strip()) if sentence]
+
+
+def _fts_query(query: str) -> str:
+    if _FTS_SYNTAX.search(query):
+        return query
+    # Quote plain words so punctuation such as "1 John" or "don't" can't break the query
+    return " ".join('"' + word.replace('"', '""') + '"' for word in query.split())
+
+
+@dataclass
+class SearchHit:
+    """A transcript segment matching a search"""
+    text: str
+    snippet: str
+    start: Optional[float]
+    path: str
+    video_id: Optional[str] = None
+    title: Optional[str] = None
+
+    @property
+    def link(self) -> Optional[str]:
+        return youtube_link(self.video_id, self.start) if self.video_id else None
+
+
+class TranscriptIndex:
+    """
+    SQLite FTS5 index of transcript segments with their start times.
+
+    Each transcript is stored by path; re-adding a path replaces its segments,
+    so the index is updated incrementally as transcripts are written. Words
+    are matched with the porter stemmer, so "redeem" also finds "redeemed".
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: Index database (defaults to $SUBTITLE_DOWNLOADER_CACHE_DIR/transcripts.sqlite3
+                  or ~/.cache/subtitle_downloader/transcripts.sqlite3)
+        """
+        self.path = Path(path) if path else default_index_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), timeout=60)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add_segments(self,
+                     transcript_path: str,
+                     segments: Iterable[Tuple[Optional[float], str]],
+                     video: Optional[str] = None,
+                     title: Optional[str] = None) -> int:
+        """
+        Index (or re-index) one transcript.
+
+        Args:
+            transcript_path: Saved transcript file; identifies the transcript in the index
+            segments: (start seconds or None, text) pairs
+            video: YouTube URL or video id the transcript belongs to
+            title: Display title (defaults to the file name)
+
+        Returns:
+            Number of segments indexed
+        """
+        path = Path(transcript_path).resolve()
+        stat = path.stat() if path.exists() else None
+        rows = [(start, text.strip()) for start, text in segments if text and text.strip()]
+        with self.conn:
+            self._remove(str(path))
+            transcript_id = self.conn.execute(
+                "INSERT INTO transcripts (path, video_id, title, mtime_ns, size, indexed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (str(path), video_id_from(video), title or path.stem.replace("_transcript", ""),
+                 stat.st_mtime_ns if stat else None, stat.st_size if stat else None, time.time()),
+            ).lastrowid
+            self.conn.executemany("INSERT INTO segments (transcript_id, start, text) VALUES (?, ?, ?)",
+                                  [(transcript_id, start, text) for start, text in rows])
+        return len(rows)
+
+    def add_file(self, transcript_path: str, video: Optional[str] = None) -> Optional[int]:
+        """
+        Index a saved transcript file, unless it is unchanged since it was last indexed.
+
+        A video given here replaces the one recorded before; otherwise the
+        previously recorded video is kept.
+
+        Returns:
+            Number of segments indexed, or None if the file was already up to date
+        """
+        path = Path(transcript_path).resolve()
+        stat = path.stat()
+        row = self.conn.execute("SELECT video_id, title, mtime_ns, size FROM transcripts WHERE path = ?",
+                                (str(path),)).fetchone()
+        if row and row[2] == stat.st_mtime_ns and row[3] == stat.st_size \
+                and (video is None or video_id_from(video) == row[0]):
+            return None
+        segments = parse_transcript(path.read_text(encoding="utf-8"))
+        return self.add_segments(str(path), segments, video=video or (row[0] if row else None),
+                                 title=row[1] if row else None)
+
+    def video_id(self, transcript_path: str) -> Optional[str]:
+        """Video id recorded for an indexed transcript, if any."""
+        row = self.conn.execute("SELECT video_id FROM transcripts WHERE path = ?",
+                                (str(Path(transcript_path).resolve()),)).fetchone()
+        return row[0] if row else None
+
+    def _remove(self, path: str):
+        row = self.conn.execute("SELECT id FROM transcripts WHERE path = ?", (path,)).fetchone()
+        if row:
+            self.conn.execute("DELETE FROM segments WHERE transcript_id = ?", (row[0],))
+            self.conn.execute("DELETE FROM transcripts WHERE id = ?", (row[0],))
+
+    def remove(self, transcript_path: str):
+        with self.conn:
+            self._remove(str(Path(transcript_path).resolve()))
+
+    def search(self, query: str, limit: int = 20) -> List[SearchHit]:
+        """
+        Find segments matching a query, best matches first.
+
+        Plain words must all appear in a segment; FTS5 syntax (quoted phrases,
+        OR, NOT, NEAR, prefix*) is used as written.
+
+        Raises:
+            ValueError: If the query is not valid FTS5 syntax
+        """
+        try:
+            rows = self.conn.execute(
+                """
+                SELECT s.text, snippet(segments_fts, 0, '[', ']', '...', 16), s.start,
+                       t.path, t.video_id, t.title
+                FROM segments_fts
+                JOIN segments s ON s.id = segments_fts.rowid
+                JOIN transcripts t ON t.id = s.transcript_id
+                WHERE segments_fts MATCH ?
+                ORDER BY rank
+                LIMIT ?
+                """,
+                (_fts_query(query), limit),
+            ).fetchall()
+        except sqlite3.OperationalError as e:
+            raise ValueError(f"Invalid search query '{query}': {e}")
+        return [SearchHit(text=text, snippet=snippet, start=start, path=path, video_id=video_id, title=title)
+                for text, snippet, start, path, video_id, title in rows]
@@ -0,0 +1,299 @@
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from typing import Optional, Dict, Any, Tuple
+
+from job_queue import JobQueue
+from transcriber import Transcriber, TranscriptionResult
+
+
+DEFAULT_SERVER_URL = "http://127.0.0.1:8765"
+
+
+def default_server_url() -> str:
+    return os.environ.get("SUBTITLE_DOWNLOADER_SERVER", DEFAULT_SERVER_URL)
+
+
+class TranscriptionServer:
+    """
+    Long-running transcription service that keeps Whisper models warm.
+
+    Jobs are accepted over HTTP into a persistent JobQueue and processed by a
+    fixed number of worker threads in priority order. Loaded models are kept
+    for the life of the process; each model is used by one job at a time.
+
+    Endpoints:
+        GET  /health       server status, loaded models and queue counts
+        POST /jobs         submit a transcription job, returns {"id": ...}
+        GET  /jobs         recent jobs (optional ?status=queued|running|done|failed)
+        GET  /jobs/<id>    status and result of one job
+    """
+
+    def __init__(self,
+                 host: str = "127.0.0.1",
+                 port: int = 8765,
+                 concurrency: int = 1,
+                 queue_path: Optional[str] = None):
+        self.host = host
+        self.port = port
+        self.concurrency = max(1, concurrency)
+        self.queue = JobQueue(queue_path)
+        self._models: Dict[str, Transcriber] = {}
+        self._model_locks: Dict[str, threading.Lock] = {}
+        self._models_lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._stopping = threading.Event()
+        self._workers = []
+        self._httpd: Optional[ThreadingHTTPServer] = None
+
+    def _get_transcriber(self, model_size: str, fast: bool) -> Tuple[Transcriber, threading.Lock]:
+        # Key by the resolved model name so "fast", --fast and explicit names share one warm model
+        # Jobs come from cli.py transcribe/workflow, which index their transcripts
+        candidate = Transcriber(model_size=model_size, fast=fast, search_index=True)
+        key = candidate.model_size
+        with self._models_lock:
+            if key not in self._models:
+                self._models[key] = candidate
+                self._model_locks[key] = threading.Lock()
+            return self._models[key], self._model_locks[key]
+
+    def preload(self, model_size: str = "default", fast: bool = False):
+        """Load a model before any job asks for it."""
+        transcriber, lock = self._get_transcriber(model_size, fast)
+        with lock:
+            transcriber._load_model()
+
+    def loaded_models(self):
+        with self._models_lock:
+            return [t.model_size for t in self._models.values() if t.model is not None]
+
+    def submit(self, payload: Dict[str, Any], priority: int = 0) -> int:
+        if not payload.get("audio_path"):
+            raise ValueError("audio_path is required")
+        job_id = self.queue.submit("transcribe", payload, priority)
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def _process(self, payload: Dict[str, Any]) -> TranscriptionResult:
+        transcriber, lock = self._get_transcriber(payload.get("model_size", "default"), payload.get("fast", False))
+        # The warm transcriber is shared, so resolve this job's output path explicitly
+        output_path = payload.get("output_path")
+        if not output_path:
+            output_dir = Path(payload.get("output_dir") or ".")
+            output_path = str(output_dir / f"{Path(payload['audio_path']).stem}_transcript.txt")
+        with lock:
+            return transcriber.transcribe_audio(
+                payload["audio_path"],
+                output_path=output_path,
+                timestamps=payload.get("timestamps", False),
+                condition_on_previous_text=payload.get("condition_on_previous_text", False),
+                video=payload.get("video"),
+            )
+
+    def _worker_loop(self):
+        while not self._stopping.is_set():
+            job = self.queue.claim(kinds=["transcribe"])
+            if job is None:
+                with self._wakeup:
+                    self._wakeup.wait(timeout=1.0)
+                continue
+            print(f"[server] job {job.id}: transcribing {job.payload.get('audio_path')}")
+            try:
+                result = self._process(job.payload)
+            except Exception as e:
+                self.queue.fail(job.id, str(e))
+                continue
+            if result.success:
+                self.queue.complete(job.id, {
+                    "transcript": result.transcript,
+                    "output_path": result.output_path,
+                    "metadata": result.metadata,
+                })
+                print(f"[server] job {job.id}: done -> {result.output_path}")
+            else:
+                self.queue.fail(job.id, result.error_message or "transcription failed")
+                print(f"[server] job {job.id}: failed - {result.error_message}")
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, payload):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                path, _, query = self.path.partition("?")
+                if path == "/health":
+                    self._send(200, {
+                        "status": "ok",
+                        "models": server.loaded_models(),
+                        "concurrency": server.concurrency,
+                        "jobs": server.queue.counts(),
+                    })
+                elif path == "/jobs":
+                    params = dict(part.split("=", 1) for part in query.split("&") if "=" in part)
+                    try:
+                        limit = int(params.get("limit", 50))
+                    except ValueError:
+                        limit = 0
+                    if limit <= 0:
+                        self._send(400, {"error": f"limit must be a positive integer, got {params.get('limit')!r}"})
+                        return
+                    jobs = server.queue.list(status=params.get("status"), limit=limit)
+                    self._send(200, [job.to_dict() for job in jobs])
+                elif path.startswith("/jobs/"):
+                    try:
+                        job = server.queue.get(int(path[len("/jobs/"):]))
+                    except ValueError:
+                        job = None
+                    if job is None:
+                        self._send(404, {"error": "job not found"})
+                    else:
+                        self._send(200, job.to_dict())
+                else:
+                    self._send(404, {"error": "not found"})
+
+            def do_POST(self):
+                if self.path != "/jobs":
+                    self._send(404, {"error": "not found"})
+                    return
+                try:
+                    payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                    priority = int(payload.pop("priority", 0))
+                    job_id = server.submit(payload, priority)
+                except (ValueError, TypeError) as e:
+                    self._send(400, {"error": str(e)})
+                    return
+                self._send(202, {"id": job_id})
+
+        return Handler
+
+    def serve_forever(self):
+        """Start workers and serve HTTP until interrupted."""
+        requeued = self.queue.requeue_running()
+        if requeued:
+            print(f"[server] re-queued {requeued} job(s) interrupted by a previous run")
+        for _ in range(self.concurrency):
+            worker = threading.Thread(target=self._worker_loop, daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+        self._httpd = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        self._httpd.daemon_threads = True
+        print(f"[server] listening on http://{self.host}:{self.port} ({self.concurrency} worker(s), queue: {self.queue.path})")
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self.stop()
+
+    def stop(self):
+        self._stopping.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        if self._httpd:
+            self._httpd.server_close()
+
+
+class TranscriptionClient:
+    """Client for a running TranscriptionServer"""
+
+    def __init__(self, url: Optional[str] = None):
+        self.url = (url or default_server_url()).rstrip("/")
+
+    def _request(self, method: str, path: str, payload=None, timeout: float = 10):
+        data = json.dumps(payload).encode("utf-8") if payload is not None else None
+        request = urllib.request.Request(
+            self.url + path,
+            data=data,
+            headers={"Content-Type": "application/json"},
+            method=method,
+        )
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read().decode("utf-8"))
+
+    def is_available(self, timeout: float = 0.3) -> bool:
+        """True if a server is answering at self.url."""
+        try:
+            return self._request("GET", "/health", timeout=timeout).get("status") == "ok"
+        except (urllib.error.URLError, OSError, ValueError):
+            return False
+
+    def submit(self,
+               audio_path: str,
+               output_dir: str = ".",
+               output_path: Optional[str] = None,
+               model_size: str = "default",
+               fast: bool = False,
+               timestamps: bool = False,
+               condition_on_previous_text: bool = False,
+               video: Optional[str] = None,
+               priority: int = 0) -> int:
+        """Queue a transcription job and return its id. Paths are made absolute for the server."""
+        return self._request("POST", "/jobs", {
+            "audio_path": str(Path(audio_path).resolve()),
+            "output_dir": str(Path(output_dir).resolve()),
+            "output_path": str(Path(output_path).resolve()) if output_path else None,
+            "model_size": model_size,
+            "fast": fast,
+            "timestamps": timestamps,
+            "condition_on_previous_text": condition_on_previous_text,
+            "video": video,
+            "priority": priority,
+        })["id"]
+
+    def status(self, job_id: int) -> Dict[str, Any]:
+        return self._request("GET", f"/jobs/{job_id}")
+
+    def wait(self, job_id: int, poll_interval: float = 1.0, timeout: Optional[float] = None) -> TranscriptionResult:
+        """
+        Block until a job finishes.
+
+        Returns:
+            TranscriptionResult built from the job's result or error; a failed
+            result if the server stops answering (e.g. it was restarted mid-job)
+        """
+        deadline = time.monotonic() + timeout if timeout else None
+        while True:
+            try:
+                job = self.status(job_id)
+            except (urllib.error.URLError, OSError, ValueError) as e:
+                return TranscriptionResult(success=False,
+                                           error_message=f"Lost contact with transcription server at {self.url} "
+                                                         f"while waiting for job {job_id}: {e}")
+            if job["status"] == "done":
+                result = job["result"] or {}
+                return TranscriptionResult(
+                    success=True,
+                    transcript=result.get("transcript"),
+                    output_path=result.get("output_path"),
+                    metadata=result.get("metadata"),
+                )
+            if job["status"] == "failed":
+                return TranscriptionResult(success=False, error_message=job.get("error"))
+            if deadline and time.monotonic() > deadline:
+                return TranscriptionResult(success=False, error_message=f"Timed out waiting for job {job_id}")
+            time.sleep(poll_interval)
+
+    def transcribe(self, audio_path: str, **kwargs) -> TranscriptionResult:
+        """Submit a job and wait for its result."""
+        try:
+            job_id = self.submit(audio_path, **kwargs)
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            return TranscriptionResult(success=False,
+                                       error_message=f"Could not submit to transcription server at {self.url}: {e}")
+        print(f"Submitted job {job_id} to transcription server at {self.url}")
+        return self.wait(job_id)
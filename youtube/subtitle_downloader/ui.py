@@ -1,14 +1,11 @@
-import json
 import os
-from pathlib import Path
-import tempfile
 import time
-import urllib.error
-import urllib.request
 
 import streamlit as st
-from transcriber import Transcriber, TranscriptionResult
-from video_downloader import VideoDownloader, VideoDownloadResult
+from artifact_store import ArtifactStore, file_digest
+from blog_generator import LLMCallStats, generate_blog_post_map_reduce, stream_blog_post
+from llm_cache import ResponseCache
+from llm_client import LLMError
 
 # Configure Streamlit page
 st.set_page_config(
@@ -25,61 +22,129 @@ if 'transcript_result' not in st.session_state:
     st.session_state.transcript_result = None
 if 'audio_result' not in st.session_state:
     st.session_state.audio_result = None
-if 'output_dir' not in st.session_state:
-    st.session_state.output_dir = tempfile.mkdtemp(prefix="youtube_processing_")
 if 'blog_post_result' not in st.session_state:
     st.session_state.blog_post_result = None
+if 'blog_post_calls' not in st.session_state:
+    st.session_state.blog_post_calls = None
+if 'saved_uploads' not in st.session_state:
+    st.session_state.saved_uploads = {}
 
+FILE_BROWSER_PAGE_SIZE = 20
 
-def generate_blog_post(
-    api_url,
-    api_key,
-    model,
-    system_prompt,
-    user_prompt,
-    transcript,
-    temperature,
-):
-    messages = []
-    if system_prompt.strip():
-        messages.append({"role": "system", "content": system_prompt.strip()})
-
-    prompt_payload = user_prompt.strip()
-    if prompt_payload:
-        prompt_payload += "\n\n"
-    prompt_payload += f"Transcript:\n{transcript.strip()}"
-    messages.append({"role": "user", "content": prompt_payload})
-
-    payload = {
-        "model": model,
-        "messages": messages,
-        "temperature": temperature,
-    }
-    data = json.dumps(payload).encode("utf-8")
-    request = urllib.request.Request(
-        api_url,
-        data=data,
-        headers={
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {api_key}",
-        },
-        method="POST",
-    )
 
-    with urllib.request.urlopen(request, timeout=120) as response:
-        response_payload = json.loads(response.read().decode("utf-8"))
+@st.cache_resource
+def get_response_cache():
+    """Shared on-disk LLM response cache (one instance per server process)."""
+    return ResponseCache()
+
+
+@st.cache_resource
+def get_artifact_store():
+    """Shared artifact store (one instance per server process); abandoned scratch directories are cleared on start."""
+    store = ArtifactStore()
+    store.clean_scratch()
+    return store
+
+
+# Each session works in a scratch directory inside the store; finished files are moved into the store
+if 'output_dir' not in st.session_state:
+    st.session_state.output_dir = get_artifact_store().scratch_dir("session")
+
+
+def save_uploaded_audio(uploaded_file):
+    """
+    Persist an uploaded file in the artifact store, identified by its content hash.
+
+    The upload is hashed while it is written in fixed-size chunks, so the whole
+    file is never copied in memory. An upload with the same content as one
+    already stored (by any session) reuses the stored file.
+
+    Args:
+        uploaded_file: Streamlit UploadedFile (file-like object)
+
+    Returns:
+        Path to the stored file as a string
+    """
+    uploaded_file.seek(0)
+    artifact = get_artifact_store().put_stream(uploaded_file, kind="upload", name=uploaded_file.name)
+    return artifact.path
+
+
+def download_with_store(url, start_time, end_time, extract_audio, output_dir):
+    """
+    Download a video or its audio, reusing a copy any session has already stored.
+
+    Returns:
+        VideoDownloadResult whose output_path is inside the artifact store
+    """
+    from transcript_search import video_id_from
+    from video_downloader import VideoDownloader, VideoDownloadResult
+
+    store = get_artifact_store()
+    key = f"download:{video_id_from(url) or url}:{start_time or ''}:{end_time or ''}:{'mp3' if extract_audio else 'video'}"
+    artifact = store.get(key)
+    if artifact is not None:
+        return VideoDownloadResult(success=True, output_path=artifact.path,
+                                   metadata={**(artifact.metadata or {}), 'from_artifact_store': True})
 
-    if "choices" in response_payload and response_payload["choices"]:
-        choice = response_payload["choices"][0]
-        if "message" in choice and "content" in choice["message"]:
-            return choice["message"]["content"].strip()
-        if "text" in choice:
-            return choice["text"].strip()
+    downloader = VideoDownloader(output_dir=output_dir)
+    result = downloader.download_video(url, start_time=start_time, end_time=end_time, extract_audio=extract_audio)
+    if result.success:
+        artifact = store.put(result.output_path, kind="audio" if extract_audio else "download", key=key,
+                             metadata=result.metadata, move=True)
+        result.output_path = artifact.path
+    return result
 
-    if "output_text" in response_payload:
-        return response_payload["output_text"].strip()
 
-    raise ValueError("LLM response did not include any recognizable output text.")
+def transcribe_with_store(transcriber, audio_path, video=None):
+    """
+    Transcribe audio, reusing a stored transcript of the same audio and model.
+
+    New transcripts and their segments are moved into the artifact store and
+    added to the search index at their stored location.
+
+    Returns:
+        TranscriptionResult whose output_path is inside the artifact store
+    """
+    from transcriber import TranscriptionResult
+
+    store = get_artifact_store()
+    digest = file_digest(audio_path)
+    key = f"transcript:{digest}:{transcriber.model_size}"
+    artifact = store.get(key)
+    if artifact is not None:
+        with open(artifact.path, 'r', encoding='utf-8') as f:
+            transcript = f.read()
+        return TranscriptionResult(success=True, transcript=transcript, output_path=artifact.path,
+                                   metadata={**(artifact.metadata or {}), 'from_artifact_store': True})
+
+    result = transcriber.transcribe_audio(audio_path, video=video)
+    if result.success and result.output_path:
+        metadata = dict(result.metadata or {})
+        if metadata.get('segments_path'):
+            segments = store.put(metadata['segments_path'], kind="segments",
+                                 key=f"segments:{digest}:{transcriber.model_size}", move=True)
+            metadata['segments_path'] = segments.path
+        artifact = store.put(result.output_path, kind="transcript", key=key, metadata=metadata, move=True)
+        result.output_path = artifact.path
+        result.metadata = metadata
+        index_transcript(artifact.path, metadata.get('segments_path'), video)
+    return result
+
+
+def index_transcript(transcript_path, segments_path, video):
+    """Add a stored transcript to the search index, with segment times when available."""
+    from transcript_search import TranscriptIndex
+    try:
+        with TranscriptIndex() as index:
+            if segments_path:
+                from segment_store import SegmentStore
+                segments = SegmentStore.load(segments_path)
+                index.add_segments(transcript_path, [(segment.start, segment.text) for segment in segments], video=video)
+            else:
+                index.add_file(transcript_path, video=video)
+    except Exception as e:
+        st.warning(f"Could not update search index: {e}")
 
 
 def main():
@@ -90,13 +155,13 @@ def main():
     with st.sidebar:
         st.header("⚙️ Configuration")
         
-        # Output directory
-        output_dir = st.text_input(
-            "Output Directory", 
-            value=st.session_state.output_dir,
-            help="Directory where files will be saved"
+        # Files are kept in the shared artifact store; this session's work in progress is in output_dir
+        output_dir = st.session_state.output_dir
+        usage = get_artifact_store().usage()
+        st.caption(
+            f"📦 Shared artifact store: {usage.size_bytes / 1024 ** 3:.2f} of "
+            f"{usage.quota_bytes / 1024 ** 3:.0f} GB used, {usage.artifacts} files"
         )
-        st.session_state.output_dir = output_dir
         
         # Model selection
         model_size = st.selectbox(
@@ -106,6 +171,12 @@ def main():
             help="Larger models are more accurate but slower"
         )
         
+        profile_runs = st.checkbox(
+            "🔬 Profile runs",
+            value=False,
+            help="Profile transcriptions and workflows (sampling, torch and tracemalloc) and save the results next to the transcript"
+        )
+        
         # Clear session button
         if st.button("🗑️ Clear Session"):
             for key in ['download_result', 'transcript_result', 'audio_result', 'selected_audio_file']:
@@ -121,10 +192,10 @@ def main():
         download_tab(output_dir)
     
     with tab2:
-        transcription_tab(output_dir, model_size)
+        transcription_tab(output_dir, model_size, profile_runs)
     
     with tab3:
-        workflow_tab(output_dir, model_size)
+        workflow_tab(output_dir, model_size, profile_runs)
 
     with tab4:
         blog_post_tab(output_dir)
@@ -168,12 +239,12 @@ def download_tab(output_dir):
             return
         
         with st.spinner("Downloading video..."):
-            downloader = VideoDownloader(output_dir=output_dir)
-            result = downloader.download_video(
-                url, 
+            result = download_with_store(
+                url,
                 start_time=start_time if start_time else None,
                 end_time=end_time if end_time else None,
-                extract_audio=extract_audio
+                extract_audio=extract_audio,
+                output_dir=output_dir
             )
             
             if result.success:
@@ -193,7 +264,42 @@ def download_tab(output_dir):
                 st.error(f"❌ Download failed: {result.error_message}")
 
 
-def transcription_tab(output_dir, model_size):
+def start_profiler(enabled):
+    if not enabled:
+        return None
+    from profiler import Profiler
+    profiler = Profiler()
+    profiler.start()
+    return profiler
+
+
+def show_profile(profiler, output_hint, output_dir):
+    """Stop profiling, write the profile files, move them into the artifact store and show the summary."""
+    if profiler is None:
+        return
+    profiler.stop()
+    # Write into the session's scratch directory, not next to a stored object
+    hint = os.path.join(output_dir, os.path.basename(output_hint)) if output_hint else None
+    report = profiler.write(hint, output_dir=output_dir)
+    store = get_artifact_store()
+    report.summary_path = store.put(report.summary_path, kind="profile", move=True).path
+    report.folded_path = store.put(report.folded_path, kind="profile", move=True).path
+    if report.torch_trace_path:
+        report.torch_trace_path = store.put(report.torch_trace_path, kind="profile", move=True).path
+    with st.expander("🔬 Profile"):
+        st.caption(f"Saved `{report.summary_path}` and `{report.folded_path}`"
+                   + (f" and `{report.torch_trace_path}`" if report.torch_trace_path else ""))
+        st.code(report.summary, language="text")
+        with open(report.folded_path, 'r') as f:
+            st.download_button(
+                "💾 Download Flamegraph Stacks",
+                f.read(),
+                file_name=os.path.basename(report.folded_path),
+                mime="text/plain"
+            )
+
+
+def transcription_tab(output_dir, model_size, profile_runs=False):
     st.header("📝 Audio Transcription")
     
     # Initialize selected audio file in session state
@@ -216,10 +322,13 @@ def transcription_tab(output_dir, model_size):
         )
         
         if uploaded_audio:
-            temp_path = os.path.join(output_dir, uploaded_audio.name)
-            with open(temp_path, 'wb') as f:
-                f.write(uploaded_audio.getbuffer())
-            st.session_state.selected_audio_file = temp_path
+            # Reruns hand back the same upload; only hash/write it the first time
+            upload_key = uploaded_audio.file_id
+            saved_path = st.session_state.saved_uploads.get(upload_key)
+            if not saved_path or not os.path.exists(saved_path):
+                saved_path = save_uploaded_audio(uploaded_audio)
+                st.session_state.saved_uploads[upload_key] = saved_path
+            st.session_state.selected_audio_file = saved_path
     
     # Get the selected audio file
     audio_file = st.session_state.selected_audio_file
@@ -242,8 +351,11 @@ def transcription_tab(output_dir, model_size):
                 return
             
             with st.spinner(f"Transcribing with {model_size} model... This may take a while."):
-                transcriber = Transcriber(model_size=model_size, output_dir=output_dir)
-                result = transcriber.transcribe_audio(audio_file)
+                from transcriber import Transcriber
+                profiler = start_profiler(profile_runs)
+                transcriber = Transcriber(model_size=model_size, output_dir=output_dir, search_index=False)
+                result = transcribe_with_store(transcriber, audio_file)
+                show_profile(profiler, result.output_path, output_dir)
                 
                 if result.success:
                     st.session_state.transcript_result = result
@@ -274,7 +386,7 @@ def transcription_tab(output_dir, model_size):
                 else:
                     st.error(f"❌ Transcription failed: {result.error_message}")
 
-def workflow_tab(output_dir, model_size):
+def workflow_tab(output_dir, model_size, profile_runs=False):
     st.header("🔄 Complete Workflow")
     st.markdown("Process a YouTube video from start to finish: Download → Transcribe")
     
@@ -307,22 +419,31 @@ def workflow_tab(output_dir, model_size):
             st.error("Please enter a YouTube URL")
             return
         
+        from transcriber import Transcriber
+
         # Create progress tracking
         progress_bar = st.progress(0)
         status_text = st.empty()
         
+        profiler = start_profiler(profile_runs)
+        transcript_result = None
         try:
+            # Load the model in the background so it is ready when the audio is
+            transcriber = Transcriber(model_size=model_size, output_dir=output_dir, search_index=False)
+            warm_up = transcriber.start_warm_up()
+            
             # Step 1: Download
-            status_text.text("🔽 Downloading video and extracting audio...")
+            status_text.text("🔽 Downloading video and extracting audio (loading model in background)...")
             progress_bar.progress(25)
             
-            downloader = VideoDownloader(output_dir=output_dir)
-            download_result = downloader.download_video(
+            download_result = download_with_store(
                 workflow_url,
                 start_time=workflow_start if workflow_start else None,
                 end_time=workflow_end if workflow_end else None,
-                extract_audio=True
+                extract_audio=True,
+                output_dir=output_dir
             )
+            audio_ready = time.perf_counter()
             
             if not download_result.success:
                 st.error(f"❌ Download failed: {download_result.error_message}")
@@ -335,8 +456,7 @@ def workflow_tab(output_dir, model_size):
             status_text.text("🎙️ Transcribing audio... This may take a while.")
             progress_bar.progress(75)
             
-            transcriber = Transcriber(model_size=model_size, output_dir=output_dir)
-            transcript_result = transcriber.transcribe_audio(download_result.output_path)
+            transcript_result = transcribe_with_store(transcriber, download_result.output_path, video=workflow_url)
             
             if not transcript_result.success:
                 st.error(f"❌ Transcription failed: {transcript_result.error_message}")
@@ -348,6 +468,7 @@ def workflow_tab(output_dir, model_size):
             
             # Display results
             st.success("🎉 Workflow completed successfully!")
+            st.caption(f"⚡ Model warm-up overlapped with download, saving {warm_up.seconds_saved(audio_ready):.1f}s")
             
             col1, col2 = st.columns(2)
             
@@ -384,6 +505,7 @@ def workflow_tab(output_dir, model_size):
         finally:
             progress_bar.empty()
             status_text.empty()
+            show_profile(profiler, transcript_result.output_path if transcript_result else None, output_dir)
 
 
 def blog_post_tab(output_dir):
@@ -440,6 +562,49 @@ def blog_post_tab(output_dir):
             height=120,
             help="User instructions to shape the blog post output.",
         )
+        map_reduce = st.checkbox(
+            "Map-reduce long transcripts",
+            value=False,
+            help="Summarise transcript sections in parallel, then write the post from the section notes. "
+                 "Faster and cheaper for long sermons, and fits smaller context windows.",
+        )
+        col1, col2 = st.columns(2)
+        with col1:
+            max_section_chars = st.number_input(
+                "Section Size (characters)",
+                min_value=2000,
+                max_value=100000,
+                value=12000,
+                step=1000,
+                disabled=not map_reduce,
+            )
+        with col2:
+            concurrency = st.number_input(
+                "Parallel Section Calls",
+                min_value=1,
+                max_value=16,
+                value=4,
+                disabled=not map_reduce,
+            )
+
+    response_cache = get_response_cache()
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        bypass_cache = st.checkbox(
+            "Bypass cache",
+            value=False,
+            help="Always call the LLM, even if this exact request was answered before. "
+                 "The new response replaces the cached one.",
+        )
+        cache_stats = response_cache.stats()
+        st.caption(
+            f"Response cache: {cache_stats.entries} entries, {cache_stats.size_bytes / 1024:.0f} KB, "
+            f"hit rate {cache_stats.hit_rate:.0%} ({cache_stats.hits} hits / {cache_stats.misses} misses)"
+        )
+    with col2:
+        if st.button("🗑️ Clear Cache"):
+            response_cache.clear()
+            st.rerun()
 
     if st.button("✍️ Generate Blog Post", type="primary"):
         if not transcript.strip():
@@ -455,9 +620,31 @@ def blog_post_tab(output_dir):
             st.error("Please provide a model name.")
             return
 
-        with st.spinner("Generating blog post..."):
+        if map_reduce:
+            with st.spinner("Summarising transcript sections and generating blog post..."):
+                try:
+                    result = generate_blog_post_map_reduce(
+                        api_url=api_url.strip(),
+                        api_key=api_key.strip(),
+                        model=model.strip(),
+                        system_prompt=system_prompt,
+                        user_prompt=user_prompt,
+                        transcript=transcript,
+                        temperature=temperature,
+                        max_section_chars=int(max_section_chars),
+                        concurrency=int(concurrency),
+                        cache=response_cache,
+                        refresh=bypass_cache,
+                    )
+                    st.session_state.blog_post_result = result.text
+                    st.session_state.blog_post_calls = result.calls
+                    st.success(f"✅ Blog post generated from {len(result.calls)} LLM calls!")
+                except (LLMError, OSError, ValueError) as exc:
+                    st.error(f"❌ Blog post generation failed: {exc}")
+        else:
+            output_placeholder = st.empty()
             try:
-                blog_post = generate_blog_post(
+                stream = stream_blog_post(
                     api_url=api_url.strip(),
                     api_key=api_key.strip(),
                     model=model.strip(),
@@ -465,10 +652,31 @@ def blog_post_tab(output_dir):
                     user_prompt=user_prompt,
                     transcript=transcript,
                     temperature=temperature,
+                    cache=response_cache,
+                    refresh=bypass_cache,
                 )
-                st.session_state.blog_post_result = blog_post
-                st.success("✅ Blog post generated!")
-            except (urllib.error.URLError, ValueError) as exc:
+                partial = ""
+                with st.spinner("Generating blog post..."):
+                    for delta in stream:
+                        partial += delta
+                        output_placeholder.markdown(partial + "▌")
+                output_placeholder.empty()
+                completion = stream.completion
+                st.session_state.blog_post_result = completion.text
+                st.session_state.blog_post_calls = [
+                    LLMCallStats.from_completion("blog post", completion, cached=stream.from_cache)
+                ]
+                if stream.from_cache:
+                    st.success("✅ Blog post served from cache!")
+                elif completion.time_to_first_token is not None:
+                    st.success(
+                        f"✅ Blog post generated! First token after {completion.time_to_first_token:.1f}s, "
+                        f"done in {completion.elapsed:.1f}s."
+                    )
+                else:
+                    st.success("✅ Blog post generated!")
+            except (LLMError, OSError, ValueError) as exc:
+                output_placeholder.empty()
                 st.error(f"❌ Blog post generation failed: {exc}")
 
     if st.session_state.blog_post_result:
@@ -487,35 +695,62 @@ def blog_post_tab(output_dir):
             mime="text/markdown",
         )
 
+    if st.session_state.blog_post_calls:
+        with st.expander("⏱️ LLM Call Timings"):
+            st.table([
+                {
+                    "Call": call.name,
+                    "Seconds": f"{call.elapsed:.1f}",
+                    "Prompt Tokens": call.prompt_tokens if call.prompt_tokens is not None else "-",
+                    "Completion Tokens": call.completion_tokens if call.completion_tokens is not None else "-",
+                    "Cached": "yes" if call.cached else "no",
+                }
+                for call in st.session_state.blog_post_calls
+            ])
+
 
 # File browser section
-def show_output_files(output_dir):
-    st.subheader("📁 Output Files")
+def show_output_files():
+    """One page of the shared artifact catalogue, most recently used first (no directory scans)."""
+    st.subheader("📁 Stored Files")
+    store = get_artifact_store()
     
-    if os.path.exists(output_dir):
-        files = list(Path(output_dir).glob("*"))
-        if files:
-            for file_path in files:
-                col1, col2, col3 = st.columns([3, 2, 1])
-                
-                with col1:
-                    st.text(file_path.name)
-                
-                with col2:
-                    st.text(f"{file_path.stat().st_size / 1024:.1f} KB")
-                
-                with col3:
-                    if file_path.suffix.lower() in ['.mp3', '.wav', '.m4a']:
-                        if st.button("🎵", key=f"play_{file_path.name}"):
-                            st.audio(str(file_path))
-        else:
-            st.info("No files generated yet")
-    else:
-        st.warning("Output directory doesn't exist")
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        kind = st.selectbox("Kind", options=["all", "audio", "download", "upload", "transcript", "segments", "profile"],
+                            key="file_browser_kind")
+    total = store.count(kind=None if kind == "all" else kind)
+    pages = max(1, -(-total // FILE_BROWSER_PAGE_SIZE))
+    with col2:
+        page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, key="file_browser_page")
+    
+    artifacts = store.list(kind=None if kind == "all" else kind, page=page - 1, page_size=FILE_BROWSER_PAGE_SIZE)
+    if not artifacts:
+        st.info("No files stored yet")
+        return
+    
+    for artifact in artifacts:
+        col1, col2, col3, col4 = st.columns([4, 1, 1, 1])
+        
+        with col1:
+            st.text(artifact.name)
+        
+        with col2:
+            st.text(artifact.kind)
+        
+        with col3:
+            st.text(f"{artifact.size / 1024:.1f} KB")
+        
+        with col4:
+            if artifact.name.lower().endswith(('.mp3', '.wav', '.m4a')):
+                if st.button("🎵", key=f"play_{artifact.id}"):
+                    st.audio(artifact.path)
+            elif st.button("📄", key=f"path_{artifact.id}"):
+                st.code(artifact.path, language="text")
 
 # Add footer with file browser and console
 with st.expander("📁 File Browser"):
-    show_output_files(st.session_state.output_dir)
+    show_output_files()
 
 
 if __name__ == "__main__":
@@ -1,10 +1,12 @@
-import yt_dlp
 import os
 import re
+import threading
 from pathlib import Path
 from dataclasses import dataclass, field
 from typing import Optional, Dict, Any, List
 
+from instrumentation import Instrumentation, file_size
+
 
 @dataclass
 class VideoDownloadResult:
@@ -76,6 +78,8 @@ class VideoDownloader:
         if not channel_url.rstrip('/').endswith('/videos'):
             channel_url = channel_url.rstrip('/') + '/videos'
 
+        import yt_dlp
+
         ydl_opts = {
             'extract_flat': True,
             'playlistend': max_results,
@@ -109,7 +113,8 @@ class VideoDownloader:
                       video_url: str, 
                       start_time: Optional[str] = None,
                       end_time: Optional[str] = None,
-                      extract_audio: bool = True) -> VideoDownloadResult:
+                      extract_audio: bool = True,
+                      cancel_event: Optional[threading.Event] = None) -> VideoDownloadResult:
         """
         Download video from YouTube URL
         
@@ -118,11 +123,15 @@ class VideoDownloader:
             start_time: Start timestamp in format 'HH:MM:SS' or seconds
             end_time: End timestamp in format 'HH:MM:SS' or seconds
             extract_audio: Whether to extract audio to MP3
+            cancel_event: If set while downloading, the download is aborted
         
         Returns:
             VideoDownloadResult object
         """
+        instrumentation = Instrumentation()
         try:
+            import yt_dlp
+
             ydl_opts = {
                 'format': 'bestaudio/best' if extract_audio else 'best',
                 'outtmpl': str(self.output_dir / '%(title)s.%(ext)s'),
@@ -152,6 +161,27 @@ class VideoDownloader:
                     postprocessor_args['ffmpeg'] = ffmpeg_args
                     ydl_opts['postprocessor_args'] = postprocessor_args
             
+            # yt-dlp downloads and then post-processes inside one download() call;
+            # its hooks mark the boundary between the two stages
+            spans = {}
+            downloaded_bytes = []
+            
+            def on_progress(progress):
+                if cancel_event is not None and cancel_event.is_set():
+                    raise yt_dlp.utils.DownloadCancelled("Download cancelled")
+                if progress.get('status') == 'finished':
+                    downloaded_bytes.append(progress.get('total_bytes') or progress.get('downloaded_bytes') or 0)
+            
+            def on_postprocess(progress):
+                if progress.get('status') == 'started' and 'post-process' not in spans:
+                    download_span = spans.pop('download', None)
+                    if download_span is not None:
+                        download_span.finish(bytes=sum(downloaded_bytes))
+                    spans['post-process'] = instrumentation.start('post-process')
+            
+            ydl_opts['progress_hooks'] = [on_progress]
+            ydl_opts['postprocessor_hooks'] = [on_postprocess]
+            
             # Add audio extraction if requested
             if extract_audio:
                 ydl_opts['postprocessors'] = [{
@@ -162,7 +192,8 @@ class VideoDownloader:
             
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
                 # Get video info first
-                info = ydl.extract_info(video_url, download=False)
+                with instrumentation.stage('extract_info'):
+                    info = ydl.extract_info(video_url, download=False)
                 original_title = info.get('title', 'unknown')
                 sanitized_title = self.sanitize_filename(original_title)
                 
@@ -172,7 +203,15 @@ class VideoDownloader:
                 # Re-create YoutubeDL with updated options
                 with yt_dlp.YoutubeDL(ydl_opts) as ydl_final:
                     # Download the video/audio
-                    ydl_final.download([video_url])
+                    spans['download'] = instrumentation.start('download')
+                    try:
+                        ydl_final.download([video_url])
+                    finally:
+                        if 'download' in spans:
+                            spans.pop('download').finish(bytes=sum(downloaded_bytes))
+                        post_process = spans.pop('post-process', None)
+                        if post_process is not None:
+                            post_process = post_process.finish()
                 
                 # Determine expected output file path
                 if extract_audio:
@@ -199,6 +238,9 @@ class VideoDownloader:
                         else:
                             raise FileNotFoundError(f"Downloaded file not found. Expected: {expected_path}")
                 
+                if post_process is not None:
+                    post_process.bytes = file_size(output_path)
+                
                 return VideoDownloadResult(
                     success=True,
                     output_path=output_path,
@@ -210,11 +252,46 @@ class VideoDownloader:
                         'upload_date': info.get('upload_date'),
                         'release_timestamp': info.get('release_timestamp'),
                         'was_live': info.get('was_live'),
+                        'timings': instrumentation.to_metadata(),
                     }
                 )
                 
         except Exception as e:
             return VideoDownloadResult(
                 success=False,
-                error_message=str(e)
+                error_message=str(e),
+                metadata={'timings': instrumentation.to_metadata()}
             )
+
+    async def download_video_async(self,
+                                   video_url: str,
+                                   start_time: Optional[str] = None,
+                                   end_time: Optional[str] = None,
+                                   extract_audio: bool = True,
+                                   timeout: Optional[float] = None) -> VideoDownloadResult:
+        """
+        Async counterpart of download_video.
+
+        Runs the download on the shared I/O executor, so many downloads can
+        proceed concurrently on one event loop. Cancelling the await (or
+        hitting the timeout) aborts the transfer at the next progress update.
+
+        Args:
+            timeout: Seconds before raising asyncio.TimeoutError
+
+        Returns:
+            VideoDownloadResult object
+        """
+        from async_utils import run_blocking
+
+        cancel_event = threading.Event()
+        return await run_blocking(
+            self.download_video,
+            video_url,
+            start_time=start_time,
+            end_time=end_time,
+            extract_audio=extract_audio,
+            cancel_event=cancel_event,
+            timeout=timeout,
+            on_cancel=cancel_event.set,
+        )
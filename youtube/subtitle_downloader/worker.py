@@ -0,0 +1,174 @@
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+from job_queue import Job, JobQueue
+
+
+WORKER_JOB_KINDS = ["workflow", "transcribe"]
+
+
+class Worker:
+    """
+    Fleet worker that claims jobs from a shared JobQueue.
+
+    Any number of workers, on any number of machines, can point at the same
+    queue file and artifact directory on shared storage. Each claimed job is
+    held under a lease that a background thread renews; if a worker dies its
+    lease expires and the job is re-queued for another worker. The Transcriber
+    is kept warm across jobs.
+
+    Job kinds:
+        workflow    {"url", "start_time"?, "end_time"?, "timestamps"?}: download, then transcribe
+        transcribe  {"audio_path", "timestamps"?}: transcribe a file on shared storage
+
+    Results are written to <artifact_dir>/<job id>/.
+    """
+
+    def __init__(self,
+                 queue: JobQueue,
+                 artifact_dir: str,
+                 worker_id: Optional[str] = None,
+                 lease_seconds: float = 120.0,
+                 model_size: str = "default",
+                 fast: bool = False,
+                 poll_interval: float = 5.0,
+                 max_attempts: int = 3):
+        self.queue = queue
+        self.artifact_dir = Path(artifact_dir)
+        self.artifact_dir.mkdir(parents=True, exist_ok=True)
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.model_size = model_size
+        self.fast = fast
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self._transcriber = None
+        self._stopping = threading.Event()
+
+    def _get_transcriber(self):
+        if self._transcriber is None:
+            from transcriber import Transcriber
+            self._transcriber = Transcriber(model_size=self.model_size, fast=self.fast, search_index=False)
+        return self._transcriber
+
+    def _heartbeat_loop(self, job: Job, done: threading.Event, lost: threading.Event):
+        interval = max(1.0, self.lease_seconds / 3)
+        while not done.wait(interval):
+            if not self.queue.heartbeat(job.id, self.worker_id, self.lease_seconds):
+                print(f"[{self.worker_id}] lost lease on job {job.id}")
+                lost.set()
+                return
+
+    def _publish(self, job: Job, local_path: str) -> str:
+        """Copy an artifact from local scratch space into the shared artifact store."""
+        job_dir = self.artifact_dir / str(job.id)
+        job_dir.mkdir(parents=True, exist_ok=True)
+        target = job_dir / Path(local_path).name
+        partial = target.with_name(target.name + f".{self.worker_id}.part")
+        shutil.copyfile(local_path, partial)
+        os.replace(partial, target)
+        return str(target)
+
+    def _transcribe(self, job: Job, audio_path: str, scratch_dir: str) -> Dict[str, Any]:
+        transcriber = self._get_transcriber()
+        output_path = str(Path(scratch_dir) / f"{Path(audio_path).stem}_transcript.txt")
+        result = transcriber.transcribe_audio(
+            audio_path,
+            output_path=output_path,
+            timestamps=job.payload.get("timestamps", False),
+            condition_on_previous_text=job.payload.get("condition_on_previous_text", False),
+        )
+        if not result.success:
+            raise RuntimeError(f"Transcription failed: {result.error_message}")
+        segments_path = (result.metadata or {}).get("segments_path")
+        return {
+            "transcript_path": self._publish(job, result.output_path),
+            "segments_path": self._publish(job, segments_path) if segments_path else None,
+            "metadata": result.metadata,
+        }
+
+    def run_job(self, job: Job) -> Dict[str, Any]:
+        """Execute one claimed job and return its result payload."""
+        with tempfile.TemporaryDirectory(prefix=f"worker_{job.id}_") as scratch_dir:
+            if job.kind == "transcribe":
+                return self._transcribe(job, job.payload["audio_path"], scratch_dir)
+
+            if job.kind == "workflow":
+                from video_downloader import VideoDownloader
+
+                download = VideoDownloader(output_dir=scratch_dir).download_video(
+                    job.payload["url"],
+                    start_time=job.payload.get("start_time"),
+                    end_time=job.payload.get("end_time"),
+                    extract_audio=True,
+                )
+                if not download.success:
+                    raise RuntimeError(f"Download failed: {download.error_message}")
+                result = self._transcribe(job, download.output_path, scratch_dir)
+                result["download_metadata"] = download.metadata
+                if job.payload.get("keep_audio"):
+                    result["audio_path"] = self._publish(job, download.output_path)
+                return result
+
+        raise ValueError(f"Unsupported job kind: {job.kind}")
+
+    def run_once(self) -> Optional[Job]:
+        """Claim and process a single job. Returns the job, or None if the queue was empty."""
+        self.queue.requeue_expired(max_attempts=self.max_attempts)
+        job = self.queue.claim(WORKER_JOB_KINDS, worker_id=self.worker_id, lease_seconds=self.lease_seconds)
+        if job is None:
+            return None
+
+        print(f"[{self.worker_id}] job {job.id} ({job.kind}, attempt {job.attempts}) started")
+        started = time.perf_counter()
+        done, lost = threading.Event(), threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat_loop, args=(job, done, lost), daemon=True)
+        heartbeat.start()
+        try:
+            result = self.run_job(job)
+            result["worker_id"] = self.worker_id
+            result["seconds"] = time.perf_counter() - started
+            recorded = self.queue.complete(job.id, result, worker_id=self.worker_id)
+            status = "done" if recorded else "done, but lease was lost; result discarded"
+        except KeyboardInterrupt:
+            self.queue.release(job.id, self.worker_id)
+            raise
+        except Exception as e:
+            self.queue.fail(job.id, str(e), worker_id=self.worker_id)
+            status = f"failed - {e}"
+        finally:
+            done.set()
+            heartbeat.join()
+        print(f"[{self.worker_id}] job {job.id} {status} ({time.perf_counter() - started:.1f}s)")
+        return job
+
+    def run(self, max_jobs: Optional[int] = None, exit_when_empty: bool = False):
+        """
+        Process jobs until stopped.
+
+        Args:
+            max_jobs: Stop after this many jobs
+            exit_when_empty: Stop as soon as the queue has nothing to claim
+        """
+        processed = 0
+        print(f"[{self.worker_id}] worker started (queue: {self.queue.path}, artifacts: {self.artifact_dir})")
+        while not self._stopping.is_set():
+            if max_jobs is not None and processed >= max_jobs:
+                break
+            job = self.run_once()
+            if job is None:
+                if exit_when_empty:
+                    break
+                self._stopping.wait(self.poll_interval)
+                continue
+            processed += 1
+        print(f"[{self.worker_id}] worker stopped after {processed} job(s)")
+
+    def stop(self):
+        self._stopping.set()